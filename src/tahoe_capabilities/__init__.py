@@ -27,39 +27,123 @@ __all__ = [
     "DirectoryReadCapability",
     "DirectoryWriteCapability",
     "Capability",
+    "KIND_VERIFY",
+    "KIND_READ",
+    "KIND_WRITE",
+    "KIND_MUTABLE",
+    "KIND_IMMUTABLE",
+    "KIND_DIRECTORY",
+    "KIND_LITERAL",
+    "KIND_CHK",
+    "KIND_SSK",
+    "KIND_MDMF",
     # parser.py
     "NotRecognized",
+    "InvalidLine",
+    "ParseCache",
     "readable_from_string",
     "writeable_from_string",
     "writeable_directory_from_string",
     "readonly_directory_from_string",
     "capability_from_string",
+    "capabilities_from_strings",
+    "iter_capabilities_from_strings",
+    "capabilities_from_file",
     "immutable_directory_from_string",
     "immutable_readonly_from_string",
     # serializer.py
     "digested_capability_string",
     "danger_real_capability_string",
+    "danger_real_capability_bytes",
+    "write_capabilities",
+    # binary.py
+    "to_bytes",
+    "from_bytes",
+    "from_bytes_at",
+    # index.py
+    "StorageIndexIndex",
+    "storage_index",
+    # parallel.py
+    "parallel_parse",
+    "parallel_parse_table",
+    # table.py
+    "CapabilityTable",
+    # redact.py
+    "RedactingFilter",
+    "redact_capabilities",
+    "redact_capabilities_bytes",
+    # scanner.py
+    "find_capabilities",
+    "iter_capabilities",
+    # attenuate.py
+    "attenuate_many",
+    # interning.py
+    "intern_capability",
     # predicates.py
     "is_verify",
     "is_read",
     "is_write",
     "is_mutable",
     "is_directory",
+    "kinds",
+    "kind_mask",
+    "count_kinds",
 ]
 
+from .attenuate import attenuate_many
+from .binary import from_bytes, from_bytes_at, to_bytes
+from .index import StorageIndexIndex, storage_index
+from .interning import intern_capability
+from .parallel import parallel_parse, parallel_parse_table
 from .parser import (
+    InvalidLine,
     NotRecognized,
+    ParseCache,
+    capabilities_from_file,
+    capabilities_from_strings,
     capability_from_string,
     immutable_directory_from_string,
     immutable_readonly_from_string,
+    iter_capabilities_from_strings,
     readable_from_string,
     readonly_directory_from_string,
     writeable_directory_from_string,
     writeable_from_string,
 )
-from .predicates import is_directory, is_mutable, is_read, is_verify, is_write
-from .serializer import danger_real_capability_string, digested_capability_string
+from .predicates import (
+    count_kinds,
+    is_directory,
+    is_mutable,
+    is_read,
+    is_verify,
+    is_write,
+    kind_mask,
+    kinds,
+)
+from .redact import (
+    RedactingFilter,
+    redact_capabilities,
+    redact_capabilities_bytes,
+)
+from .scanner import find_capabilities, iter_capabilities
+from .serializer import (
+    danger_real_capability_bytes,
+    danger_real_capability_string,
+    digested_capability_string,
+    write_capabilities,
+)
+from .table import CapabilityTable
 from .types import (
+    KIND_CHK,
+    KIND_DIRECTORY,
+    KIND_IMMUTABLE,
+    KIND_LITERAL,
+    KIND_MDMF,
+    KIND_MUTABLE,
+    KIND_READ,
+    KIND_SSK,
+    KIND_VERIFY,
+    KIND_WRITE,
     Capability,
     CHKDirectoryRead,
     CHKDirectoryVerify,
@@ -0,0 +1,242 @@
+"""
+Attenuate many capabilities at once: write capabilities to read
+capabilities, and read or write capabilities to verify capabilities.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .hashutil import (
+    ssk_readkey_hash_many,
+    ssk_storage_index_hash_many,
+    storage_index_hash_many,
+)
+from .parser import NotRecognized, _intcolumn, _many_parsers, _unb32column
+from .types import (
+    KIND_LITERAL,
+    KIND_READ,
+    KIND_VERIFY,
+    KIND_WRITE,
+    Capability,
+    CHKDirectoryVerify,
+    CHKVerify,
+    MDMFDirectoryRead,
+    MDMFDirectoryVerify,
+    MDMFRead,
+    MDMFVerify,
+    SSKDirectoryRead,
+    SSKDirectoryVerify,
+    SSKRead,
+    SSKVerify,
+)
+
+_Group = List[List[str]]
+_Attenuator = Callable[[_Group], Sequence[Optional[Capability]]]
+
+
+def _ssk_readkeys(group: _Group) -> List[bytes]:
+    return ssk_readkey_hash_many(_unb32column(group, 0))
+
+
+def _ssk_read_many(group: _Group) -> List[SSKRead]:
+    return SSKRead.derive_many(_ssk_readkeys(group), _unb32column(group, 1))
+
+
+def _mdmf_read_many(group: _Group) -> List[MDMFRead]:
+    return MDMFRead.derive_many(_ssk_readkeys(group), _unb32column(group, 1))
+
+
+def _chk_verify_many(group: _Group) -> List[CHKVerify]:
+    return [
+        CHKVerify(*fields)
+        for fields in zip(
+            storage_index_hash_many(_unb32column(group, 0)),
+            _unb32column(group, 1),
+            _intcolumn(group, 2),
+            _intcolumn(group, 3),
+            _intcolumn(group, 4),
+        )
+    ]
+
+
+def _ssk_verify_many(group: _Group, readkeys: List[bytes]) -> List[SSKVerify]:
+    storage_indexes = ssk_storage_index_hash_many(readkeys)
+    return list(map(SSKVerify, storage_indexes, _unb32column(group, 1)))
+
+
+def _mdmf_verify_many(group: _Group, readkeys: List[bytes]) -> List[MDMFVerify]:
+    storage_indexes = ssk_storage_index_hash_many(readkeys)
+    return list(map(MDMFVerify, storage_indexes, _unb32column(group, 1)))
+
+
+def _wrapped(
+    attenuate: Callable[[_Group], Sequence[Capability]],
+    wrap: Callable[..., Capability],
+) -> _Attenuator:
+    def attenuate_directory(group: _Group) -> List[Capability]:
+        return list(map(wrap, attenuate(group)))
+
+    return attenuate_directory
+
+
+def _nothing(group: _Group) -> List[Optional[Capability]]:
+    return [None] * len(group)
+
+
+def _ssk_verify_from_read(group: _Group) -> List[SSKVerify]:
+    return _ssk_verify_many(group, _unb32column(group, 0))
+
+
+def _ssk_verify_from_write(group: _Group) -> List[SSKVerify]:
+    return _ssk_verify_many(group, _ssk_readkeys(group))
+
+
+def _mdmf_verify_from_read(group: _Group) -> List[MDMFVerify]:
+    return _mdmf_verify_many(group, _unb32column(group, 0))
+
+
+def _mdmf_verify_from_write(group: _Group) -> List[MDMFVerify]:
+    return _mdmf_verify_many(group, _ssk_readkeys(group))
+
+
+# How to attenuate the strings with each prefix.  Only the keys and storage
+# indexes the result needs are derived, and no stronger capability is built
+# along the way.
+_to_read: Dict[str, _Attenuator] = {
+    **{
+        prefix: _many_parsers[prefix]
+        for prefix in [
+            "LIT",
+            "CHK",
+            "SSK-RO",
+            "MDMF-RO",
+            "DIR2-LIT",
+            "DIR2-CHK",
+            "DIR2-RO",
+            "DIR2-MDMF-RO",
+        ]
+    },
+    "SSK": _ssk_read_many,
+    "MDMF": _mdmf_read_many,
+    "DIR2": _wrapped(_ssk_read_many, SSKDirectoryRead),
+    "DIR2-MDMF": _wrapped(_mdmf_read_many, MDMFDirectoryRead),
+}
+
+_to_verify: Dict[str, _Attenuator] = {
+    **{
+        prefix: _many_parsers[prefix]
+        for prefix in [
+            "CHK-Verifier",
+            "SSK-Verifier",
+            "MDMF-Verifier",
+            "DIR2-CHK-Verifier",
+            "DIR2-Verifier",
+            "DIR2-MDMF-Verifier",
+        ]
+    },
+    "LIT": _nothing,
+    "DIR2-LIT": _nothing,
+    "CHK": _chk_verify_many,
+    "SSK-RO": _ssk_verify_from_read,
+    "SSK": _ssk_verify_from_write,
+    "MDMF-RO": _mdmf_verify_from_read,
+    "MDMF": _mdmf_verify_from_write,
+    "DIR2-CHK": _wrapped(_chk_verify_many, CHKDirectoryVerify),
+    "DIR2-RO": _wrapped(_ssk_verify_from_read, SSKDirectoryVerify),
+    "DIR2": _wrapped(_ssk_verify_from_write, SSKDirectoryVerify),
+    "DIR2-MDMF-RO": _wrapped(_mdmf_verify_from_read, MDMFDirectoryVerify),
+    "DIR2-MDMF": _wrapped(_mdmf_verify_from_write, MDMFDirectoryVerify),
+}
+
+
+def _read_of(cap: Capability) -> Capability:
+    kind = cap.kind
+    if kind & KIND_WRITE:
+        reader: Capability = getattr(cap, "reader")
+        return reader
+    if kind & KIND_READ:
+        return cap
+    raise ValueError(f"{cap.prefix} capability cannot be attenuated to read")
+
+
+def _verify_of(cap: Capability) -> Optional[Capability]:
+    kind = cap.kind
+    if kind & KIND_VERIFY:
+        return cap
+    if kind & KIND_LITERAL:
+        return None
+    if kind & KIND_WRITE:
+        cap = getattr(cap, "reader")
+    verifier: Capability = getattr(cap, "verifier")
+    return verifier
+
+
+_attenuators: Dict[
+    str,
+    Tuple[Dict[str, _Attenuator], Callable[[Capability], Optional[Capability]]],
+] = {
+    "read": (_to_read, _read_of),
+    "verify": (_to_verify, _verify_of),
+}
+
+
+def attenuate_many(
+    caps: Iterable[Union[Capability, str]], to: str = "read"
+) -> List[Optional[Capability]]:
+    """
+    Attenuate many capabilities.
+
+    Capability strings are attenuated without parsing them into the
+    capabilities they represent.  They are grouped by prefix and each group
+    has only the keys and storage indexes it needs derived, together.
+    Capability objects are attenuated through their ``reader`` and
+    ``verifier``.
+
+    :param caps: Capabilities, capability strings, or a mixture of both.
+
+    :param to: ``"read"`` to attenuate write capabilities to read
+        capabilities or ``"verify"`` to attenuate read and write capabilities
+        to verify capabilities.  Capabilities which are already that weak are
+        kept as they are.
+
+    :return: The attenuated capabilities, in the same order.  Literal
+        capabilities have no verify capability, so ``None`` takes their
+        place when attenuating to verify.
+
+    :raise ValueError: If ``to`` is neither ``"read"`` nor ``"verify"``, or
+        a verify capability is attenuated to read.
+
+    :raise: Whatever ``capability_from_string`` raises for a string which
+        cannot be parsed.
+    """
+    try:
+        from_strings, from_capability = _attenuators[to]
+    except KeyError:
+        raise ValueError(f"Cannot attenuate to {to!r}")
+
+    results: List[Optional[Capability]] = []
+    groups: Dict[str, Tuple[List[int], _Group]] = {}
+    for item in caps:
+        if not isinstance(item, str):
+            results.append(from_capability(item))
+            continue
+        pieces = item.split(":")
+        if pieces[0] != "URI" or len(pieces) < 2:
+            raise NotRecognized(pieces[:1])
+        try:
+            positions, group = groups[pieces[1]]
+        except KeyError:
+            if pieces[1] not in from_strings:
+                if pieces[1] in _many_parsers:
+                    raise ValueError(
+                        f"{pieces[1]} capability cannot be attenuated to {to}"
+                    )
+                raise NotRecognized(pieces[:2])
+            positions, group = groups[pieces[1]] = ([], [])
+        positions.append(len(results))
+        group.append(pieces[2:])
+        results.append(None)
+
+    for prefix, (positions, group) in groups.items():
+        for position, cap in zip(positions, from_strings[prefix](group)):
+            results[position] = cap
+    return results
@@ -0,0 +1,146 @@
+"""
+Base32 as Tahoe-LAFS writes it in capability strings: the RFC 4648
+alphabet, lowercase, with no ``=`` padding.
+"""
+
+import binascii
+from typing import Dict, List, Tuple
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz234567"
+
+# Every pair of digits, indexed by the ten bits it encodes.
+_PAIRS = tuple(a + b for a in _ALPHABET for b in _ALPHABET)
+
+# ``int`` already knows how to read base 32, it just uses a different
+# alphabet.  Decoding translates our digits, in either case, to the digit
+# with the same value in its alphabet.  Every other character translates to
+# one that ``int`` rejects.
+_INT_ALPHABET = "0123456789abcdefghijklmnopqrstuv"
+_TO_INT: Dict[int, str] = {c: "!" for c in range(128)}
+_TO_INT.update({ord(c): i for (c, i) in zip(_ALPHABET, _INT_ALPHABET)})
+_TO_INT.update({ord(c.upper()): i for (c, i) in zip(_ALPHABET, _INT_ALPHABET)})
+
+# The lengths, modulo 8, that an encoded string can have.  Any other length
+# leaves too many unused bits at the end to have come from an encoder.
+_VALID_LENGTHS = {0, 2, 4, 5, 7}
+
+
+def _encode_layout(size: int) -> Tuple[int, Tuple[int, ...], int]:
+    """
+    Work out how to encode ``size`` bytes.
+
+    :return: A three-tuple of the number of zero bits to append to the
+        input so that it fills a whole number of digit pairs, the shift of
+        each of those pairs, and the number of digits in the result.
+    """
+    digits = (size * 8 + 4) // 5
+    pairs = (digits + 1) // 2
+    return (
+        pairs * 10 - size * 8,
+        tuple(range(pairs * 10 - 10, -1, -10)),
+        digits,
+    )
+
+
+def _decode_layout(length: int) -> Tuple[int, int]:
+    """
+    Work out how to decode ``length`` digits.
+
+    :return: A two-tuple of the number of unused bits at the end of the
+        digits and the number of bytes in the result.
+
+    :raise binascii.Error: If no encoding has this length.
+    """
+    if length % 8 not in _VALID_LENGTHS:
+        raise binascii.Error("Incorrect padding")
+    size = length * 5 // 8
+    return (length * 5 - size * 8, size)
+
+
+# Precomputed layouts for the sizes of the keys and hashes in capabilities.
+_ENCODE_LAYOUTS = {size: _encode_layout(size) for size in (16, 32)}
+_DECODE_LAYOUTS = {length: _decode_layout(length) for length in (26, 52)}
+
+
+def b32encode(data: bytes) -> str:
+    """
+    Base32-encode a byte string to a text string.
+    """
+    try:
+        shift, shifts, digits = _ENCODE_LAYOUTS[len(data)]
+    except KeyError:
+        shift, shifts, digits = _encode_layout(len(data))
+    value = int.from_bytes(data, "big") << shift
+    pairs = _PAIRS
+    return "".join([pairs[(value >> s) & 1023] for s in shifts])[:digits]
+
+
+def b32decode(s: str) -> bytes:
+    """
+    Base32-decode a text string into a byte string.
+
+    Uppercase digits are accepted as well as lowercase.  Any bits left over
+    after the last whole byte are ignored.
+
+    :raise binascii.Error: If ``s`` contains anything other than base32
+        digits or if it has a length that no encoded string can have.
+    """
+    try:
+        shift, size = _DECODE_LAYOUTS[len(s)]
+    except KeyError:
+        shift, size = _decode_layout(len(s))
+    if not s:
+        return b""
+    if not s.isascii():
+        raise binascii.Error("Non-base32 digit found")
+    try:
+        value = int(s.translate(_TO_INT), 32)
+    except ValueError:
+        raise binascii.Error("Non-base32 digit found") from None
+    return (value >> shift).to_bytes(size, "big")
+
+
+def b32decode_many(strs: List[str]) -> List[bytes]:
+    """
+    Base32-decode many text strings into byte strings.
+
+    Strings of the same length are padded out to a whole number of bytes
+    with zero-valued digits so that they can be joined and decoded with one
+    ``int`` conversion.  The result is the same as decoding each string
+    with ``b32decode``.
+
+    :raise binascii.Error: If any string cannot be decoded.
+    """
+    if not strs:
+        return []
+    length = len(strs[0])
+    if not all(len(s) == length for s in strs):
+        by_length: Dict[int, List[int]] = {}
+        for index, s in enumerate(strs):
+            by_length.setdefault(len(s), []).append(index)
+        result = [b""] * len(strs)
+        for indexes in by_length.values():
+            group = b32decode_many([strs[index] for index in indexes])
+            for index, decoded in zip(indexes, group):
+                result[index] = decoded
+        return result
+
+    if length == 0 or length % 8 not in _VALID_LENGTHS:
+        return list(map(b32decode, strs))
+
+    padding = -length % 8
+    joined = ("a" * padding).join(strs) + "a" * padding
+    if not joined.isascii():
+        return list(map(b32decode, strs))
+    try:
+        value = int(joined.translate(_TO_INT), 32)
+    except ValueError:
+        return list(map(b32decode, strs))
+
+    step = (length + padding) * 5 // 8
+    size = length * 5 // 8
+    joined_bytes = value.to_bytes(step * len(strs), "big")
+    return [
+        joined_bytes[offset : offset + size]
+        for offset in range(0, len(joined_bytes), step)
+    ]
@@ -0,0 +1,280 @@
+"""
+A compact binary form of capabilities.
+
+An encoded capability is a version byte, a byte giving the type of the
+capability, and then the fields of that type:
+
+* ``LIT`` and ``DIR2-LIT``: the length of the data as a varint, followed by
+  the data.
+* Every other type: the 16 byte key or storage index and then the 32 byte
+  hash, the same two values the capability string holds.  ``CHK`` types
+  follow these with the needed shares, total shares and size as varints.
+
+Varints are unsigned LEB128.  Like the capability string, the binary form
+holds nothing that can be derived, so decoding a read or write capability
+derives its other keys.
+
+This layout is stable.  A different layout will have a different version.
+"""
+
+from mmap import mmap
+from typing import Any, Callable, Dict, Tuple, Union
+
+from .types import (
+    Capability,
+    CHKDirectoryRead,
+    CHKDirectoryVerify,
+    CHKRead,
+    CHKVerify,
+    LiteralDirectoryRead,
+    LiteralRead,
+    MDMFDirectoryRead,
+    MDMFDirectoryVerify,
+    MDMFDirectoryWrite,
+    MDMFRead,
+    MDMFVerify,
+    MDMFWrite,
+    SSKDirectoryRead,
+    SSKDirectoryVerify,
+    SSKDirectoryWrite,
+    SSKRead,
+    SSKVerify,
+    SSKWrite,
+)
+
+Buffer = Union[bytes, bytearray, memoryview, mmap]
+
+VERSION = 1
+
+# The type byte of each capability type is its index in this tuple.  Only
+# add to the end of it.
+_TAGS = (
+    "LIT",
+    "CHK-Verifier",
+    "CHK",
+    "SSK-Verifier",
+    "SSK-RO",
+    "SSK",
+    "MDMF-Verifier",
+    "MDMF-RO",
+    "MDMF",
+    "DIR2-LIT",
+    "DIR2-CHK-Verifier",
+    "DIR2-CHK",
+    "DIR2-Verifier",
+    "DIR2-RO",
+    "DIR2",
+    "DIR2-MDMF-Verifier",
+    "DIR2-MDMF-RO",
+    "DIR2-MDMF",
+)
+_TAG_NUMBERS = {prefix: tag for (tag, prefix) in enumerate(_TAGS)}
+
+_LITERAL_TAGS = frozenset({_TAG_NUMBERS["LIT"], _TAG_NUMBERS["DIR2-LIT"]})
+_CHK_TAGS = frozenset(
+    _TAG_NUMBERS[prefix]
+    for prefix in ["CHK-Verifier", "CHK", "DIR2-CHK-Verifier", "DIR2-CHK"]
+)
+
+_KEY_SIZE = 16
+_HASH_SIZE = 32
+
+# The largest varint we will read is for a 64 bit value.
+_MAX_VARINT_SIZE = 10
+
+
+def _chk_verify(a: bytes, b: bytes, n: int, t: int, s: int, lazy: bool) -> CHKVerify:
+    return CHKVerify(a, b, n, t, s)
+
+
+def _ssk_verify(a: bytes, b: bytes, lazy: bool) -> SSKVerify:
+    return SSKVerify(a, b)
+
+
+def _mdmf_verify(a: bytes, b: bytes, lazy: bool) -> MDMFVerify:
+    return MDMFVerify(a, b)
+
+
+def _directory(
+    build: Callable[..., Capability], wrap: Callable[[Any], Capability]
+) -> Callable[..., Capability]:
+    def build_directory(*args: Any) -> Capability:
+        return wrap(build(*args))
+
+    return build_directory
+
+
+# Build a capability of each type from the values in its binary form and
+# whether or not key derivation is lazy.
+_builders: Dict[str, Callable[..., Capability]] = {
+    "CHK-Verifier": _chk_verify,
+    "CHK": CHKRead.derive,
+    "SSK-Verifier": _ssk_verify,
+    "SSK-RO": SSKRead.derive,
+    "SSK": SSKWrite.derive,
+    "MDMF-Verifier": _mdmf_verify,
+    "MDMF-RO": MDMFRead.derive,
+    "MDMF": MDMFWrite.derive,
+    "DIR2-CHK-Verifier": _directory(_chk_verify, CHKDirectoryVerify),
+    "DIR2-CHK": _directory(CHKRead.derive, CHKDirectoryRead),
+    "DIR2-Verifier": _directory(_ssk_verify, SSKDirectoryVerify),
+    "DIR2-RO": _directory(SSKRead.derive, SSKDirectoryRead),
+    "DIR2": _directory(SSKWrite.derive, SSKDirectoryWrite),
+    "DIR2-MDMF-Verifier": _directory(_mdmf_verify, MDMFDirectoryVerify),
+    "DIR2-MDMF-RO": _directory(MDMFRead.derive, MDMFDirectoryRead),
+    "DIR2-MDMF": _directory(MDMFWrite.derive, MDMFDirectoryWrite),
+}
+
+_tag_builders = tuple(_builders.get(prefix) for prefix in _TAGS)
+
+
+def _varint(n: int) -> bytes:
+    """
+    Encode a non-negative integer as an unsigned LEB128 varint.
+    """
+    if n < 0:
+        raise ValueError(f"Cannot encode negative value {n}")
+    if n < 0x80:
+        return bytes((n,))
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _read_varint(view: memoryview, offset: int) -> Tuple[int, int]:
+    """
+    Decode an unsigned LEB128 varint.
+
+    :return: A two-tuple of the value and the offset of the first byte after
+        it.
+
+    :raise ValueError: If the buffer ends before the varint does or if the
+        varint is too long.
+    """
+    value = 0
+    shift = 0
+    end = min(len(view), offset + _MAX_VARINT_SIZE)
+    for index in range(offset, end):
+        byte = view[index]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, index + 1
+        shift += 7
+    if end == len(view):
+        raise ValueError(f"Truncated varint at offset {offset}")
+    raise ValueError(f"Varint too long at offset {offset}")
+
+
+def to_bytes(cap: Capability) -> bytes:
+    """
+    Encode a capability in its binary form.  Like the capability string,
+    this includes all of the capability's secrets.
+
+    :raise ValueError: If the capability has a key or hash of the wrong
+        size.
+    """
+    tag = _TAG_NUMBERS[cap.prefix]
+    secrets = cap.secrets
+    if tag in _LITERAL_TAGS:
+        (data,) = secrets
+        return bytes((VERSION, tag)) + _varint(len(data)) + data
+
+    key, hash_ = secrets
+    if len(key) != _KEY_SIZE or len(hash_) != _HASH_SIZE:
+        raise ValueError(
+            f"{cap.prefix} fields must be {_KEY_SIZE} and {_HASH_SIZE} bytes, "
+            f"not {len(key)} and {len(hash_)}"
+        )
+    encoded = bytes((VERSION, tag)) + key + hash_
+    if tag in _CHK_TAGS:
+        encoded += b"".join(_varint(int(value)) for value in cap.suffix)
+    return encoded
+
+
+def from_bytes_at(
+    buf: Buffer, offset: int = 0, lazy: bool = False
+) -> Tuple[Capability, int]:
+    """
+    Decode the binary form of a capability which starts part of the way
+    through a buffer.  Only the capability's own fields are copied out of
+    the buffer.
+
+    :param buf: The buffer holding the capability.  This can be anything
+        which supports the buffer protocol with one-byte items, such as
+        ``bytes`` or an ``mmap``.
+
+    :param offset: Where in the buffer the capability starts.
+
+    :param lazy: If ``True``, postpone key derivation the same way
+        ``capability_from_string`` does.
+
+    :return: A two-tuple of the capability and the offset of the first byte
+        after it.
+
+    :raise ValueError: If the buffer does not hold a capability at
+        ``offset``.
+    """
+    return _from_view_at(_byte_view(buf), offset, lazy)
+
+
+def _byte_view(buf: Buffer) -> memoryview:
+    view = memoryview(buf)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+def _from_view_at(view: memoryview, offset: int, lazy: bool) -> Tuple[Capability, int]:
+    if offset < 0 or offset + 2 > len(view):
+        raise ValueError(f"Truncated capability at offset {offset}")
+    version = view[offset]
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary capability version {version}")
+    tag = view[offset + 1]
+    if tag >= len(_TAGS):
+        raise ValueError(f"Unrecognized binary capability type {tag}")
+    start = offset + 2
+
+    if tag in _LITERAL_TAGS:
+        size, start = _read_varint(view, start)
+        end = start + size
+        if end > len(view):
+            raise ValueError(f"Truncated capability at offset {offset}")
+        literal = LiteralRead(bytes(view[start:end]))
+        if _TAGS[tag] == "DIR2-LIT":
+            return LiteralDirectoryRead(literal), end
+        return literal, end
+
+    middle = start + _KEY_SIZE
+    end = middle + _HASH_SIZE
+    if end > len(view):
+        raise ValueError(f"Truncated capability at offset {offset}")
+    key = bytes(view[start:middle])
+    hash_ = bytes(view[middle:end])
+    build = _tag_builders[tag]
+    assert build is not None
+    if tag in _CHK_TAGS:
+        needed, end = _read_varint(view, end)
+        total, end = _read_varint(view, end)
+        size, end = _read_varint(view, end)
+        return build(key, hash_, needed, total, size, lazy), end
+    return build(key, hash_, lazy), end
+
+
+def from_bytes(buf: Buffer, lazy: bool = False) -> Capability:
+    """
+    Decode the binary form of a capability.
+
+    :param lazy: If ``True``, postpone key derivation the same way
+        ``capability_from_string`` does.
+
+    :raise ValueError: If the buffer does not hold exactly one capability.
+    """
+    view = _byte_view(buf)
+    cap, end = _from_view_at(view, 0, lazy)
+    if end != len(view):
+        raise ValueError(f"{len(view) - end} bytes of trailing data")
+    return cap
@@ -0,0 +1,214 @@
+"""
+Compute everything about a CHK file that depends only on its plaintext, in
+one pass over it.
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+from attrs import field, frozen
+
+from .hashtree import HashTreeBuilder
+from .hashutil import (
+    HASH_CHUNK_SIZE,
+    _Buffer,
+    _PathOrFile,
+    _read_file,
+    convergence_hasher,
+    plaintext_hasher,
+    plaintext_segment_hasher,
+    random_key,
+    storage_index_hash,
+)
+from .types import CHKRead, CHKVerify
+
+
+@frozen
+class PreparedCHK:
+    """
+    The values of a CHK file which are known before it is encrypted and
+    encoded.
+
+    :ivar readkey: The encryption key.
+    :ivar storage_index: The storage index derived from ``readkey``.
+    :ivar needed: The number of shares needed to read the file.
+    :ivar total: The number of shares the file is encoded into.
+    :ivar size: The size of the file.
+
+    :ivar segment_size: The size of each segment, except perhaps the last:
+        the maximum segment size, or the size of the file if that is
+        smaller, rounded up to a multiple of ``needed``, as Tahoe-LAFS
+        does.
+
+    :ivar plaintext_hash: The ``plaintext_hash`` of the whole file.
+
+    :ivar plaintext_segment_hashes: The ``plaintext_segment_hash`` of each
+        segment.
+    """
+
+    readkey: bytes = field(repr=False)
+    storage_index: bytes
+    needed: int
+    total: int
+    size: int
+    segment_size: int
+    plaintext_hash: bytes
+    plaintext_segment_hashes: Tuple[bytes, ...] = field(repr=False)
+
+    def plaintext_root_hash(self) -> bytes:
+        """
+        Compute the root of the hash tree of the plaintext segment hashes.
+        """
+        return HashTreeBuilder(self.plaintext_segment_hashes).root()
+
+    def verify_capability(self, uri_extension_hash: bytes) -> CHKVerify:
+        """
+        Make the verify capability for the file once it has been encoded.
+
+        :param uri_extension_hash: The ``uri_extension_hash`` of the file's
+            URI extension block.
+        """
+        return CHKVerify(
+            self.storage_index, uri_extension_hash, self.needed, self.total, self.size
+        )
+
+    def read_capability(self, uri_extension_hash: bytes) -> CHKRead:
+        """
+        Make the read capability for the file once it has been encoded.
+
+        The storage index is not derived again.
+
+        :param uri_extension_hash: The ``uri_extension_hash`` of the file's
+            URI extension block.
+        """
+        return CHKRead(self.readkey, self.verify_capability(uri_extension_hash))
+
+
+def _segment_size(needed: int, max_segment_size: int, size: int) -> int:
+    """
+    Compute the segment size Tahoe-LAFS encodes a file with.
+    """
+    segment_size = min(max_segment_size, size)
+    return -(-segment_size // needed) * needed
+
+
+class _PlaintextHashers:
+    """
+    Feed the plaintext of a file to the hashers which need it.
+    """
+
+    def __init__(
+        self,
+        needed: int,
+        total: int,
+        max_segment_size: int,
+        convergence: Optional[bytes],
+        size: int,
+    ) -> None:
+        if not 1 <= needed <= total:
+            raise ValueError(f"Cannot encode {needed} of {total} shares")
+        self.expected_size = size
+        self.segment_size = _segment_size(needed, max_segment_size, size)
+        # The key depends on the segment size actually used, not the maximum.
+        self.convergence = (
+            None
+            if convergence is None
+            else convergence_hasher(needed, total, self.segment_size, convergence)
+        )
+        self.plaintext = plaintext_hasher()
+        self.segment = plaintext_segment_hasher()
+        # The number of bytes of the current segment hashed so far.
+        self.segment_filled = 0
+        self.segment_hashes: List[bytes] = []
+        self.size = 0
+
+    def update(self, chunk: _Buffer) -> None:
+        if self.convergence is not None:
+            self.convergence.update(chunk)
+        self.plaintext.update(chunk)
+        with memoryview(chunk) as view:
+            size = view.nbytes
+            self.size += size
+            if self.size > self.expected_size:
+                raise ValueError(
+                    f"File is larger than its size of {self.expected_size} bytes"
+                )
+            offset = 0
+            while offset < size:
+                take = min(size - offset, self.segment_size - self.segment_filled)
+                with view[offset : offset + take] as piece:
+                    self.segment.update(piece)
+                offset += take
+                self.segment_filled += take
+                if self.segment_filled == self.segment_size:
+                    self._end_segment()
+
+    def _end_segment(self) -> None:
+        self.segment_hashes.append(self.segment.digest())
+        self.segment = plaintext_segment_hasher()
+        self.segment_filled = 0
+
+    def finish(self) -> None:
+        if self.size != self.expected_size:
+            raise ValueError(
+                f"File is {self.size} bytes, not its size of "
+                f"{self.expected_size} bytes"
+            )
+        if self.segment_filled:
+            self._end_segment()
+
+
+def prepare_chk(
+    path_or_file: _PathOrFile,
+    needed: int,
+    total: int,
+    max_segment_size: int,
+    convergence: Optional[bytes] = None,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    size: Optional[int] = None,
+) -> PreparedCHK:
+    """
+    Read a file once to compute its encryption key, storage index and
+    plaintext hashes.
+
+    The file is read the same way as by ``hash_file``, and each chunk goes
+    to every hasher before the next is read.
+
+    :param needed: The number of shares needed to read the file.
+    :param total: The number of shares to encode the file into.
+    :param max_segment_size: The maximum segment size of the encoding.
+
+    :param convergence: The convergence secret to derive the encryption key
+        from the contents with, as ``convergence_hash`` does, or ``None`` to
+        use a random key.
+
+    :param size: The size of the file.  The segment size, and so the
+        convergent encryption key, depends on it, so it is needed before the
+        file is read.  It must be given for a file object.  The size of a
+        file at a path is found with ``os.stat`` if it is not given.
+
+    :raise ValueError: If the encoding parameters are not valid, if no size
+        is given for a file object, or if the file is not the size it was
+        expected to be.
+    """
+    if size is None:
+        if not isinstance(path_or_file, (str, os.PathLike)):
+            raise ValueError("The size of a file object must be given")
+        size = os.stat(path_or_file).st_size
+    hashers = _PlaintextHashers(needed, total, max_segment_size, convergence, size)
+    _read_file(path_or_file, hashers.update, chunk_size)
+    hashers.finish()
+    if hashers.convergence is None:
+        readkey = random_key()
+    else:
+        readkey = hashers.convergence.digest()
+    return PreparedCHK(
+        readkey,
+        storage_index_hash(readkey),
+        needed,
+        total,
+        hashers.size,
+        hashers.segment_size,
+        hashers.plaintext.digest(),
+        tuple(hashers.segment_hashes),
+    )
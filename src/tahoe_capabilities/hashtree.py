@@ -0,0 +1,223 @@
+"""
+Merkle hash trees, as used by Tahoe-LAFS to validate blocks and segments.
+
+The leaves of a tree are hashes, such as the ``block_hash`` of each block of
+a share or the ``crypttext_segment_hash`` of each segment of a file.  The
+leaves are padded to a power of two with ``empty_leaf_hash`` of each missing
+leaf's number, and each interior node is the ``pair_hash`` of its children.
+
+Nodes are numbered the way Tahoe-LAFS numbers them: the root is node 0 and
+the children of node ``i`` are nodes ``2 * i + 1`` and ``2 * i + 2``, so the
+leaves of a tree with ``n`` (padded) leaves are nodes ``n - 1`` to
+``2 * n - 2``.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+from .hashutil import empty_leaf_hash, pair_hash
+
+
+class BadHashError(ValueError):
+    """
+    A leaf or node hash does not match the hashes it was checked against.
+    """
+
+
+class NotEnoughHashesError(ValueError):
+    """
+    Some node hashes needed to check leaves against the root are missing.
+    """
+
+
+def _padded(num_leaves: int) -> int:
+    """
+    Get the number of leaves of a tree once padded to a power of two.
+    """
+    padded = 1
+    while padded < num_leaves:
+        padded *= 2
+    return padded
+
+
+def _sibling(index: int) -> int:
+    return index + 1 if index % 2 else index - 1
+
+
+def _parent(index: int) -> int:
+    return (index - 1) // 2
+
+
+class HashTreeBuilder:
+    """
+    Compute the root of a hash tree from its leaves one at a time.
+
+    Only the roots of the complete subtrees seen so far are kept, at most
+    one for each height, so building the tree of ``n`` leaves uses memory
+    proportional to ``log(n)``.
+    """
+
+    def __init__(self, leaves: Iterable[bytes] = ()) -> None:
+        self._count = 0
+        # The roots of the complete subtrees on the left edge of the tree
+        # built so far, as pairs of height and hash, highest first.
+        self._stack: List[Tuple[int, bytes]] = []
+        self.extend(leaves)
+
+    def __len__(self) -> int:
+        """
+        Get the number of leaves added so far.
+        """
+        return self._count
+
+    def add(self, leaf: bytes) -> None:
+        """
+        Add the next leaf of the tree.
+        """
+        _push(self._stack, leaf)
+        self._count += 1
+
+    def extend(self, leaves: Iterable[bytes]) -> None:
+        """
+        Add the next few leaves of the tree.
+        """
+        for leaf in leaves:
+            self.add(leaf)
+
+    def root(self) -> bytes:
+        """
+        Compute the root of the tree of the leaves added so far.
+
+        More leaves can still be added afterwards.
+        """
+        stack = list(self._stack)
+        for i in range(self._count, _padded(self._count)):
+            _push(stack, empty_leaf_hash(i))
+        ((_, root),) = stack
+        return root
+
+
+def _push(stack: List[Tuple[int, bytes]], leaf: bytes) -> None:
+    stack.append((0, leaf))
+    while len(stack) > 1 and stack[-1][0] == stack[-2][0]:
+        height, right = stack.pop()
+        _, left = stack.pop()
+        stack.append((height + 1, pair_hash(left, right)))
+
+
+def hash_tree(leaves: Iterable[bytes]) -> List[bytes]:
+    """
+    Compute every node of a hash tree.
+
+    The uploader of a share uses this to find the hashes a downloader needs
+    to check some of its blocks.  To compute only the root use
+    ``HashTreeBuilder``.
+
+    :return: The hash of each node, indexed by node number.
+    """
+    row = list(leaves)
+    row.extend(empty_leaf_hash(i) for i in range(len(row), _padded(len(row))))
+    rows = [row]
+    while len(row) > 1:
+        row = [pair_hash(row[i], row[i + 1]) for i in range(0, len(row), 2)]
+        rows.append(row)
+    return [node for row in reversed(rows) for node in row]
+
+
+def _leaf_indexes(num_leaves: int, leafnums: Iterable[int]) -> Dict[int, int]:
+    """
+    Map the numbers of some leaves to their node numbers.
+
+    :raise ValueError: If a leaf number is not the number of one of the
+        ``num_leaves`` leaves.
+    """
+    first = _padded(num_leaves) - 1
+    indexes = {}
+    for leafnum in leafnums:
+        if not 0 <= leafnum < num_leaves:
+            raise ValueError(
+                f"Leaf {leafnum} is not in a tree with {num_leaves} leaves"
+            )
+        indexes[leafnum] = first + leafnum
+    return indexes
+
+
+def needed_hashes(
+    num_leaves: int, leafnums: Iterable[int], include_leaves: bool = False
+) -> Set[int]:
+    """
+    Find which node hashes are needed to check some leaves against the root.
+
+    These are the siblings of the nodes on the paths from the leaves to the
+    root, apart from those on the paths themselves, which are computed from
+    the leaves.
+
+    :param num_leaves: The number of leaves in the tree, before padding.
+    :param leafnums: The numbers of the leaves to check.
+    :param include_leaves: If ``True``, also include the leaves' own nodes.
+
+    :return: The node numbers.
+
+    :raise ValueError: If a leaf number is not in the tree.
+    """
+    path: Set[int] = set()
+    for index in _leaf_indexes(num_leaves, leafnums).values():
+        while index not in path:
+            path.add(index)
+            if index == 0:
+                break
+            index = _parent(index)
+    needed = {_sibling(index) for index in path if index} - path
+    if include_leaves:
+        needed.update(index for index in path if index >= _padded(num_leaves) - 1)
+    return needed
+
+
+def verify_leaves(
+    root: bytes,
+    num_leaves: int,
+    leaves: Mapping[int, bytes],
+    hashes: Mapping[int, bytes],
+) -> None:
+    """
+    Check some leaves of a hash tree against its root.
+
+    :param root: The trusted root hash of the tree.
+    :param num_leaves: The number of leaves in the tree, before padding.
+    :param leaves: The leaves to check, keyed by leaf number.
+
+    :param hashes: Untrusted node hashes, keyed by node number.  These must
+        include the nodes given by ``needed_hashes`` for the leaves.  Any
+        other nodes on the paths from the leaves to the root are checked
+        too.
+
+    :raise NotEnoughHashesError: If a needed node hash is missing.
+    :raise BadHashError: If the leaves do not match the root.
+    :raise ValueError: If a leaf number is not in the tree.
+    """
+    nodes = dict(hashes)
+    nodes[0] = root
+    level = set()
+    for leafnum, index in _leaf_indexes(num_leaves, leaves).items():
+        if nodes.setdefault(index, leaves[leafnum]) != leaves[leafnum]:
+            raise BadHashError(f"Leaf {leafnum} does not match node {index}")
+        level.add(index)
+
+    # Every leaf is at the same depth so the paths from them meet the same
+    # levels of the tree at the same time.
+    while level and 0 not in level:
+        parents = set()
+        for index in level:
+            parent = _parent(index)
+            if parent in parents:
+                continue
+            sibling = _sibling(index)
+            if sibling not in nodes:
+                raise NotEnoughHashesError(f"Node {sibling} is needed")
+            if index % 2:
+                computed = pair_hash(nodes[index], nodes[sibling])
+            else:
+                computed = pair_hash(nodes[sibling], nodes[index])
+            if nodes.setdefault(parent, computed) != computed:
+                raise BadHashError(f"Node {parent} does not match its children")
+            parents.add(parent)
+        level = parents
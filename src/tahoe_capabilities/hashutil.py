@@ -3,8 +3,25 @@ Hashing utilities.
 """
 
 import hashlib
+import mmap
 import os
-from typing import Optional
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .lru import LRUCache
 
 # Be very very cautious when modifying this file. Almost any change will cause
 # a compatibility break, invalidating all outstanding URIs and making any
@@ -16,10 +33,26 @@ from typing import Optional
 # encryption keys.
 CRYPTO_VAL_SIZE = 32
 
+# The types of input the hash functions accept.  Anything else which
+# supports the buffer protocol can be passed wrapped in a memoryview.
+_Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+# Below this size it is cheaper to copy a value into its netstring and hash
+# that than to hash the netstring in three pieces.
+_NETSTRING_COPY_LIMIT = 2**12
 
-def netstring(s: bytes) -> bytes:
+
+def _nbytes(s: _Buffer) -> int:
+    if isinstance(s, (bytes, bytearray)):
+        return len(s)
+    with memoryview(s) as view:
+        return view.nbytes
+
+
+def netstring(s: _Buffer) -> bytes:
     return b"%d:%s," % (
-        len(s),
+        _nbytes(s),
         s,
     )
 
@@ -27,44 +60,266 @@ def netstring(s: bytes) -> bytes:
 class _SHA256d_Hasher(object):
     # use SHA-256d, as defined by Ferguson and Schneier: hash the output
     # again to prevent length-extension attacks
-    def __init__(self, truncate_to: Optional[int] = None) -> None:
-        self.h = hashlib.sha256()
+    #
+    # The interface follows hashlib's: digest() can be called repeatedly
+    # and more data can be hashed after it, and copy() gives an independent
+    # hasher with the same state.
+    name = "sha256d"
+    block_size = 64
+
+    def __init__(
+        self, truncate_to: Optional[int] = None, h: "Optional[hashlib._Hash]" = None
+    ) -> None:
+        self.h = hashlib.sha256() if h is None else h
         self.truncate_to = truncate_to
-        self._digest: Optional[bytes] = None
 
-    def update(self, data: bytes) -> None:
+    @property
+    def digest_size(self) -> int:
+        return self.truncate_to or 32
+
+    def update(self, data: _Buffer) -> None:
         self.h.update(data)
 
+    def update_netstring(self, data: _Buffer) -> None:
+        """
+        Hash ``netstring(data)`` without copying large ``data`` into it.
+        """
+        size = _nbytes(data)
+        if size < _NETSTRING_COPY_LIMIT:
+            self.h.update(b"%d:%s," % (size, data))
+        else:
+            self.h.update(b"%d:" % (size,))
+            self.h.update(data)
+            self.h.update(b",")
+
     def digest(self) -> bytes:
-        if self._digest is None:
-            h1 = self.h.digest()
-            del self.h
-            h2 = hashlib.sha256(h1).digest()
-            if self.truncate_to:
-                h2 = h2[: self.truncate_to]
-            self._digest = h2
-        return self._digest
+        return hashlib.sha256(self.h.digest()).digest()[: self.truncate_to or None]
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+    def copy(self) -> "_SHA256d_Hasher":
+        return _SHA256d_Hasher(self.truncate_to, self.h.copy())
+
+
+# The state of SHA-256 after hashing the netstring of each registered tag.
+# Hashing with a registered tag starts from a copy of its state rather than
+# hashing the tag again.
+_tag_states: "Dict[bytes, hashlib._Hash]" = {}
+
+
+def register_tag(tag: bytes) -> None:
+    """
+    Hash ``tag`` once now so that later tagged hashes with it start from a
+    copy of the result.
+
+    Only register tags that are used many times.  Registered tags are kept
+    forever, so never register a tag which contains a secret.
+    """
+    if tag not in _tag_states:
+        _tag_states[tag] = hashlib.sha256(netstring(tag))
+
+
+def _tag_state(tag: _Buffer) -> "hashlib._Hash":
+    """
+    Get a SHA-256 hasher which has hashed ``netstring(tag)``.
+    """
+    if isinstance(tag, bytes):
+        state = _tag_states.get(tag)
+        if state is not None:
+            return state.copy()
+    return hashlib.sha256(netstring(tag))
+
+
+def tagged_hasher(tag: _Buffer, truncate_to: Optional[int] = None) -> _SHA256d_Hasher:
+    return _SHA256d_Hasher(truncate_to, _tag_state(tag))
+
+
+def tagged_hash(tag: _Buffer, val: _Buffer, truncate_to: Optional[int] = None) -> bytes:
+    h = _tag_state(tag)
+    h.update(val)
+    return hashlib.sha256(h.digest()).digest()[: truncate_to or None]
+
+
+# hashlib releases the GIL while hashing an input of more than 2 KiB.  Values
+# this large take long enough to hash that hashing them in several threads
+# beats the cost of handing them to the threads.
+_THREADED_HASH_MIN_SIZE = 2**14
+
+
+def _tagged_hash_list(
+    prefix: "hashlib._Hash", values: Iterable[_Buffer], truncate_to: Optional[int]
+) -> List[bytes]:
+    sha256 = hashlib.sha256
+    end = truncate_to or None
+    digests = []
+    for value in values:
+        h = prefix.copy()
+        h.update(value)
+        digests.append(sha256(h.digest()).digest()[:end])
+    return digests
+
 
+def tagged_hash_many(
+    tag: _Buffer,
+    values: Iterable[_Buffer],
+    truncate_to: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[bytes]:
+    """
+    Compute ``tagged_hash(tag, value, truncate_to)`` for each of ``values``.
+
+    The tag is hashed at most once.  Each value is hashed starting from a
+    copy of the resulting state.
+
+    :param workers: The largest number of threads to hash with, or ``None``
+        to use one for each CPU.  Values are only hashed in several threads
+        if there are at least two of them and they average at least 16 KiB,
+        since smaller values are hashed without releasing the GIL or too
+        quickly to be worth handing to a thread.
+
+    :return: The hashes in the same order as ``values``.
+    """
+    prefix = _tag_state(tag)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 2:
+        return _tagged_hash_list(prefix, values, truncate_to)
+
+    values = list(values)
+    workers = min(workers, len(values))
+    if workers < 2 or sum(map(_nbytes, values)) < _THREADED_HASH_MIN_SIZE * len(values):
+        return _tagged_hash_list(prefix, values, truncate_to)
+
+    # Give each thread one contiguous run of values rather than one value at
+    # a time, so the threads spend their time hashing rather than waiting
+    # for the executor.
+    step = -(-len(values) // workers)
+    runs = [values[i : i + step] for i in range(0, len(values), step)]
+    with ThreadPoolExecutor(workers) as pool:
+        results = pool.map(
+            _tagged_hash_list, [prefix] * len(runs), runs, [truncate_to] * len(runs)
+        )
+        return [digest for result in results for digest in result]
+
+
+# The amount of a file to hash at a time.  Large enough that hashlib
+# releases the GIL and the per-chunk overhead is negligible.
+HASH_CHUNK_SIZE = 2**20
 
-def tagged_hasher(tag: bytes, truncate_to: Optional[int] = None) -> _SHA256d_Hasher:
-    hasher = _SHA256d_Hasher(truncate_to)
-    hasher.update(netstring(tag))
-    return hasher
 
+def hash_stream(
+    f: BinaryIO,
+    tag: _Buffer,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    truncate_to: Optional[int] = None,
+) -> bytes:
+    """
+    Compute ``tagged_hash(tag, f.read(), truncate_to)`` without holding the
+    whole stream in memory.
+
+    The stream is read into one reused buffer with ``readinto`` so reading
+    it allocates nothing per chunk.  Streams without ``readinto`` are read
+    with ``read``.
+    """
+    return _hash_stream_into(f, tagged_hasher(tag, truncate_to), chunk_size)
 
-def tagged_hash(tag: bytes, val: bytes, truncate_to: Optional[int] = None) -> bytes:
-    hasher = tagged_hasher(tag, truncate_to)
-    hasher.update(val)
+
+def _hash_stream_into(f: BinaryIO, hasher: _SHA256d_Hasher, chunk_size: int) -> bytes:
+    _read_stream(f, hasher.update, chunk_size)
     return hasher.digest()
 
 
+def _read_stream(
+    f: BinaryIO, consume: Callable[[_Buffer], object], chunk_size: int
+) -> None:
+    """
+    Pass the rest of a stream to ``consume`` one chunk at a time, the way
+    ``hash_stream`` reads it.
+
+    A chunk may be a view of a buffer which is reused for the next chunk,
+    so ``consume`` must not keep it.
+    """
+    readinto = getattr(f, "readinto", None)
+    if readinto is None:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            consume(chunk)
+        return
+
+    buf = bytearray(chunk_size)
+    with memoryview(buf) as view:
+        while True:
+            n = readinto(buf)
+            if not n:
+                break
+            # Release each slice before the view, even if ``consume``
+            # raises, or closing the view fails and hides the error.
+            with view[:n] as piece:
+                consume(piece)
+
+
+_PathOrFile = Union[str, "os.PathLike[str]", BinaryIO]
+
+
+def hash_file(
+    path_or_file: _PathOrFile,
+    tag: _Buffer,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    truncate_to: Optional[int] = None,
+) -> bytes:
+    """
+    Compute the tagged hash of the contents of a file.
+
+    A file given by path is mapped into memory and hashed through
+    ``memoryview`` slices of the mapping, so nothing is copied.  If it
+    cannot be mapped, or if an open file is given, it is read with
+    ``hash_stream`` from its current position.
+
+    :return: The same as ``tagged_hash(tag, contents, truncate_to)``.
+    """
+    return _hash_file_into(path_or_file, tagged_hasher(tag, truncate_to), chunk_size)
+
+
+def _hash_file_into(
+    path_or_file: _PathOrFile, hasher: _SHA256d_Hasher, chunk_size: int
+) -> bytes:
+    _read_file(path_or_file, hasher.update, chunk_size)
+    return hasher.digest()
+
+
+def _read_file(
+    path_or_file: _PathOrFile, consume: Callable[[_Buffer], object], chunk_size: int
+) -> None:
+    """
+    Pass the contents of a file to ``consume`` one chunk at a time, the way
+    ``hash_file`` reads it.
+
+    A chunk may be a view of a memory mapping or of a reused buffer, so
+    ``consume`` must not keep it.
+    """
+    if not isinstance(path_or_file, (str, os.PathLike)):
+        _read_stream(path_or_file, consume, chunk_size)
+        return
+
+    with open(path_or_file, "rb") as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and some special files cannot be mapped.
+            _read_stream(f, consume, chunk_size)
+            return
+        with m, memoryview(m) as view:
+            for offset in range(0, len(view), chunk_size):
+                with view[offset : offset + chunk_size] as piece:
+                    consume(piece)
+
+
 def tagged_pair_hash(
-    tag: bytes, val1: bytes, val2: bytes, truncate_to: Optional[int] = None
+    tag: _Buffer, val1: _Buffer, val2: _Buffer, truncate_to: Optional[int] = None
 ) -> bytes:
-    s = _SHA256d_Hasher(truncate_to)
-    s.update(netstring(tag))
-    s.update(netstring(val1))
-    s.update(netstring(val2))
+    s = tagged_hasher(tag, truncate_to)
+    s.update_netstring(val1)
+    s.update_netstring(val2)
     return s.digest()
 
 
@@ -107,25 +362,132 @@ DIRNODE_CHILD_WRITECAP_TAG = (
 )
 DIRNODE_CHILD_SALT_TAG = b"allmydata_dirnode_child_rwcap_to_salt_v1"
 
+# hash trees
+MERKLE_EMPTY_LEAF_TAG = b"Merkle tree empty leaf"
+MERKLE_INTERNAL_NODE_TAG = b"Merkle tree internal node"
+
+for _tag in [
+    STORAGE_INDEX_TAG,
+    BLOCK_TAG,
+    UEB_TAG,
+    PLAINTEXT_TAG,
+    CIPHERTEXT_TAG,
+    CIPHERTEXT_SEGMENT_TAG,
+    PLAINTEXT_SEGMENT_TAG,
+    FILE_RENEWAL_TAG,
+    FILE_CANCEL_TAG,
+    BUCKET_RENEWAL_TAG,
+    BUCKET_CANCEL_TAG,
+    MUTABLE_WRITEKEY_TAG,
+    MUTABLE_WRITE_ENABLER_MASTER_TAG,
+    MUTABLE_WRITE_ENABLER_TAG,
+    MUTABLE_PUBKEY_TAG,
+    MUTABLE_READKEY_TAG,
+    MUTABLE_DATAKEY_TAG,
+    MUTABLE_STORAGEINDEX_TAG,
+    DIRNODE_CHILD_WRITECAP_TAG,
+    DIRNODE_CHILD_SALT_TAG,
+    MERKLE_EMPTY_LEAF_TAG,
+    MERKLE_INTERNAL_NODE_TAG,
+]:
+    register_tag(_tag)
+
+
+_DerivationKey = Tuple[bytes, bytes, Optional[int]]
+
+# Remembers the results of the key derivation functions - storage_index_hash,
+# ssk_readkey_hash, ssk_storage_index_hash and their *_many forms - when
+# enabled with enable_derivation_cache().
+_derivation_cache: "Optional[LRUCache[_DerivationKey, bytes]]" = None
+
+# Roughly the memory used by a derivation cache entry apart from the key and
+# the derived value: the key tuple, the cache's link and hash table slot.
+_DERIVATION_ENTRY_OVERHEAD = 160
+
+
+def _derivation_entry_size(key: _DerivationKey, value: bytes) -> int:
+    # The tag is one of the constants above, shared by every entry, so it
+    # does not count.
+    return sys.getsizeof(key[1]) + sys.getsizeof(value) + _DERIVATION_ENTRY_OVERHEAD
+
+
+def enable_derivation_cache(
+    capacity: int = 2**16, max_bytes: Optional[int] = 2**24
+) -> "LRUCache[_DerivationKey, bytes]":
+    """
+    Start remembering the results of deriving read keys and storage indexes.
+
+    The cache is shared by every derivation, including those done when
+    parsing capabilities, so deriving the same values again costs only a
+    lookup.  This replaces any cache previously enabled.
+
+    :param capacity: The largest number of derived values to remember.
+    :param max_bytes: The approximate largest amount of memory to use, or
+        ``None`` to limit only the number of values.
+
+    :return: The new cache, for inspecting its statistics or clearing it.
+    """
+    global _derivation_cache
+    _derivation_cache = LRUCache(capacity, max_bytes, _derivation_entry_size)
+    return _derivation_cache
+
+
+def disable_derivation_cache() -> None:
+    """
+    Stop remembering derived values and forget those already remembered.
+    """
+    global _derivation_cache
+    _derivation_cache = None
+
+
+def _tagged_hash_key(key: _DerivationKey) -> bytes:
+    return tagged_hash(*key)
+
+
+def _derive(tag: bytes, val: _Buffer, truncate_to: int) -> bytes:
+    cache = _derivation_cache
+    if cache is None:
+        return tagged_hash(tag, val, truncate_to)
+    return cache.lookup((tag, bytes(val), truncate_to), _tagged_hash_key)
+
+
+def _derive_many(tag: bytes, vals: Iterable[_Buffer], truncate_to: int) -> List[bytes]:
+    cache = _derivation_cache
+    if cache is None:
+        return tagged_hash_many(tag, vals, truncate_to, workers=1)
+    return [
+        cache.lookup((tag, bytes(val), truncate_to), _tagged_hash_key) for val in vals
+    ]
 
-def storage_index_hash(key: bytes) -> bytes:
+
+def storage_index_hash(key: _Buffer) -> bytes:
     # storage index is truncated to 128 bits (16 bytes). We're only hashing a
     # 16-byte value to get it, so there's no point in using a larger value.  We
     # use this same tagged hash to go from encryption key to storage index for
     # random-keyed immutable files and convergent-encryption immutabie
     # files. Mutable files use ssk_storage_index_hash().
-    return tagged_hash(STORAGE_INDEX_TAG, key, 16)
+    return _derive(STORAGE_INDEX_TAG, key, 16)
+
 
+def storage_index_hash_many(keys: Iterable[_Buffer]) -> List[bytes]:
+    return _derive_many(STORAGE_INDEX_TAG, keys, 16)
 
-def block_hash(data: bytes) -> bytes:
+
+def block_hash(data: _Buffer) -> bytes:
     return tagged_hash(BLOCK_TAG, data)
 
 
+def block_hash_many(
+    datas: Iterable[_Buffer], workers: Optional[int] = None
+) -> List[bytes]:
+    return tagged_hash_many(BLOCK_TAG, datas, workers=workers)
+
+
 def block_hasher() -> _SHA256d_Hasher:
     return tagged_hasher(BLOCK_TAG)
 
 
-def uri_extension_hash(data: bytes) -> bytes:
+def uri_extension_hash(data: _Buffer) -> bytes:
     return tagged_hash(UEB_TAG, data)
 
 
@@ -133,15 +495,21 @@ def uri_extension_hasher() -> _SHA256d_Hasher:
     return tagged_hasher(UEB_TAG)
 
 
-def plaintext_hash(data: bytes) -> bytes:
+def plaintext_hash(data: _Buffer) -> bytes:
     return tagged_hash(PLAINTEXT_TAG, data)
 
 
+def plaintext_hash_many(
+    datas: Iterable[_Buffer], workers: Optional[int] = None
+) -> List[bytes]:
+    return tagged_hash_many(PLAINTEXT_TAG, datas, workers=workers)
+
+
 def plaintext_hasher() -> _SHA256d_Hasher:
     return tagged_hasher(PLAINTEXT_TAG)
 
 
-def crypttext_hash(data: bytes) -> bytes:
+def crypttext_hash(data: _Buffer) -> bytes:
     return tagged_hash(CIPHERTEXT_TAG, data)
 
 
@@ -149,28 +517,48 @@ def crypttext_hasher() -> _SHA256d_Hasher:
     return tagged_hasher(CIPHERTEXT_TAG)
 
 
-def crypttext_segment_hash(data: bytes) -> bytes:
+def crypttext_segment_hash(data: _Buffer) -> bytes:
     return tagged_hash(CIPHERTEXT_SEGMENT_TAG, data)
 
 
+def crypttext_segment_hash_many(
+    datas: Iterable[_Buffer], workers: Optional[int] = None
+) -> List[bytes]:
+    return tagged_hash_many(CIPHERTEXT_SEGMENT_TAG, datas, workers=workers)
+
+
 def crypttext_segment_hasher() -> _SHA256d_Hasher:
     return tagged_hasher(CIPHERTEXT_SEGMENT_TAG)
 
 
-def plaintext_segment_hash(data: bytes) -> bytes:
+def plaintext_segment_hash(data: _Buffer) -> bytes:
     return tagged_hash(PLAINTEXT_SEGMENT_TAG, data)
 
 
+def plaintext_segment_hash_many(
+    datas: Iterable[_Buffer], workers: Optional[int] = None
+) -> List[bytes]:
+    return tagged_hash_many(PLAINTEXT_SEGMENT_TAG, datas, workers=workers)
+
+
 def plaintext_segment_hasher() -> _SHA256d_Hasher:
     return tagged_hasher(PLAINTEXT_SEGMENT_TAG)
 
 
+def empty_leaf_hash(i: int) -> bytes:
+    return tagged_hash(MERKLE_EMPTY_LEAF_TAG, b"%d" % (i,))
+
+
+def pair_hash(a: _Buffer, b: _Buffer) -> bytes:
+    return tagged_pair_hash(MERKLE_INTERNAL_NODE_TAG, a, b)
+
+
 KEYLEN = 16
 IVLEN = 16
 
 
 def convergence_hash(
-    k: int, n: int, segsize: int, data: bytes, convergence: bytes
+    k: int, n: int, segsize: int, data: _Buffer, convergence: bytes
 ) -> bytes:
     h = convergence_hasher(k, n, segsize, convergence)
     h.update(data)
@@ -213,108 +601,255 @@ def _convergence_hasher_tag(k: int, n: int, segsize: int, convergence: bytes) ->
     return tag
 
 
+_ConvergenceParameters = Tuple[int, int, int, bytes]
+
+# The state of SHA-256 after hashing the convergence tag for the most
+# recently used encoding parameters and convergence secrets.  A client
+# usually uses only one or two, so this stays small; unlike register_tag it
+# does not keep secrets forever.
+_convergence_states: "LRUCache[_ConvergenceParameters, hashlib._Hash]" = LRUCache(2**5)
+
+
+def _convergence_state(key: _ConvergenceParameters) -> "hashlib._Hash":
+    return _tag_state(_convergence_hasher_tag(*key))
+
+
 def convergence_hasher(
     k: int, n: int, segsize: int, convergence: bytes
 ) -> _SHA256d_Hasher:
-    tag = _convergence_hasher_tag(k, n, segsize, convergence)
-    return tagged_hasher(tag, KEYLEN)
+    state = _convergence_states.lookup((k, n, segsize, convergence), _convergence_state)
+    return _SHA256d_Hasher(KEYLEN, state.copy())
+
+
+def convergence_key_for_file(
+    path_or_file: _PathOrFile,
+    k: int,
+    n: int,
+    segsize: int,
+    convergence: bytes,
+    chunk_size: int = HASH_CHUNK_SIZE,
+) -> bytes:
+    """
+    Compute the convergent encryption key of a file without reading the
+    whole file into memory.
+
+    The file is hashed the same way as by ``hash_file``.
+
+    :return: The same 16 byte key as ``convergence_hash(k, n, segsize,
+        contents, convergence)``.
+
+    :raise ValueError: If the encoding parameters are not valid.
+    """
+    return _hash_file_into(
+        path_or_file, convergence_hasher(k, n, segsize, convergence), chunk_size
+    )
+
+
+_ConvergenceItem = Union[_Buffer, str, "os.PathLike[str]"]
+
+
+def convergence_keys_many(
+    items: Iterable[_ConvergenceItem],
+    k: int,
+    n: int,
+    segsize: int,
+    convergence: bytes,
+    workers: Optional[int] = None,
+    chunk_size: int = HASH_CHUNK_SIZE,
+) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Compute the convergent encryption key and storage index of many files
+    with the same encoding parameters.
+
+    Files are read and hashed in a pool of threads so that reading one file
+    overlaps with hashing others.  Contents given as buffers are hashed as
+    they are reached, without a thread.  Only a few items more than there
+    are threads are in progress at once, so the items and results can be
+    streamed.
+
+    :param items: The files, each given by path or by its contents.
+
+    :param workers: The number of threads to read files with, or ``None``
+        to use as many as ``ThreadPoolExecutor`` does by default.  With 1 no
+        thread is started.
+
+    :return: An iterator of pairs of ``convergence_hash(k, n, segsize,
+        contents, convergence)`` and the ``storage_index_hash`` of it, in
+        the same order as ``items``.  Errors reading a file are raised when
+        its pair is reached.
+
+    :raise ValueError: If the encoding parameters are not valid.  This is
+        raised by this call rather than by the iterator.
+    """
+    hasher = convergence_hasher(k, n, segsize, convergence)
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    if workers < 2:
+        return (_convergence_key(hasher, item, chunk_size) for item in items)
+    return _convergence_keys_threaded(items, hasher, workers, chunk_size)
+
+
+def _convergence_key(
+    hasher: _SHA256d_Hasher, item: _ConvergenceItem, chunk_size: int
+) -> Tuple[bytes, bytes]:
+    hasher = hasher.copy()
+    if isinstance(item, (str, os.PathLike)):
+        with open(item, "rb") as f:
+            # Most files fit in one chunk.  Reading those whole skips the
+            # chunk sized buffer _hash_stream_into allocates.
+            if os.fstat(f.fileno()).st_size > chunk_size:
+                key = _hash_stream_into(f, hasher, chunk_size)
+            else:
+                hasher.update(f.read())
+                key = hasher.digest()
+    else:
+        hasher.update(item)
+        key = hasher.digest()
+    return key, storage_index_hash(key)
+
+
+def _convergence_keys_threaded(
+    items: Iterable[_ConvergenceItem],
+    hasher: _SHA256d_Hasher,
+    workers: int,
+    chunk_size: int,
+) -> Iterator[Tuple[bytes, bytes]]:
+    window = 2 * workers
+    pending: "Deque[Union[Future[Tuple[bytes, bytes]], Tuple[bytes, bytes]]]"
+    pending = deque()
+    with ThreadPoolExecutor(workers) as pool:
+        for item in items:
+            if isinstance(item, (str, os.PathLike)):
+                pending.append(pool.submit(_convergence_key, hasher, item, chunk_size))
+            else:
+                pending.append(_convergence_key(hasher, item, chunk_size))
+            while len(pending) > window or (
+                pending and not isinstance(pending[0], Future)
+            ):
+                yield _result(pending.popleft())
+        while pending:
+            yield _result(pending.popleft())
+
+
+def _result(
+    pending: "Union[Future[Tuple[bytes, bytes]], Tuple[bytes, bytes]]",
+) -> Tuple[bytes, bytes]:
+    if isinstance(pending, Future):
+        return pending.result()
+    return pending
 
 
 def random_key() -> bytes:
     return os.urandom(KEYLEN)
 
 
-def my_renewal_secret_hash(my_secret: bytes) -> bytes:
+def my_renewal_secret_hash(my_secret: _Buffer) -> bytes:
     return tagged_hash(my_secret, CLIENT_RENEWAL_TAG)
 
 
-def my_cancel_secret_hash(my_secret: bytes) -> bytes:
+def my_cancel_secret_hash(my_secret: _Buffer) -> bytes:
     return tagged_hash(my_secret, CLIENT_CANCEL_TAG)
 
 
 def file_renewal_secret_hash(
-    client_renewal_secret: bytes, storage_index: bytes
+    client_renewal_secret: _Buffer, storage_index: _Buffer
 ) -> bytes:
     return tagged_pair_hash(FILE_RENEWAL_TAG, client_renewal_secret, storage_index)
 
 
-def file_cancel_secret_hash(client_cancel_secret: bytes, storage_index: bytes) -> bytes:
+def file_cancel_secret_hash(
+    client_cancel_secret: _Buffer, storage_index: _Buffer
+) -> bytes:
     return tagged_pair_hash(FILE_CANCEL_TAG, client_cancel_secret, storage_index)
 
 
-def bucket_renewal_secret_hash(file_renewal_secret: bytes, peerid: bytes) -> bytes:
-    assert len(peerid) == 20, "%s: %r" % (len(peerid), peerid)  # binary!
+def bucket_renewal_secret_hash(file_renewal_secret: _Buffer, peerid: _Buffer) -> bytes:
+    assert _nbytes(peerid) == 20, "%s: %r" % (_nbytes(peerid), peerid)  # binary!
     return tagged_pair_hash(BUCKET_RENEWAL_TAG, file_renewal_secret, peerid)
 
 
-def bucket_cancel_secret_hash(file_cancel_secret: bytes, peerid: bytes) -> bytes:
-    assert len(peerid) == 20, "%s: %r" % (len(peerid), peerid)  # binary!
+def bucket_cancel_secret_hash(file_cancel_secret: _Buffer, peerid: _Buffer) -> bytes:
+    assert _nbytes(peerid) == 20, "%s: %r" % (_nbytes(peerid), peerid)  # binary!
     return tagged_pair_hash(BUCKET_CANCEL_TAG, file_cancel_secret, peerid)
 
 
-def _xor(a: bytes, b: int) -> bytes:
-    return bytes([c ^ b for c in a])
+def _xor(a: _Buffer, b: int) -> bytes:
+    # Iterate over bytes, whatever the format of a memoryview.
+    return bytes([c ^ b for c in bytes(a)])
 
 
-def hmac(tag: bytes, data: bytes) -> bytes:
+def hmac(tag: _Buffer, data: _Buffer) -> bytes:
     ikey = _xor(tag, 0x36)
     okey = _xor(tag, 0x5C)
-    h1 = hashlib.sha256(ikey + data).digest()
-    h2 = hashlib.sha256(okey + h1).digest()
-    return h2
+    h1 = hashlib.sha256(ikey)
+    h1.update(data)
+    h2 = hashlib.sha256(okey)
+    h2.update(h1.digest())
+    return h2.digest()
 
 
-def mutable_rwcap_key_hash(iv: bytes, writekey: bytes) -> bytes:
+def mutable_rwcap_key_hash(iv: _Buffer, writekey: _Buffer) -> bytes:
     return tagged_pair_hash(DIRNODE_CHILD_WRITECAP_TAG, iv, writekey, KEYLEN)
 
 
-def mutable_rwcap_salt_hash(writekey: bytes) -> bytes:
+def mutable_rwcap_salt_hash(writekey: _Buffer) -> bytes:
     return tagged_hash(DIRNODE_CHILD_SALT_TAG, writekey, IVLEN)
 
 
-def ssk_writekey_hash(privkey: bytes) -> bytes:
+def ssk_writekey_hash(privkey: _Buffer) -> bytes:
     return tagged_hash(MUTABLE_WRITEKEY_TAG, privkey, KEYLEN)
 
 
-def ssk_write_enabler_master_hash(writekey: bytes) -> bytes:
+def ssk_write_enabler_master_hash(writekey: _Buffer) -> bytes:
     return tagged_hash(MUTABLE_WRITE_ENABLER_MASTER_TAG, writekey)
 
 
-def ssk_write_enabler_hash(writekey: bytes, peerid: bytes) -> bytes:
-    assert len(peerid) == 20, "%s: %r" % (len(peerid), peerid)  # binary!
+def ssk_write_enabler_hash(writekey: _Buffer, peerid: _Buffer) -> bytes:
+    assert _nbytes(peerid) == 20, "%s: %r" % (_nbytes(peerid), peerid)  # binary!
     wem = ssk_write_enabler_master_hash(writekey)
     return tagged_pair_hash(MUTABLE_WRITE_ENABLER_TAG, wem, peerid)
 
 
-def ssk_pubkey_fingerprint_hash(pubkey: bytes) -> bytes:
+def ssk_pubkey_fingerprint_hash(pubkey: _Buffer) -> bytes:
     return tagged_hash(MUTABLE_PUBKEY_TAG, pubkey)
 
 
-def ssk_readkey_hash(writekey: bytes) -> bytes:
-    return tagged_hash(MUTABLE_READKEY_TAG, writekey, KEYLEN)
+def ssk_readkey_hash(writekey: _Buffer) -> bytes:
+    return _derive(MUTABLE_READKEY_TAG, writekey, KEYLEN)
+
+
+def ssk_readkey_hash_many(writekeys: Iterable[_Buffer]) -> List[bytes]:
+    return _derive_many(MUTABLE_READKEY_TAG, writekeys, KEYLEN)
 
 
-def ssk_readkey_data_hash(IV: bytes, readkey: bytes) -> bytes:
+def ssk_readkey_data_hash(IV: _Buffer, readkey: _Buffer) -> bytes:
     return tagged_pair_hash(MUTABLE_DATAKEY_TAG, IV, readkey, KEYLEN)
 
 
-def ssk_storage_index_hash(readkey: bytes) -> bytes:
-    return tagged_hash(MUTABLE_STORAGEINDEX_TAG, readkey, KEYLEN)
+def ssk_storage_index_hash(readkey: _Buffer) -> bytes:
+    return _derive(MUTABLE_STORAGEINDEX_TAG, readkey, KEYLEN)
 
 
-def timing_safe_compare(a: bytes, b: bytes) -> bool:
+def ssk_storage_index_hash_many(readkeys: Iterable[_Buffer]) -> List[bytes]:
+    return _derive_many(MUTABLE_STORAGEINDEX_TAG, readkeys, KEYLEN)
+
+
+def timing_safe_compare(a: _Buffer, b: _Buffer) -> bool:
     n = os.urandom(32)
     return bool(tagged_hash(n, a) == tagged_hash(n, b))
 
 
 BACKUPDB_DIRHASH_TAG = b"allmydata_backupdb_dirhash_v1"
+register_tag(BACKUPDB_DIRHASH_TAG)
 
 
-def backupdb_dirhash(contents: bytes) -> bytes:
+def backupdb_dirhash(contents: _Buffer) -> bytes:
     return tagged_hash(BACKUPDB_DIRHASH_TAG, contents)
 
 
 def permute_server_hash(
-    peer_selection_index: bytes, server_permutation_seed: bytes
+    peer_selection_index: _Buffer, server_permutation_seed: _Buffer
 ) -> bytes:
-    return hashlib.sha1(peer_selection_index + server_permutation_seed).digest()
+    h = hashlib.sha1(peer_selection_index)
+    h.update(server_permutation_seed)
+    return h.digest()
@@ -0,0 +1,146 @@
+"""
+Find capabilities by storage index.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .base32 import b32decode
+from .types import (
+    KIND_READ,
+    KIND_WRITE,
+    Capability,
+    LiteralDirectoryRead,
+    LiteralRead,
+)
+
+# The number of base32 digits in an encoded storage index.
+_STORAGE_INDEX_DIGITS = 26
+
+
+def storage_index(cap: Capability) -> Optional[bytes]:
+    """
+    Get the storage index of any capability.
+
+    :return: The storage index, or ``None`` for a literal capability, which
+        has no storage index because it stores nothing on storage servers.
+    """
+    if isinstance(cap, (LiteralRead, LiteralDirectoryRead)):
+        return None
+    obj: object = getattr(cap, "cap_object", cap)
+    reader = getattr(obj, "reader", None)
+    if reader is not None:
+        obj = reader
+    verifier = getattr(obj, "verifier", None)
+    if verifier is not None:
+        obj = verifier
+    result: bytes = getattr(obj, "storage_index")
+    return result
+
+
+def _strength(cap: Capability) -> int:
+    if cap.kind & KIND_WRITE:
+        return 2
+    if cap.kind & KIND_READ:
+        return 1
+    return 0
+
+
+class StorageIndexIndex:
+    """
+    Map storage indexes to the strongest capability known for each of them.
+
+    A write capability is stronger than a read capability, which is stronger
+    than a verify capability.  Adding a capability no stronger than the one
+    already known for its storage index changes nothing.  Literal
+    capabilities have no storage index and are ignored.
+
+    Exact lookups use a dictionary.  Prefix queries use a sorted list of the
+    storage indexes, which is only sorted when a query needs it and only if
+    a storage index was added out of order.  Building the index from
+    capabilities in storage index order therefore never sorts at all.
+    """
+
+    def __init__(self, caps: Iterable[Capability] = ()) -> None:
+        self._caps: Dict[bytes, Capability] = {}
+        self._keys: List[bytes] = []
+        self._sorted = True
+        self.update(caps)
+
+    def __len__(self) -> int:
+        return len(self._caps)
+
+    def __contains__(self, storage_index: object) -> bool:
+        return storage_index in self._caps
+
+    def __getitem__(self, storage_index: bytes) -> Capability:
+        return self._caps[storage_index]
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Iterate over the storage indexes in order.
+        """
+        return iter(self._sorted_keys())
+
+    def get(
+        self, storage_index: bytes, default: Optional[Capability] = None
+    ) -> Optional[Capability]:
+        return self._caps.get(storage_index, default)
+
+    def add(self, cap: Capability) -> None:
+        """
+        Add a capability unless a capability at least as strong is already
+        known for its storage index.
+        """
+        key = storage_index(cap)
+        if key is None:
+            return
+        existing = self._caps.get(key)
+        if existing is None:
+            self._caps[key] = cap
+            if self._sorted and self._keys and key < self._keys[-1]:
+                self._sorted = False
+            self._keys.append(key)
+        elif _strength(cap) > _strength(existing):
+            self._caps[key] = cap
+
+    def update(self, caps: Iterable[Capability]) -> None:
+        """
+        Add many capabilities.
+        """
+        add = self.add
+        for cap in caps:
+            add(cap)
+
+    def _sorted_keys(self) -> List[bytes]:
+        if not self._sorted:
+            self._keys.sort()
+            self._sorted = True
+        return self._keys
+
+    def items_with_prefix(self, prefix: str) -> List[Tuple[bytes, Capability]]:
+        """
+        Find the capabilities whose storage indexes start with some base32
+        digits, such as the name of a storage server's share directory.
+
+        :param prefix: Up to 26 base32 digits.
+
+        :return: Pairs of storage index and capability, in storage index
+            order.
+
+        :raise ValueError: If ``prefix`` is not a prefix of an encoded
+            storage index.
+        """
+        if len(prefix) > _STORAGE_INDEX_DIGITS:
+            raise ValueError(f"Storage index prefix {prefix!r} is too long")
+        # A 26 digit encoding has two bits more than a storage index, which
+        # decoding drops.  Padding with the smallest and largest digits
+        # gives the first and last storage index with the prefix.
+        low = b32decode(prefix.ljust(_STORAGE_INDEX_DIGITS, "a"))
+        high = b32decode(prefix.ljust(_STORAGE_INDEX_DIGITS, "7"))
+        keys = self._sorted_keys()
+        caps = self._caps
+        return [
+            (key, caps[key])
+            for key in keys[bisect_left(keys, low) : bisect_right(keys, high)]
+        ]
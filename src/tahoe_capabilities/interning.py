@@ -0,0 +1,95 @@
+"""
+Share one object between equal capabilities.
+
+Capabilities are immutable so equal ones can be the same object.  Interning
+is worthwhile when many equal capabilities are kept at once, such as the
+children of a cache of directories which share files and subdirectories.
+
+Interned capabilities are only weakly referenced here.  Once nothing else
+uses one it is forgotten.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, TypeVar, cast
+from weakref import WeakValueDictionary
+
+from attrs import fields
+
+from .types import Capability
+
+_C = TypeVar("_C", bound=Capability)
+
+# The interned capabilities, by prefix, secrets and suffix.  These identify
+# a capability the same way its string does, without deriving anything or
+# referring to any other capability.
+_capabilities: "WeakValueDictionary[Tuple[Any, ...], Any]" = WeakValueDictionary()
+
+# The interned capabilities, by strings they were parsed from.
+_strings: "WeakValueDictionary[str, Capability]" = WeakValueDictionary()
+
+# The attrs fields which can hold another capability.
+_CHILD_FIELDS = ("cap_object", "reader", "verifier")
+
+# The slots of those fields for each class.
+_slots: Dict[type, List[Any]] = {}
+
+
+def _child_slots(cls: type) -> List[Any]:
+    try:
+        return _slots[cls]
+    except KeyError:
+        pass
+    # Lazily derived capabilities replace their derived field with a
+    # property.  The slot itself belongs to the attrs class they extend.
+    base = next(c for c in cls.__mro__ if "__attrs_attrs__" in c.__dict__)
+    slots = _slots[cls] = [
+        base.__dict__[a.name] for a in fields(base) if a.name in _CHILD_FIELDS
+    ]
+    return slots
+
+
+def intern_capability(cap: _C) -> _C:
+    """
+    Get the interned capability equal to a capability.
+
+    If there is none, ``cap`` becomes the interned one.  The capabilities
+    inside it, such as the verifier of a read capability, are interned too
+    so that they are shared with other capabilities which contain equal
+    ones.
+
+    The fields of a lazily derived capability which have not been derived
+    yet are left alone.  If they are derived later, they are not shared.
+
+    :return: A capability equal to ``cap``.  This is the same object for
+        every equal capability for as long as any of them are in use.
+    """
+    key = (cap.prefix, cap.secrets, cap.suffix)
+    interned = _capabilities.get(key)
+    if interned is not None:
+        return cast(_C, interned)
+    cls = type(cap)
+    for slot in _child_slots(cls):
+        try:
+            child = slot.__get__(cap, cls)
+        except AttributeError:
+            continue
+        shared = intern_capability(child)
+        if shared is not child:
+            slot.__set__(cap, shared)
+    return cast(_C, _capabilities.setdefault(key, cap))
+
+
+def _interned_string(s: str) -> Optional[Capability]:
+    """
+    Get the interned capability parsed from a string, if there is one.
+    """
+    return _strings.get(s)
+
+
+def _intern_parsed(s: str, cap: Capability) -> Capability:
+    """
+    Intern a capability parsed from a string and remember it for the next
+    time the string is parsed.
+    """
+    cap = intern_capability(cap)
+    _strings[s] = cap
+    return cap
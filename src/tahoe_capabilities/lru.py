@@ -0,0 +1,164 @@
+"""
+A size-bounded, thread-safe, least-recently-used cache.
+"""
+
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+from attrs import frozen
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+@frozen
+class CacheStatistics:
+    """
+    A snapshot of the activity of a cache.
+
+    :ivar hits: The number of lookups answered from the cache.
+    :ivar misses: The number of lookups which had to compute their value.
+    :ivar evictions: The number of entries dropped to make room for others.
+    :ivar size: The number of entries in the cache.
+    :ivar capacity: The largest number of entries the cache will hold.
+    :ivar weight: The total weight of the entries in the cache.
+    :ivar max_weight: The largest total weight the cache will hold, or
+        ``None`` if only the number of entries is limited.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    capacity: int
+    weight: int
+    max_weight: Optional[int]
+
+
+_MISSING: Any = object()
+
+
+def _unit_weight(key: object, value: object) -> int:
+    return 1
+
+
+class LRUCache(Generic[_K, _V]):
+    """
+    Remember the values computed for the most recently used keys.
+
+    Values are computed outside of the cache's lock so a slow computation
+    does not hold up lookups of other keys.  If two threads miss on the same
+    key at the same time then both compute the value.  Exceptions raised by
+    the computation are not cached.
+
+    :ivar capacity: The largest number of entries the cache will hold.
+
+    :ivar max_weight: If not ``None``, the largest total weight of the
+        entries the cache will hold.  This can be used to bound the memory
+        used by the cache.
+
+    :ivar weigh: A function which computes the weight of an entry from its
+        key and value.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        max_weight: Optional[int] = None,
+        weigh: Callable[[_K, _V], int] = _unit_weight,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, not {capacity}")
+        self.capacity = capacity
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[_K, _V]" = OrderedDict()
+        # Reentrant, because a weakref callback run by garbage collection
+        # while the lock is held may drop an entry with ``discard``.
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        """
+        Check for ``key`` without counting a hit or a miss or making it
+        more recently used.
+        """
+        with self._lock:
+            return key in self._entries
+
+    def lookup(self, key: _K, compute: Callable[[_K], _V]) -> _V:
+        """
+        Get the value for ``key``, computing it with ``compute(key)`` if it
+        is not in the cache.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = compute(key)
+        self.put(key, value)
+        return value
+
+    def put(self, key: _K, value: _V) -> None:
+        """
+        Add a value to the cache, evicting the least recently used values if
+        the cache is full.
+        """
+        weight = self.weigh(key, value)
+        with self._lock:
+            try:
+                old = self._entries.pop(key)
+            except KeyError:
+                pass
+            else:
+                self.weight -= self.weigh(key, old)
+            self._entries[key] = value
+            self.weight += weight
+            while len(self._entries) > self.capacity or (
+                self.max_weight is not None and self.weight > self.max_weight
+            ):
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.weight -= self.weigh(evicted_key, evicted)
+                self.evictions += 1
+
+    def discard(self, key: _K) -> None:
+        """
+        Drop the entry for ``key``, if there is one.
+        """
+        with self._lock:
+            value = self._entries.pop(key, _MISSING)
+            if value is not _MISSING:
+                self.weight -= self.weigh(key, value)
+
+    def clear(self) -> None:
+        """
+        Drop every entry from the cache.  The hit, miss, and eviction counts
+        are not reset.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self._entries),
+                self.capacity,
+                self.weight,
+                self.max_weight,
+            )
@@ -0,0 +1,137 @@
+"""
+Parse large batches of capability strings in several processes at once.
+
+Parsing read and write capabilities is dominated by SHA-256d over inputs so
+small that ``hashlib`` never releases the GIL, so threads do not help.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from os import cpu_count
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .parser import _capabilities_from_strings, capabilities_from_strings
+from .table import CapabilityTable
+from .types import Capability
+
+# Below this many strings, starting worker processes and moving the results
+# between them costs more than the parallelism saves.
+PARALLEL_THRESHOLD = 2**15
+
+
+# The capabilities a worker parsed: a table of those it can hold, and the
+# others with their positions among the strings the worker was given.
+_Chunk = Tuple[CapabilityTable, List[Tuple[int, Capability]]]
+
+
+def _parse_chunk(strs: List[str]) -> _Chunk:
+    """
+    Parse some capability strings in a worker process.
+
+    The result is mostly sent back as a ``CapabilityTable``, which pickles
+    as a few flat byte strings and can be turned back into capabilities
+    without any hashing.  The parser accepts some capabilities a table
+    cannot hold, such as CHK parameters too large for its columns.  These
+    are sent back as they are.
+    """
+    table = CapabilityTable()
+    others = []
+    for index, cap in enumerate(_capabilities_from_strings(strs)):
+        try:
+            table.append(cap)
+        except ValueError:
+            others.append((index, cap))
+    return table, others
+
+
+def _parse_chunks(
+    strs: List[str],
+    workers: Optional[int],
+    chunksize: int,
+    executor: Optional[Executor],
+) -> Iterator[_Chunk]:
+    """
+    Parse strings in worker processes, one chunk at a time, in order.
+    """
+    chunks = [strs[i : i + chunksize] for i in range(0, len(strs), chunksize)]
+    if executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            yield from pool.map(_parse_chunk, chunks)
+    else:
+        yield from executor.map(_parse_chunk, chunks)
+
+
+def _in_process(
+    strs: List[str], workers: Optional[int], executor: Optional[Executor]
+) -> bool:
+    if workers is None:
+        workers = cpu_count() or 1
+    return len(strs) < PARALLEL_THRESHOLD or (executor is None and workers < 2)
+
+
+def parallel_parse(
+    strs: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 2**13,
+    executor: Optional[Executor] = None,
+) -> List[Capability]:
+    """
+    Parse many capability strings using a pool of worker processes.
+
+    The workers do the parsing and key derivation.  This process still has
+    to build the capability objects, which costs over half as much as
+    parsing a write capability.  ``parallel_parse_table`` avoids that.
+
+    :param workers: The number of worker processes to start, or ``None`` to
+        use one for each CPU.  Ignored if ``executor`` is given.
+
+    :param chunksize: The number of strings to send to a worker at a time.
+
+    :param executor: A process pool to use instead of starting one.
+
+    :return: The capabilities in the same order as the strings.  If there
+        are fewer than ``PARALLEL_THRESHOLD`` strings, or only one worker,
+        they are parsed in this process with ``capabilities_from_strings``.
+
+    :raise: Whatever ``capability_from_string`` raises for the first string
+        which cannot be parsed.
+    """
+    strs = list(strs)
+    if _in_process(strs, workers, executor):
+        return capabilities_from_strings(strs)
+
+    caps: List[Capability] = []
+    for table, others in _parse_chunks(strs, workers, chunksize, executor):
+        chunk = list(table)
+        for index, cap in others:
+            chunk.insert(index, cap)
+        caps.extend(chunk)
+    return caps
+
+
+def parallel_parse_table(
+    strs: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 2**13,
+    executor: Optional[Executor] = None,
+) -> CapabilityTable:
+    """
+    Parse many capability strings into a ``CapabilityTable`` using a pool of
+    worker processes.
+
+    No capability objects are built in this process so this scales with
+    the number of workers.  The parameters, the crossover to parsing in
+    this process, and the exceptions are the same as for
+    ``parallel_parse``.
+    """
+    strs = list(strs)
+    table = CapabilityTable()
+    if _in_process(strs, workers, executor):
+        table.extend_from_strings(strs)
+    else:
+        for chunk, others in _parse_chunks(strs, workers, chunksize, executor):
+            if others:
+                # Fail the way extend_from_strings does for a capability the
+                # table cannot hold.
+                table.append(others[0][1])
+            table.extend_table(chunk)
+    return table
@@ -1,6 +1,29 @@
-from base64 import b32decode as _b32decode
-from typing import Callable, Dict, List, TypeVar, cast
+from functools import partial
+from itertools import islice
+from mmap import mmap
+from os import PathLike
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from attrs import frozen
 
+from .base32 import b32decode as _unb32str
+from .base32 import b32decode_many as _unb32str_many
+from .interning import _intern_parsed, _interned_string
+from .lru import CacheStatistics, LRUCache
 from .types import (
     Capability,
     CHKDirectoryRead,
@@ -33,19 +56,25 @@ from .types import (
 class NotRecognized(ValueError):
     def __init__(self, prefix: List[str]) -> None:
         super().__init__(f"Unrecognized capability type {prefix}")
+        self.prefix = prefix
 
+    def __reduce__(self) -> Tuple[Type["NotRecognized"], Tuple[List[str]]]:
+        return (NotRecognized, (self.prefix,))
 
-def _unb32str(s: str) -> bytes:
-    """
-    Base32-decode a text string into a byte string.
+
+@frozen
+class InvalidLine:
     """
-    s = s.upper()
+    A line of a capability file which could not be parsed.
 
-    # Add padding back, to make Python's base64 module happy:
-    while (len(s) * 5) % 8 != 0:
-        s += "="
+    :ivar lineno: The 1-based number of the line.
+    :ivar offset: The byte offset of the start of the line.
+    :ivar reason: A description of what is wrong with the line.
+    """
 
-    return _b32decode(s.encode("ascii"))
+    lineno: int
+    offset: int
+    reason: str
 
 
 def _parse_chk_verify(pieces: List[str]) -> CHKVerify:
@@ -57,21 +86,21 @@ def _parse_chk_verify(pieces: List[str]) -> CHKVerify:
     return CHKVerify(verifykey, uri_extension_hash, needed, total, size)
 
 
-def _parse_chk_read(pieces: List[str]) -> CHKRead:
+def _parse_chk_read(pieces: List[str], lazy: bool = False) -> CHKRead:
     readkey = _unb32str(pieces[0])
     uri_extension_hash = _unb32str(pieces[1])
     needed = int(pieces[2])
     total = int(pieces[3])
     size = int(pieces[4])
-    return CHKRead.derive(readkey, uri_extension_hash, needed, total, size)
+    return CHKRead.derive(readkey, uri_extension_hash, needed, total, size, lazy)
 
 
 def _parse_dir2_chk_verify(pieces: List[str]) -> CHKDirectoryVerify:
     return CHKDirectoryVerify(_parse_chk_verify(pieces))
 
 
-def _parse_dir2_chk_read(pieces: List[str]) -> CHKDirectoryRead:
-    return CHKDirectoryRead(_parse_chk_read(pieces))
+def _parse_dir2_chk_read(pieces: List[str], lazy: bool = False) -> CHKDirectoryRead:
+    return CHKDirectoryRead(_parse_chk_read(pieces, lazy))
 
 
 def _parse_literal(pieces: List[str]) -> LiteralRead:
@@ -88,18 +117,18 @@ def _parse_ssk_verify(pieces: List[str]) -> SSKVerify:
     return SSKVerify(storage_index, fingerprint)
 
 
-def _parse_ssk_read(pieces: List[str]) -> SSKRead:
+def _parse_ssk_read(pieces: List[str], lazy: bool = False) -> SSKRead:
     readkey = _unb32str(pieces[0])
     fingerprint = _unb32str(pieces[1])
-    return SSKRead.derive(readkey, fingerprint)
+    return SSKRead.derive(readkey, fingerprint, lazy)
 
 
 def _parse_dir2_ssk_verify(pieces: List[str]) -> SSKDirectoryVerify:
     return SSKDirectoryVerify(_parse_ssk_verify(pieces))
 
 
-def _parse_dir2_ssk_read(pieces: List[str]) -> SSKDirectoryRead:
-    return SSKDirectoryRead(_parse_ssk_read(pieces))
+def _parse_dir2_ssk_read(pieces: List[str], lazy: bool = False) -> SSKDirectoryRead:
+    return SSKDirectoryRead(_parse_ssk_read(pieces, lazy))
 
 
 def _parse_mdmf_verify(pieces: List[str]) -> MDMFVerify:
@@ -108,38 +137,38 @@ def _parse_mdmf_verify(pieces: List[str]) -> MDMFVerify:
     return MDMFVerify(storage_index, fingerprint)
 
 
-def _parse_mdmf_read(pieces: List[str]) -> MDMFRead:
+def _parse_mdmf_read(pieces: List[str], lazy: bool = False) -> MDMFRead:
     readkey = _unb32str(pieces[0])
     fingerprint = _unb32str(pieces[1])
-    return MDMFRead.derive(readkey, fingerprint)
+    return MDMFRead.derive(readkey, fingerprint, lazy)
 
 
-def _parse_dir2_mdmf_read(pieces: List[str]) -> MDMFDirectoryRead:
-    return MDMFDirectoryRead(_parse_mdmf_read(pieces))
+def _parse_dir2_mdmf_read(pieces: List[str], lazy: bool = False) -> MDMFDirectoryRead:
+    return MDMFDirectoryRead(_parse_mdmf_read(pieces, lazy))
 
 
 def _parse_dir2_mdmf_verify(pieces: List[str]) -> MDMFDirectoryVerify:
     return MDMFDirectoryVerify(_parse_mdmf_verify(pieces))
 
 
-def _parse_ssk_write(pieces: List[str]) -> SSKWrite:
+def _parse_ssk_write(pieces: List[str], lazy: bool = False) -> SSKWrite:
     writekey = _unb32str(pieces[0])
     fingerprint = _unb32str(pieces[1])
-    return SSKWrite.derive(writekey, fingerprint)
+    return SSKWrite.derive(writekey, fingerprint, lazy)
 
 
-def _parse_dir2_ssk_write(pieces: List[str]) -> SSKDirectoryWrite:
-    return SSKDirectoryWrite(_parse_ssk_write(pieces))
+def _parse_dir2_ssk_write(pieces: List[str], lazy: bool = False) -> SSKDirectoryWrite:
+    return SSKDirectoryWrite(_parse_ssk_write(pieces, lazy))
 
 
-def _parse_mdmf_write(pieces: List[str]) -> MDMFWrite:
+def _parse_mdmf_write(pieces: List[str], lazy: bool = False) -> MDMFWrite:
     writekey = _unb32str(pieces[0])
     fingerprint = _unb32str(pieces[1])
-    return MDMFWrite.derive(writekey, fingerprint)
+    return MDMFWrite.derive(writekey, fingerprint, lazy)
 
 
-def _parse_dir2_mdmf_write(pieces: List[str]) -> MDMFDirectoryWrite:
-    return MDMFDirectoryWrite(_parse_mdmf_write(pieces))
+def _parse_dir2_mdmf_write(pieces: List[str], lazy: bool = False) -> MDMFDirectoryWrite:
+    return MDMFDirectoryWrite(_parse_mdmf_write(pieces, lazy))
 
 
 _parsers: Dict[str, Callable[[List[str]], Capability]] = {
@@ -163,10 +192,148 @@ _parsers: Dict[str, Callable[[List[str]], Capability]] = {
     "DIR2-MDMF": _parse_dir2_mdmf_write,
 }
 
+# The same as _parsers except that key derivation is postponed.
+_lazy_parsers: Dict[str, Callable[[List[str]], Capability]] = {
+    **_parsers,
+    "CHK": partial(_parse_chk_read, lazy=True),
+    "SSK-RO": partial(_parse_ssk_read, lazy=True),
+    "SSK": partial(_parse_ssk_write, lazy=True),
+    "MDMF-RO": partial(_parse_mdmf_read, lazy=True),
+    "MDMF": partial(_parse_mdmf_write, lazy=True),
+    "DIR2-CHK": partial(_parse_dir2_chk_read, lazy=True),
+    "DIR2-RO": partial(_parse_dir2_ssk_read, lazy=True),
+    "DIR2": partial(_parse_dir2_ssk_write, lazy=True),
+    "DIR2-MDMF-RO": partial(_parse_dir2_mdmf_read, lazy=True),
+    "DIR2-MDMF": partial(_parse_dir2_mdmf_write, lazy=True),
+}
+
+
+def _unb32column(group: List[List[str]], index: int) -> List[bytes]:
+    return _unb32str_many([pieces[index] for pieces in group])
+
+
+def _intcolumn(group: List[List[str]], index: int) -> List[int]:
+    return [int(pieces[index]) for pieces in group]
+
+
+def _parse_chk_verify_many(group: List[List[str]]) -> List[CHKVerify]:
+    return [
+        CHKVerify(*fields)
+        for fields in zip(
+            _unb32column(group, 0),
+            _unb32column(group, 1),
+            _intcolumn(group, 2),
+            _intcolumn(group, 3),
+            _intcolumn(group, 4),
+        )
+    ]
+
+
+def _parse_chk_read_many(group: List[List[str]]) -> List[CHKRead]:
+    return CHKRead.derive_many(
+        _unb32column(group, 0),
+        _unb32column(group, 1),
+        _intcolumn(group, 2),
+        _intcolumn(group, 3),
+        _intcolumn(group, 4),
+    )
+
+
+def _parse_dir2_chk_verify_many(group: List[List[str]]) -> List[CHKDirectoryVerify]:
+    return list(map(CHKDirectoryVerify, _parse_chk_verify_many(group)))
+
+
+def _parse_dir2_chk_read_many(group: List[List[str]]) -> List[CHKDirectoryRead]:
+    return list(map(CHKDirectoryRead, _parse_chk_read_many(group)))
+
+
+def _parse_literal_many(group: List[List[str]]) -> List[LiteralRead]:
+    return list(map(LiteralRead, _unb32column(group, 0)))
+
+
+def _parse_dir2_literal_read_many(
+    group: List[List[str]],
+) -> List[LiteralDirectoryRead]:
+    return list(map(LiteralDirectoryRead, _parse_literal_many(group)))
+
+
+def _parse_ssk_verify_many(group: List[List[str]]) -> List[SSKVerify]:
+    return list(map(SSKVerify, _unb32column(group, 0), _unb32column(group, 1)))
+
+
+def _parse_ssk_read_many(group: List[List[str]]) -> List[SSKRead]:
+    return SSKRead.derive_many(_unb32column(group, 0), _unb32column(group, 1))
+
+
+def _parse_dir2_ssk_verify_many(group: List[List[str]]) -> List[SSKDirectoryVerify]:
+    return list(map(SSKDirectoryVerify, _parse_ssk_verify_many(group)))
+
+
+def _parse_dir2_ssk_read_many(group: List[List[str]]) -> List[SSKDirectoryRead]:
+    return list(map(SSKDirectoryRead, _parse_ssk_read_many(group)))
+
+
+def _parse_mdmf_verify_many(group: List[List[str]]) -> List[MDMFVerify]:
+    return list(map(MDMFVerify, _unb32column(group, 0), _unb32column(group, 1)))
+
+
+def _parse_mdmf_read_many(group: List[List[str]]) -> List[MDMFRead]:
+    return MDMFRead.derive_many(_unb32column(group, 0), _unb32column(group, 1))
+
+
+def _parse_dir2_mdmf_read_many(group: List[List[str]]) -> List[MDMFDirectoryRead]:
+    return list(map(MDMFDirectoryRead, _parse_mdmf_read_many(group)))
+
+
+def _parse_dir2_mdmf_verify_many(
+    group: List[List[str]],
+) -> List[MDMFDirectoryVerify]:
+    return list(map(MDMFDirectoryVerify, _parse_mdmf_verify_many(group)))
+
+
+def _parse_ssk_write_many(group: List[List[str]]) -> List[SSKWrite]:
+    return SSKWrite.derive_many(_unb32column(group, 0), _unb32column(group, 1))
+
+
+def _parse_dir2_ssk_write_many(group: List[List[str]]) -> List[SSKDirectoryWrite]:
+    return list(map(SSKDirectoryWrite, _parse_ssk_write_many(group)))
+
+
+def _parse_mdmf_write_many(group: List[List[str]]) -> List[MDMFWrite]:
+    return MDMFWrite.derive_many(_unb32column(group, 0), _unb32column(group, 1))
+
+
+def _parse_dir2_mdmf_write_many(group: List[List[str]]) -> List[MDMFDirectoryWrite]:
+    return list(map(MDMFDirectoryWrite, _parse_mdmf_write_many(group)))
+
+
+_many_parsers: Dict[str, Callable[[List[List[str]]], Sequence[Capability]]] = {
+    "LIT": _parse_literal_many,
+    "CHK-Verifier": _parse_chk_verify_many,
+    "CHK": _parse_chk_read_many,
+    "SSK-Verifier": _parse_ssk_verify_many,
+    "SSK-RO": _parse_ssk_read_many,
+    "SSK": _parse_ssk_write_many,
+    "MDMF-Verifier": _parse_mdmf_verify_many,
+    "MDMF-RO": _parse_mdmf_read_many,
+    "MDMF": _parse_mdmf_write_many,
+    "DIR2-LIT": _parse_dir2_literal_read_many,
+    "DIR2-CHK-Verifier": _parse_dir2_chk_verify_many,
+    "DIR2-CHK": _parse_dir2_chk_read_many,
+    "DIR2-Verifier": _parse_dir2_ssk_verify_many,
+    "DIR2-RO": _parse_dir2_ssk_read_many,
+    "DIR2": _parse_dir2_ssk_write_many,
+    "DIR2-MDMF-Verifier": _parse_dir2_mdmf_verify_many,
+    "DIR2-MDMF-RO": _parse_dir2_mdmf_read_many,
+    "DIR2-MDMF": _parse_dir2_mdmf_write_many,
+}
+
 _A = TypeVar("_A")
 
 
-def _uri_parser(s: str, parsers: Dict[str, Callable[[List[str]], _A]]) -> _A:
+def _uri_parser(
+    s: str, parsers: Dict[str, Callable[[List[str]], Capability]]
+) -> Capability:
     pieces = s.split(":")
     if pieces[0] == "URI":
         try:
@@ -274,10 +441,326 @@ def writeable_directory_from_string(s: str) -> DirectoryWriteCapability:
     )
 
 
-def capability_from_string(s: str) -> Capability:
+def capability_from_string(
+    s: str, lazy: bool = False, intern: bool = False
+) -> Capability:
+    """
+    Parse a capability string into a capability object.
+
+    :param lazy: If ``True``, postpone deriving the read key and storage
+        index of read and write capabilities until the capability's
+        ``reader`` or ``verifier`` is first used.  The result is equal to the
+        capability that would otherwise be returned and serializes the same
+        way.  This is much cheaper for capabilities that are only passed
+        along.
+
+    :param intern: If ``True``, return the ``intern_capability`` of the
+        result.  A string which was parsed this way before and whose
+        capability is still in use is not parsed again.
+    """
+    if intern:
+        interned = _interned_string(s)
+        if interned is None:
+            interned = _intern_parsed(s, capability_from_string(s, lazy))
+        return interned
     pieces = s.split(":")
     if pieces[0] == "URI":
-        parser = _parsers[pieces[1]]
+        parser = (_lazy_parsers if lazy else _parsers)[pieces[1]]
         return parser(pieces[2:])
 
     raise NotRecognized(pieces[:1])
+
+
+# The exceptions ``capability_from_string`` raises for malformed input.
+_PARSE_ERRORS = (ValueError, KeyError, IndexError)
+
+
+def _capabilities_from_strings(strs: List[str]) -> List[Capability]:
+    """
+    Parse a list of capability strings by grouping them by prefix and then
+    parsing each group together.
+
+    If anything about the batch is unusual, or a string in it is malformed,
+    then the strings are parsed one at a time instead.  This is slower but
+    it raises exactly the exception ``capability_from_string`` would raise
+    for the first bad string.
+    """
+    groups: Dict[str, Tuple[List[int], List[List[str]]]] = {}
+    for index, s in enumerate(strs):
+        pieces = s.split(":")
+        if pieces[0] != "URI" or len(pieces) < 2 or pieces[1] not in _many_parsers:
+            return list(map(capability_from_string, strs))
+        try:
+            positions, group = groups[pieces[1]]
+        except KeyError:
+            positions, group = groups[pieces[1]] = ([], [])
+        positions.append(index)
+        group.append(pieces[2:])
+
+    caps: List[Optional[Capability]] = [None] * len(strs)
+    try:
+        for prefix, (positions, group) in groups.items():
+            for position, cap in zip(positions, _many_parsers[prefix](group)):
+                caps[position] = cap
+    except _PARSE_ERRORS:
+        return list(map(capability_from_string, strs))
+    return cast(List[Capability], caps)
+
+
+def _interned_capabilities_from_strings(strs: List[str]) -> List[Capability]:
+    """
+    Parse a list of capability strings as ``_capabilities_from_strings``
+    does and intern the results.  Only the strings with no interned
+    capability are parsed.
+    """
+    caps = list(map(_interned_string, strs))
+    missing = [index for (index, cap) in enumerate(caps) if cap is None]
+    if missing:
+        parsed = _capabilities_from_strings([strs[index] for index in missing])
+        for index, cap in zip(missing, parsed):
+            caps[index] = _intern_parsed(strs[index], cap)
+    return cast(List[Capability], caps)
+
+
+def iter_capabilities_from_strings(
+    strs: Iterable[str], chunksize: int = 2**13, intern: bool = False
+) -> Iterator[List[Capability]]:
+    """
+    Parse many capability strings, ``chunksize`` at a time.
+
+    :param intern: If ``True``, intern the capabilities as
+        ``capability_from_string`` does.
+
+    :return: An iterator of lists of capabilities, in the same order as the
+        strings they were parsed from.  Only one chunk of strings is held in
+        memory at a time.
+
+    :raise: Whatever ``capability_from_string`` raises for the first string
+        which cannot be parsed.
+    """
+    it = iter(strs)
+    while True:
+        chunk = list(islice(it, chunksize))
+        if not chunk:
+            return
+        if intern:
+            yield _interned_capabilities_from_strings(chunk)
+        else:
+            yield _capabilities_from_strings(chunk)
+
+
+def capabilities_from_strings(
+    strs: Iterable[str], intern: bool = False
+) -> List[Capability]:
+    """
+    Parse many capability strings.
+
+    This gives the same result as calling ``capability_from_string`` on each
+    string but it is much faster for large numbers of strings.  Strings with
+    the same prefix are decoded together and have their keys derived
+    together.
+
+    :param intern: If ``True``, intern the capabilities as
+        ``capability_from_string`` does.
+
+    :raise: Whatever ``capability_from_string`` raises for the first string
+        which cannot be parsed.
+    """
+    caps: List[Capability] = []
+    for chunk in iter_capabilities_from_strings(strs, intern=intern):
+        caps.extend(chunk)
+    return caps
+
+
+# The default length of the longest line ``capabilities_from_file`` reads.
+# Real capability strings are a few hundred bytes at most.
+MAX_LINE_LENGTH = 2**16
+
+# The size of the pieces the rest of a line which is too long is skipped in.
+_SKIP_SIZE = 2**16
+
+
+def _file_lines(f: BinaryIO, limit: int) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """
+    Read the lines of a file with their offsets.
+
+    At most ``limit`` bytes of a line, not counting its newline, are held in
+    memory.  ``None`` takes the place of a longer line.
+    """
+    offset = 0
+    while True:
+        line = f.readline(limit + 1)
+        if not line:
+            return
+        length = len(line)
+        if length > limit and not line.endswith(b"\n"):
+            # Skip the rest of the line a piece at a time.
+            while not line.endswith(b"\n"):
+                line = f.readline(_SKIP_SIZE)
+                if not line:
+                    break
+                length += len(line)
+            yield offset, None
+        else:
+            yield offset, line
+        offset += length
+
+
+def _mmap_lines(m: mmap, limit: int) -> Iterator[Tuple[int, Optional[bytes]]]:
+    offset = 0
+    size = len(m)
+    while offset < size:
+        end = m.find(b"\n", offset)
+        if end == -1:
+            end = size
+        if end - offset > limit:
+            yield offset, None
+        else:
+            yield offset, m[offset:end]
+        offset = end + 1
+
+
+def _capabilities_from_lines(
+    lines: Iterator[Tuple[int, Optional[bytes]]], chunksize: int, limit: int
+) -> Iterator[Union[Capability, InvalidLine]]:
+    numbered = (
+        (lineno, offset, None if line is None else line.strip())
+        for lineno, (offset, line) in enumerate(lines, start=1)
+    )
+    records = (
+        (lineno, offset, line) for (lineno, offset, line) in numbered if line != b""
+    )
+    while True:
+        chunk = list(islice(records, chunksize))
+        if not chunk:
+            return
+        if all(line is not None for (_, _, line) in chunk):
+            try:
+                caps = _capabilities_from_strings(
+                    [cast(bytes, line).decode("ascii") for (_, _, line) in chunk]
+                )
+            except _PARSE_ERRORS:
+                pass
+            else:
+                yield from caps
+                continue
+        # Something in this chunk is bad.  Go back over it one line at a time
+        # to find out what.
+        for lineno, offset, line in chunk:
+            if line is None:
+                yield InvalidLine(lineno, offset, f"Line is longer than {limit} bytes")
+                continue
+            try:
+                yield capability_from_string(line.decode("ascii"))
+            except _PARSE_ERRORS as e:
+                yield InvalidLine(lineno, offset, f"{type(e).__name__}: {e}")
+
+
+def capabilities_from_file(
+    source: Union[str, "PathLike[str]", BinaryIO, mmap],
+    chunksize: int = 2**13,
+    max_line_length: int = MAX_LINE_LENGTH,
+) -> Iterator[Union[Capability, InvalidLine]]:
+    """
+    Parse a file of newline-delimited capability strings.
+
+    Only ``chunksize`` lines are held in memory at a time so files of any
+    size can be read.  Blank lines are skipped.
+
+    :param source: The path of the file, a file object opened in binary
+        mode, or an ``mmap`` of the file.
+
+    :param max_line_length: The length of the longest line to parse, not
+        counting its newline.  Only this much of a longer line is held
+        in memory before it is skipped.
+
+    :return: An iterator of the capabilities parsed from the file, in order.
+        Lines that cannot be parsed, or are too long, do not stop the
+        iteration.  Instead, an ``InvalidLine`` describing the problem takes
+        the place of the capability.
+    """
+    if isinstance(source, mmap):
+        lines = _mmap_lines(source, max_line_length)
+        yield from _capabilities_from_lines(lines, chunksize, max_line_length)
+    elif isinstance(source, (str, PathLike)):
+        with open(source, "rb") as f:
+            lines = _file_lines(f, max_line_length)
+            yield from _capabilities_from_lines(lines, chunksize, max_line_length)
+    else:
+        lines = _file_lines(source, max_line_length)
+        yield from _capabilities_from_lines(lines, chunksize, max_line_length)
+
+
+def _call_parser(key: Tuple[Callable[[str], object], str]) -> object:
+    parser, s = key
+    return parser(s)
+
+
+class ParseCache:
+    """
+    Remember the results of parsing the most recently used capability
+    strings.
+
+    Capabilities are immutable so it is safe to hand the same object to
+    every caller that parses the same string.  Parsing with the different
+    parsing functions is cached separately since they accept different
+    strings.  Strings which fail to parse are not cached.
+
+    This is safe to use from multiple threads.
+    """
+
+    def __init__(self, capacity: int = 2**12) -> None:
+        self._cache: LRUCache[Tuple[Callable[[str], object], str], object] = LRUCache(
+            capacity
+        )
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+    def statistics(self) -> CacheStatistics:
+        return self._cache.statistics()
+
+    def clear(self) -> None:
+        """
+        Forget every cached capability.
+        """
+        self._cache.clear()
+
+    def parse(self, parser: Callable[[str], _A], s: str) -> _A:
+        """
+        Parse a string with the given parsing function, or get the result of
+        having done so before from the cache.
+        """
+        return cast(_A, self._cache.lookup((parser, s), _call_parser))
+
+    def capability_from_string(self, s: str) -> Capability:
+        return self.parse(capability_from_string, s)
+
+    def writeable_from_string(self, s: str) -> WriteCapability:
+        return self.parse(writeable_from_string, s)
+
+    def readable_from_string(self, s: str) -> ReadCapability:
+        return self.parse(readable_from_string, s)
+
+    def immutable_readonly_from_string(self, s: str) -> ImmutableReadCapability:
+        return self.parse(immutable_readonly_from_string, s)
+
+    def immutable_directory_from_string(
+        self, s: str
+    ) -> ImmutableDirectoryReadCapability:
+        return self.parse(immutable_directory_from_string, s)
+
+    def readonly_directory_from_string(self, s: str) -> DirectoryReadCapability:
+        return self.parse(readonly_directory_from_string, s)
+
+    def writeable_directory_from_string(self, s: str) -> DirectoryWriteCapability:
+        return self.parse(writeable_directory_from_string, s)
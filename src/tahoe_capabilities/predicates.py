@@ -1,75 +1,105 @@
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Union
+
+from attrs import fields
+
 from . import types as t
+from .binary import _TAGS
+from .table import CapabilityTable
 
-_VERIFYTYPES = (
-    t.CHKVerify,
-    t.SSKVerify,
-    t.MDMFVerify,
-    t.CHKDirectoryVerify,
-    t.SSKDirectoryVerify,
-    t.MDMFDirectoryVerify,
-)
+_Capabilities = Union[Iterable[t.Capability], CapabilityTable]
 
-_READTYPES = (
+_CLASSES = (
     t.LiteralRead,
-    t.CHKRead,
-    t.SSKRead,
-    t.MDMFRead,
     t.LiteralDirectoryRead,
+    t.CHKVerify,
+    t.CHKRead,
+    t.CHKDirectoryVerify,
     t.CHKDirectoryRead,
-    t.SSKDirectoryRead,
-    t.MDMFDirectoryRead,
-)
-
-_WRITETYPES = (
-    t.SSKWrite,
-    t.MDMFWrite,
-    t.SSKDirectoryWrite,
-    t.MDMFDirectoryWrite,
-)
-
-_MUTABLETYPES = (
     t.SSKVerify,
     t.SSKRead,
     t.SSKWrite,
-    t.MDMFVerify,
-    t.MDMFRead,
-    t.MDMFWrite,
     t.SSKDirectoryVerify,
     t.SSKDirectoryRead,
     t.SSKDirectoryWrite,
+    t.MDMFVerify,
+    t.MDMFRead,
+    t.MDMFWrite,
     t.MDMFDirectoryVerify,
     t.MDMFDirectoryRead,
     t.MDMFDirectoryWrite,
 )
 
-_DIRECTORYTYPES = (
-    t.LiteralDirectoryRead,
-    t.CHKDirectoryVerify,
-    t.CHKDirectoryRead,
-    t.SSKDirectoryVerify,
-    t.SSKDirectoryRead,
-    t.SSKDirectoryWrite,
-    t.MDMFDirectoryVerify,
-    t.MDMFDirectoryRead,
-    t.MDMFDirectoryWrite,
+# The kind of the capabilities with each ``CapabilityTable`` tag.
+_TAG_KINDS = tuple(
+    {fields(cls).prefix.default: cls.kind for cls in _CLASSES}[prefix]
+    for prefix in _TAGS
 )
 
 
 def is_verify(cap: t.Capability) -> bool:
-    return isinstance(cap, _VERIFYTYPES)
+    return bool(cap.kind & t.KIND_VERIFY)
 
 
 def is_read(cap: t.Capability) -> bool:
-    return isinstance(cap, _READTYPES)
+    return bool(cap.kind & t.KIND_READ)
 
 
 def is_write(cap: t.Capability) -> bool:
-    return isinstance(cap, _WRITETYPES)
+    return bool(cap.kind & t.KIND_WRITE)
 
 
 def is_mutable(cap: t.Capability) -> bool:
-    return isinstance(cap, _MUTABLETYPES)
+    return bool(cap.kind & t.KIND_MUTABLE)
 
 
 def is_directory(cap: t.Capability) -> bool:
-    return isinstance(cap, _DIRECTORYTYPES)
+    return bool(cap.kind & t.KIND_DIRECTORY)
+
+
+def kinds(caps: _Capabilities) -> "array[int]":
+    """
+    Get the ``kind`` of each of some capabilities.
+
+    The capabilities of a ``CapabilityTable`` are classified from its
+    column of prefixes without building them.
+
+    :return: An array of the kinds, in order.
+    """
+    if isinstance(caps, CapabilityTable):
+        return array("H", map(_TAG_KINDS.__getitem__, caps._tags))
+    return array("H", [cap.kind for cap in caps])
+
+
+def kind_mask(caps: _Capabilities, kind: int) -> bytes:
+    """
+    Find which of some capabilities have every bit of a kind.
+
+    For example, ``kind_mask(caps, KIND_WRITE | KIND_DIRECTORY)`` finds the
+    directory write capabilities.
+
+    :return: A byte for each capability, in order, which is 1 if it has
+        every bit of ``kind`` and 0 if not.
+    """
+    if isinstance(caps, CapabilityTable):
+        table = bytes(int(k & kind == kind) for k in _TAG_KINDS).ljust(256, b"\0")
+        return caps._tags.tobytes().translate(table)
+    return bytes([cap.kind & kind == kind for cap in caps])
+
+
+def count_kinds(caps: _Capabilities) -> Dict[int, int]:
+    """
+    Count the capabilities of each kind.
+
+    The count of any combination of bits is a sum over the result, such as
+    ``sum(n for (k, n) in counts.items() if k & KIND_MUTABLE)``.
+
+    :return: The number of capabilities of each ``kind`` there are any of.
+    """
+    if isinstance(caps, CapabilityTable):
+        counts: Dict[int, int] = Counter()
+        for tag, n in Counter(caps._tags).items():
+            counts[_TAG_KINDS[tag]] += n
+        return dict(counts)
+    return dict(Counter(cap.kind for cap in caps))
@@ -0,0 +1,131 @@
+"""
+Replace capability strings found in arbitrary text, such as log messages,
+with their digested forms.
+"""
+
+import re
+from logging import Filter, LogRecord
+from typing import Match, Union
+
+from .lru import LRUCache
+from .parser import _PARSE_ERRORS, capability_from_string
+from .scanner import _capability_pattern
+from .serializer import _scrub, digested_capability_string
+
+_Buffer = Union[bytes, bytearray, memoryview]
+
+# Besides every well-formed capability string, this matches anything else
+# after a known prefix, such as a truncated capability string, which may
+# still hold a secret.
+_PATTERN = _capability_pattern(loose=True)
+
+_text_pattern = re.compile(_PATTERN)
+_bytes_pattern = re.compile(_PATTERN.encode("ascii"))
+
+# The digested form of recently redacted capability strings.  Logs tend to
+# mention the same few capabilities over and over.
+_digests: "LRUCache[str, str]" = LRUCache(2**12)
+
+# The recent digested forms, without their leading "D:".  A match which is
+# one of these and follows "D:" was redacted already and is left alone, so
+# redacting text twice changes nothing the second time.  Only exactly these
+# are skipped: a real capability string after "D:" is still redacted.
+_redacted: "LRUCache[str, bool]" = LRUCache(2**12)
+
+
+def _digest(s: str) -> str:
+    """
+    Compute the replacement for a capability string.
+
+    Something which looks like a capability string but cannot be parsed may
+    still be most of a real one, so it is scrubbed as a whole.
+    """
+    try:
+        cap = capability_from_string(s, lazy=True)
+    except _PARSE_ERRORS:
+        prefix = s.split(":", 2)[1]
+        return f"D:URI:{prefix}:{_scrub(s.encode('ascii'))}"
+    return digested_capability_string(cap)
+
+
+def _redact(s: str) -> str:
+    digested = _digests.lookup(s, _digest)
+    _redacted.put(digested[2:], True)
+    return digested
+
+
+def _replace_text(match: "Match[str]") -> str:
+    s = match.group()
+    start = match.start()
+    if start >= 2 and match.string[start - 2 : start] == "D:" and s in _redacted:
+        return s
+    return _redact(s)
+
+
+def _replace_bytes(match: "Match[bytes]") -> bytes:
+    b = match.group()
+    s = b.decode("ascii")
+    start = match.start()
+    if start >= 2 and match.string[start - 2 : start] == b"D:" and s in _redacted:
+        return b
+    return _redact(s).encode("ascii")
+
+
+def redact_capabilities(text: str) -> str:
+    """
+    Replace every capability string in some text with its
+    ``digested_capability_string``.
+
+    Text with no capability strings in it is returned unchanged after one
+    substring search.
+
+    Digested forms this module produced recently are left as they are, so
+    redacting text again changes nothing.
+
+    :return: The redacted text.
+    """
+    if "URI:" not in text:
+        return text
+    return _text_pattern.sub(_replace_text, text)
+
+
+def redact_capabilities_bytes(data: _Buffer) -> bytes:
+    """
+    Replace every capability string in some ASCII-compatible encoded text,
+    such as UTF-8, with its ``digested_capability_string``.
+
+    :return: The redacted text.  If ``data`` is ``bytes`` with no
+        capability strings in it, it is returned unchanged.
+    """
+    if _bytes_pattern.search(data) is None:
+        return data if isinstance(data, bytes) else bytes(data)
+    return _bytes_pattern.sub(_replace_bytes, data)
+
+
+class RedactingFilter(Filter):
+    """
+    A logging filter which replaces capability strings in log messages with
+    their digested forms.
+
+    The message is formatted with its arguments and redacted.  If anything
+    was replaced, the record's message becomes the redacted message and its
+    arguments are dropped.  Records are never filtered out, even if their
+    message cannot be formatted.
+
+    Add it to a handler to redact everything the handler emits, or to a
+    logger to redact records logged there directly.
+    """
+
+    def filter(self, record: LogRecord) -> bool:
+        try:
+            message = record.getMessage()
+        except Exception:
+            # The message cannot be formatted with its arguments.  Leave the
+            # record for the handler to report the error as it would without
+            # this filter.
+            return True
+        redacted = redact_capabilities(message)
+        if redacted is not message:
+            record.msg = redacted
+            record.args = None
+        return True
@@ -0,0 +1,115 @@
+"""
+Find capability strings in bulk text, such as directory dumps, access logs
+and JSON exports.
+"""
+
+import re
+from mmap import mmap
+from typing import Any, Iterator, List, Match, Tuple, Union
+
+from .parser import _PARSE_ERRORS, _parsers, capability_from_string
+from .types import Capability
+
+_Text = Union[str, bytes, bytearray, memoryview, mmap]
+
+# Base32 digits in either case, which is what the parser accepts.
+_B32 = "[A-Za-z2-7]"
+
+# The fields after each kind of prefix.
+_LITERAL_FIELDS = f":{_B32}*"
+_CHK_FIELDS = f":{_B32}+:{_B32}+:[0-9]+:[0-9]+:[0-9]+"
+_SSK_FIELDS = f":{_B32}+:{_B32}+"
+
+
+def _alternatives(prefixes: List[str]) -> str:
+    # Longer prefixes come first so that a prefix of another one does not
+    # win.
+    return "|".join(sorted(prefixes, key=len, reverse=True))
+
+
+_LITERAL_PREFIXES = [prefix for prefix in _parsers if "LIT" in prefix]
+_CHK_PREFIXES = [prefix for prefix in _parsers if "CHK" in prefix]
+_SSK_PREFIXES = [
+    prefix
+    for prefix in _parsers
+    if prefix not in _LITERAL_PREFIXES and prefix not in _CHK_PREFIXES
+]
+
+
+def _capability_pattern(loose: bool = False) -> str:
+    """
+    Make a regular expression which matches every form of capability string
+    the parser knows.  The prefix of a match is in its only matched group.
+
+    :param loose: If ``True``, also match anything else after a known
+        prefix, such as a truncated capability string.
+    """
+    forms = [
+        f"({_alternatives(_LITERAL_PREFIXES)}){_LITERAL_FIELDS}",
+        f"({_alternatives(_CHK_PREFIXES)}){_CHK_FIELDS}",
+        f"({_alternatives(_SSK_PREFIXES)}){_SSK_FIELDS}",
+    ]
+    if loose:
+        forms.append(f"({_alternatives(list(_parsers))})(?::[A-Za-z0-9]+)+")
+    return "URI:(?:" + "|".join(forms) + ")"
+
+
+_PATTERN = _capability_pattern()
+_text_pattern = re.compile(_PATTERN)
+_bytes_pattern = re.compile(_PATTERN.encode("ascii"))
+
+
+def _matches(buf: _Text) -> "Iterator[Match[Any]]":
+    if isinstance(buf, str):
+        return _text_pattern.finditer(buf)
+    return _bytes_pattern.finditer(buf)
+
+
+def _prefix(match: "Match[Any]") -> str:
+    prefix = match.group(match.lastindex or 0)
+    if isinstance(prefix, bytes):
+        return prefix.decode("ascii")
+    return str(prefix)
+
+
+def find_capabilities(buf: _Text) -> Iterator[Tuple[int, int, str]]:
+    """
+    Find the capability strings in some text.
+
+    The text is searched in place, so a large file can be searched through
+    an ``mmap`` of it without reading it into memory.  Only well-formed
+    capability strings are found, although they are not parsed.
+
+    :param buf: A ``str``, or ASCII-compatible encoded text in ``bytes``,
+        ``bytearray``, ``memoryview`` or ``mmap``.
+
+    :return: An iterator of three-tuples of the start and end offsets of
+        each capability string and its prefix, such as ``"DIR2-CHK"``, in
+        the order they appear.
+    """
+    for match in _matches(buf):
+        start, end = match.span()
+        yield start, end, _prefix(match)
+
+
+def iter_capabilities(buf: _Text, lazy: bool = False) -> Iterator[Capability]:
+    """
+    Find and parse the capability strings in some text.
+
+    :param buf: Text, as for ``find_capabilities``.
+
+    :param lazy: If ``True``, postpone key derivation the same way
+        ``capability_from_string`` does.
+
+    :return: An iterator of the capabilities, in the order they appear.
+        Strings which look like capabilities but cannot be parsed are
+        skipped.
+    """
+    for match in _matches(buf):
+        s = match.group()
+        if isinstance(s, bytes):
+            s = s.decode("ascii")
+        try:
+            yield capability_from_string(s, lazy)
+        except _PARSE_ERRORS:
+            pass
@@ -1,14 +1,37 @@
-from base64 import b32encode as _b32encode
 from hashlib import shake_128
+from typing import BinaryIO, Callable, Iterable, Tuple
+from weakref import ref
 
+from .base32 import b32encode as _b32str
+from .lru import LRUCache
 from .types import Capability
 
+_Remembered = Tuple["ref[Capability]", str]
 
-def _b32str(b: bytes) -> str:
+# The string forms of recently serialized capabilities, by the id of the
+# capability.  Programs tend to serialize the same few capabilities over and
+# over, such as the ones they log.  The capabilities are only weakly
+# referenced and their entries are dropped when they are collected, so no
+# string outlives its capability here.  They are not hashed, which would
+# derive everything a lazy one has put off deriving.
+_real_strings: "LRUCache[int, _Remembered]" = LRUCache(2**12)
+_digested_strings: "LRUCache[int, _Remembered]" = LRUCache(2**12)
+
+
+def _remembered(
+    strings: "LRUCache[int, _Remembered]",
+    cap: Capability,
+    build: Callable[[Capability], str],
+) -> str:
     """
-    Base32-encode a byte string to a text string.
+    Get a string form of a capability from one of the tables of recently
+    serialized capabilities, building and remembering it if it is not there.
     """
-    return _b32encode(b).decode("ascii").rstrip("=").lower()
+
+    def remember(key: int) -> _Remembered:
+        return ref(cap, lambda capref: strings.discard(key)), build(cap)
+
+    return strings.lookup(id(cap), remember)[1]
 
 
 def _scrub(b: bytes) -> str:
@@ -28,7 +51,13 @@ def digested_capability_string(cap: Capability) -> str:
     Most pairs of capability inputs will still result in different string
     outputs but due to the use of a hash function this is not guaranteed for
     every pair of inputs.
+
+    The results for recently serialized capabilities are remembered.
     """
+    return _remembered(_digested_strings, cap, _digested_string)
+
+
+def _digested_string(cap: Capability) -> str:
     scrubbed = _scrub(b"".join(cap.secrets))
     suffix = ":".join(map(str, cap.suffix))
     if suffix:
@@ -41,9 +70,66 @@ def danger_real_capability_string(cap: Capability) -> str:
     Return a string representation of the given capability including all
     of its secrets.  This string is *equivalent to the capability object*.
     Anyone who has the string has the capability.
+
+    The results for recently serialized capabilities are remembered.
     """
+    return _remembered(_real_strings, cap, _real_string)
+
+
+def _real_string(cap: Capability) -> str:
     secrets: str = ":".join(map(_b32str, cap.secrets))
     suffix: str = ":".join(map(str, cap.suffix))
     if suffix:
         suffix = ":" + suffix
     return f"URI:{cap.prefix}:{secrets}{suffix}"
+
+
+def danger_real_capability_bytes(cap: Capability) -> bytes:
+    """
+    Return ``danger_real_capability_string(cap)`` encoded as ASCII.
+
+    The string is built every time and not remembered, so exporting many
+    capabilities does not push every other string out of the cache
+    ``danger_real_capability_string`` keeps.
+    """
+    return _real_string(cap).encode("ascii")
+
+
+def _digested_bytes(cap: Capability) -> bytes:
+    return _digested_string(cap).encode("ascii")
+
+
+def write_capabilities(
+    caps: Iterable[Capability],
+    f: BinaryIO,
+    digested: bool = False,
+    write_size: int = 2**16,
+) -> int:
+    """
+    Write capabilities to a binary file, one per line, in the form
+    ``capabilities_from_file`` reads.
+
+    Lines are gathered in one reused buffer, which is written whenever it
+    holds at least ``write_size`` bytes.  ``f.write`` must not keep the
+    buffer it is given, which is true of the file objects ``open``
+    returns.  Like ``danger_real_capability_bytes``, this does not remember
+    the strings it builds.
+
+    :param digested: If ``True``, write ``digested_capability_string`` of
+        each capability instead of ``danger_real_capability_string``.
+
+    :return: The number of capabilities written.
+    """
+    line = _digested_bytes if digested else danger_real_capability_bytes
+    buf = bytearray()
+    count = 0
+    for cap in caps:
+        buf += line(cap)
+        buf += b"\n"
+        count += 1
+        if len(buf) >= write_size:
+            f.write(buf)
+            buf.clear()
+    if buf:
+        f.write(buf)
+    return count
@@ -0,0 +1,426 @@
+"""
+Hold many capabilities in a compact, column-oriented table.
+"""
+
+from array import array
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
+
+from .binary import _TAG_NUMBERS, _TAGS
+from .index import storage_index as _storage_index
+from .parser import iter_capabilities_from_strings
+from .types import (
+    Capability,
+    CHKDirectoryRead,
+    CHKDirectoryVerify,
+    CHKRead,
+    CHKVerify,
+    LiteralDirectoryRead,
+    LiteralRead,
+    MDMFDirectoryRead,
+    MDMFDirectoryVerify,
+    MDMFDirectoryWrite,
+    MDMFRead,
+    MDMFVerify,
+    MDMFWrite,
+    SSKDirectoryRead,
+    SSKDirectoryVerify,
+    SSKDirectoryWrite,
+    SSKRead,
+    SSKVerify,
+    SSKWrite,
+)
+
+_KEY_SIZE = 16
+_HASH_SIZE = 32
+
+_NO_KEY = bytes(_KEY_SIZE)
+_NO_HASH = bytes(_HASH_SIZE)
+
+_CHKParameters = Tuple[int, int, int]
+
+# Build a capability of each type from its row: its key (or storage index),
+# its hash, its storage index, its CHK parameters if it has them, and its
+# read key if it is a write capability.
+_Builder = Callable[[bytes, bytes, bytes, _CHKParameters, bytes], Capability]
+
+
+def _chk_verify(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> CHKVerify:
+    return CHKVerify(si, hash_, *chk)
+
+
+def _chk_read(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> CHKRead:
+    return CHKRead(key, CHKVerify(si, hash_, *chk))
+
+
+def _ssk_verify(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> SSKVerify:
+    return SSKVerify(si, hash_)
+
+
+def _ssk_read(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> SSKRead:
+    return SSKRead(key, SSKVerify(si, hash_))
+
+
+def _ssk_write(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> SSKWrite:
+    return SSKWrite(key, SSKRead(rk, SSKVerify(si, hash_)))
+
+
+def _mdmf_verify(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> MDMFVerify:
+    return MDMFVerify(si, hash_)
+
+
+def _mdmf_read(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> MDMFRead:
+    return MDMFRead(key, MDMFVerify(si, hash_))
+
+
+def _mdmf_write(
+    key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+) -> MDMFWrite:
+    return MDMFWrite(key, MDMFRead(rk, MDMFVerify(si, hash_)))
+
+
+def _directory(build: _Builder, wrap: Callable[..., Capability]) -> _Builder:
+    def build_directory(
+        key: bytes, hash_: bytes, si: bytes, chk: _CHKParameters, rk: bytes
+    ) -> Capability:
+        return wrap(build(key, hash_, si, chk, rk))
+
+    return build_directory
+
+
+_builders: Dict[str, _Builder] = {
+    "CHK-Verifier": _chk_verify,
+    "CHK": _chk_read,
+    "SSK-Verifier": _ssk_verify,
+    "SSK-RO": _ssk_read,
+    "SSK": _ssk_write,
+    "MDMF-Verifier": _mdmf_verify,
+    "MDMF-RO": _mdmf_read,
+    "MDMF": _mdmf_write,
+    "DIR2-CHK-Verifier": _directory(_chk_verify, CHKDirectoryVerify),
+    "DIR2-CHK": _directory(_chk_read, CHKDirectoryRead),
+    "DIR2-Verifier": _directory(_ssk_verify, SSKDirectoryVerify),
+    "DIR2-RO": _directory(_ssk_read, SSKDirectoryRead),
+    "DIR2": _directory(_ssk_write, SSKDirectoryWrite),
+    "DIR2-MDMF-Verifier": _directory(_mdmf_verify, MDMFDirectoryVerify),
+    "DIR2-MDMF-RO": _directory(_mdmf_read, MDMFDirectoryRead),
+    "DIR2-MDMF": _directory(_mdmf_write, MDMFDirectoryWrite),
+}
+_tag_builders = tuple(_builders.get(prefix) for prefix in _TAGS)
+
+_LIT = _TAG_NUMBERS["LIT"]
+_DIR2_LIT = _TAG_NUMBERS["DIR2-LIT"]
+_CHK_TAGS = frozenset(
+    _TAG_NUMBERS[prefix]
+    for prefix in ["CHK-Verifier", "CHK", "DIR2-CHK-Verifier", "DIR2-CHK"]
+)
+_WRITE_TAGS = frozenset(
+    _TAG_NUMBERS[prefix] for prefix in ["SSK", "MDMF", "DIR2", "DIR2-MDMF"]
+)
+
+
+class CapabilityTable:
+    """
+    A sequence of capabilities stored column by column in arrays rather
+    than as separate objects.
+
+    Each row takes 69 bytes, plus 12 more for CHK capabilities, 16 more for
+    write capabilities, and the data of literal capabilities.  Capability
+    objects are only built when a row is read.  Their derived keys are
+    stored so building them does no hashing.
+
+    The table only grows.  Reading a row out of it gives a capability equal
+    to the one added.
+    """
+
+    def __init__(self, caps: Iterable[Capability] = ()) -> None:
+        # The type of each row as its index in ``binary._TAGS``.
+        self._tags = array("B")
+        # The first secret of each row: the write key, read key, or storage
+        # index.  Zeros for literals.
+        self._keys = bytearray()
+        # The fingerprint or URI extension block hash of each row.  Zeros
+        # for literals.
+        self._hashes = bytearray()
+        # The storage index of each row.  Zeros for literals.
+        self._storage_indexes = bytearray()
+        # For CHK rows, the index of its parameters in the ``_needed``,
+        # ``_total``, and ``_sizes`` columns.  For write rows, the index of
+        # its read key in ``_readkeys``.  For literal rows, the index of its
+        # data in ``_literal_offsets``.  Zero otherwise.
+        self._extra = array("I")
+        self._needed = array("H")
+        self._total = array("H")
+        self._sizes = array("Q")
+        self._readkeys = bytearray()
+        # Literal data number ``n`` is ``_literal_data[offsets[n]:offsets[n + 1]]``.
+        self._literal_offsets = array("Q", [0])
+        self._literal_data = bytearray()
+        self.extend(caps)
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the table's columns.
+        """
+        columns: List[Union[array[int], bytearray]] = [
+            self._tags,
+            self._keys,
+            self._hashes,
+            self._storage_indexes,
+            self._extra,
+            self._needed,
+            self._total,
+            self._sizes,
+            self._readkeys,
+            self._literal_offsets,
+            self._literal_data,
+        ]
+        return sum(memoryview(column).nbytes for column in columns)
+
+    def _append_row(
+        self,
+        tag: int,
+        key: bytes,
+        hash_: bytes,
+        storage_index: bytes,
+        chk: Optional[_CHKParameters],
+        readkey: Optional[bytes],
+        literal: Optional[bytes],
+    ) -> None:
+        if readkey is not None:
+            self._extra.append(len(self._readkeys) // _KEY_SIZE)
+            self._readkeys += readkey
+        elif chk is not None:
+            self._extra.append(len(self._sizes))
+            needed, total, size = chk
+            self._needed.append(needed)
+            self._total.append(total)
+            self._sizes.append(size)
+        elif literal is not None:
+            self._extra.append(len(self._literal_offsets) - 1)
+            self._literal_data += literal
+            self._literal_offsets.append(len(self._literal_data))
+        else:
+            self._extra.append(0)
+        self._keys += key
+        self._hashes += hash_
+        self._storage_indexes += storage_index
+        self._tags.append(tag)
+
+    def append(self, cap: Capability) -> None:
+        """
+        Add a capability to the end of the table.
+
+        :raise ValueError: If the capability has a key or hash of the wrong
+            size.
+        """
+        tag = _TAG_NUMBERS[cap.prefix]
+        if tag == _LIT or tag == _DIR2_LIT:
+            (data,) = cap.secrets
+            self._append_row(tag, _NO_KEY, _NO_HASH, _NO_KEY, None, None, data)
+            return
+
+        key, hash_ = cap.secrets
+        storage_index = _storage_index(cap)
+        assert storage_index is not None
+        if len(key) != _KEY_SIZE or len(hash_) != _HASH_SIZE:
+            raise ValueError(
+                f"{cap.prefix} fields must be {_KEY_SIZE} and {_HASH_SIZE} bytes, "
+                f"not {len(key)} and {len(hash_)}"
+            )
+        chk = None
+        if tag in _CHK_TAGS:
+            needed, total, size = map(int, cap.suffix)
+            if not (0 <= needed < 2**16 and 0 <= total < 2**16 and 0 <= size < 2**64):
+                raise ValueError(f"{cap.prefix} parameters out of range")
+            chk = (needed, total, size)
+        readkey: Optional[bytes] = None
+        if tag in _WRITE_TAGS:
+            reader = getattr(getattr(cap, "cap_object", cap), "reader")
+            readkey = reader.readkey
+        self._append_row(tag, key, hash_, storage_index, chk, readkey, None)
+
+    def extend(self, caps: Iterable[Capability]) -> None:
+        """
+        Add capabilities to the end of the table.
+        """
+        for cap in caps:
+            self.append(cap)
+
+    def extend_from_strings(self, strs: Iterable[str]) -> None:
+        """
+        Parse capability strings and add them to the end of the table.
+
+        The strings are parsed in bulk, a chunk at a time, so the parsed
+        objects for only one chunk exist at once.
+
+        :raise: Whatever ``capability_from_string`` raises for the first
+            string which cannot be parsed.  The capabilities of earlier
+            chunks will have been added.
+        """
+        for chunk in iter_capabilities_from_strings(strs):
+            self.extend(chunk)
+
+    def extend_table(self, other: "CapabilityTable") -> None:
+        """
+        Add the rows of another table to the end of this one without
+        building their capabilities.
+        """
+        if other is self:
+            other = self[:]
+        chk_base = len(self._sizes)
+        readkey_base = len(self._readkeys) // _KEY_SIZE
+        literal_base = len(self._literal_offsets) - 1
+        data_base = len(self._literal_data)
+
+        extra = array("I")
+        for tag, index in zip(other._tags, other._extra):
+            if tag in _CHK_TAGS:
+                index += chk_base
+            elif tag in _WRITE_TAGS:
+                index += readkey_base
+            elif tag == _LIT or tag == _DIR2_LIT:
+                index += literal_base
+            extra.append(index)
+        literal_offsets = array(
+            "Q", (offset + data_base for offset in other._literal_offsets[1:])
+        )
+
+        self._extra += extra
+        self._keys += other._keys
+        self._hashes += other._hashes
+        self._storage_indexes += other._storage_indexes
+        self._needed += other._needed
+        self._total += other._total
+        self._sizes += other._sizes
+        self._readkeys += other._readkeys
+        self._literal_offsets += literal_offsets
+        self._literal_data += other._literal_data
+        self._tags += other._tags
+
+    def prefix(self, index: int) -> str:
+        """
+        Get the type of a row, as the prefix of its capability string.
+        """
+        return _TAGS[self._tags[index]]
+
+    def storage_index(self, index: int) -> Optional[bytes]:
+        """
+        Get the storage index of a row without building its capability.
+
+        :return: The storage index, or ``None`` for a literal capability.
+        """
+        tag = self._tags[index]
+        if tag == _LIT or tag == _DIR2_LIT:
+            return None
+        index %= len(self._tags)
+        return bytes(self._storage_indexes[index * _KEY_SIZE : (index + 1) * _KEY_SIZE])
+
+    def _row(self, index: int) -> Capability:
+        tag = self._tags[index]
+        extra = self._extra[index]
+        if tag == _LIT or tag == _DIR2_LIT:
+            data = bytes(
+                self._literal_data[
+                    self._literal_offsets[extra] : self._literal_offsets[extra + 1]
+                ]
+            )
+            literal = LiteralRead(data)
+            if tag == _DIR2_LIT:
+                return LiteralDirectoryRead(literal)
+            return literal
+
+        key = bytes(self._keys[index * _KEY_SIZE : (index + 1) * _KEY_SIZE])
+        hash_ = bytes(self._hashes[index * _HASH_SIZE : (index + 1) * _HASH_SIZE])
+        storage_index = bytes(
+            self._storage_indexes[index * _KEY_SIZE : (index + 1) * _KEY_SIZE]
+        )
+        chk = (0, 0, 0)
+        readkey = b""
+        if tag in _CHK_TAGS:
+            chk = (self._needed[extra], self._total[extra], self._sizes[extra])
+        elif tag in _WRITE_TAGS:
+            readkey = bytes(self._readkeys[extra * _KEY_SIZE : (extra + 1) * _KEY_SIZE])
+        build = _tag_builders[tag]
+        assert build is not None
+        return build(key, hash_, storage_index, chk, readkey)
+
+    def _copy_row(self, other: "CapabilityTable", index: int) -> None:
+        tag = other._tags[index]
+        extra = other._extra[index]
+        if tag == _LIT or tag == _DIR2_LIT:
+            start, end = other._literal_offsets[extra : extra + 2]
+            literal = bytes(other._literal_data[start:end])
+            self._append_row(tag, _NO_KEY, _NO_HASH, _NO_KEY, None, None, literal)
+            return
+        chk = None
+        readkey = None
+        if tag in _CHK_TAGS:
+            chk = (other._needed[extra], other._total[extra], other._sizes[extra])
+        elif tag in _WRITE_TAGS:
+            readkey = bytes(
+                other._readkeys[extra * _KEY_SIZE : (extra + 1) * _KEY_SIZE]
+            )
+        self._append_row(
+            tag,
+            bytes(other._keys[index * _KEY_SIZE : (index + 1) * _KEY_SIZE]),
+            bytes(other._hashes[index * _HASH_SIZE : (index + 1) * _HASH_SIZE]),
+            bytes(other._storage_indexes[index * _KEY_SIZE : (index + 1) * _KEY_SIZE]),
+            chk,
+            readkey,
+            None,
+        )
+
+    @overload
+    def __getitem__(self, index: int) -> Capability: ...  # noqa: E704
+
+    @overload
+    def __getitem__(self, index: slice) -> "CapabilityTable": ...  # noqa: E704
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Capability, "CapabilityTable"]:
+        """
+        Build the capability in one row, or copy some rows into a new table.
+        """
+        if isinstance(index, slice):
+            table = CapabilityTable()
+            for row in range(*index.indices(len(self))):
+                table._copy_row(self, row)
+            return table
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CapabilityTable index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Capability]:
+        for index in range(len(self)):
+            yield self._row(index)
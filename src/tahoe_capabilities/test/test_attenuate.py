@@ -0,0 +1,76 @@
+from typing import List, Optional
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import lists
+
+from tahoe_capabilities import (
+    Capability,
+    NotRecognized,
+    SSKDirectoryWrite,
+    SSKWrite,
+    attenuate_many,
+    danger_real_capability_string,
+    is_read,
+    is_verify,
+    is_write,
+)
+from tahoe_capabilities.strategies import capabilities, ssk_writes
+
+
+def _verifier(cap: Capability) -> Optional[Capability]:
+    if is_verify(cap):
+        return cap
+    if is_write(cap):
+        cap = getattr(cap, "reader")
+    return getattr(cap, "verifier", None)
+
+
+class AttenuateTests(TestCase):
+    """
+    Tests for ``attenuate_many`` and the cached ``reader`` and ``verifier``
+    of directory capabilities.
+    """
+
+    @given(lists(capabilities()))
+    def test_attenuate(self, caps: List[Capability]) -> None:
+        """
+        Capabilities and their strings are attenuated to the same read and
+        verify capabilities as their ``reader`` and ``verifier`` give.
+        """
+        strs = list(map(danger_real_capability_string, caps))
+        expected = list(map(_verifier, caps))
+        self.assertEqual(attenuate_many(caps, to="verify"), expected)
+        self.assertEqual(attenuate_many(strs, to="verify"), expected)
+
+        readable = [cap for cap in caps if not is_verify(cap)]
+        readers = [getattr(cap, "reader") if is_write(cap) else cap for cap in readable]
+        mixed = [
+            danger_real_capability_string(cap) if n % 2 else cap
+            for (n, cap) in enumerate(readable)
+        ]
+        self.assertEqual(attenuate_many(mixed), readers)
+        for cap in readers:
+            self.assertTrue(is_read(cap))
+
+    def test_errors(self) -> None:
+        """
+        A verify capability cannot be attenuated to read, and unknown
+        strings and targets are rejected.
+        """
+        cap = "URI:CHK-Verifier:aaaa:bbbb:1:2:3"
+        with self.assertRaises(ValueError):
+            attenuate_many([cap], to="read")
+        with self.assertRaises(NotRecognized):
+            attenuate_many(["URI:XYZ:aaaa"], to="verify")
+        with self.assertRaises(ValueError):
+            attenuate_many([cap], to="write")
+
+    @given(ssk_writes())
+    def test_cached(self, cap: SSKWrite) -> None:
+        """
+        A directory capability makes its weaker capability once.
+        """
+        directory = SSKDirectoryWrite(cap)
+        self.assertIs(directory.reader, directory.reader)
+        self.assertIs(directory.reader.verifier, directory.reader.verifier)
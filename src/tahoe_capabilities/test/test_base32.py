@@ -0,0 +1,62 @@
+from base64 import b32encode as _b32encode
+from binascii import Error
+from typing import List
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import binary, lists
+
+from tahoe_capabilities.base32 import b32decode, b32decode_many, b32encode
+
+
+class Base32Tests(TestCase):
+    """
+    Tests for ``tahoe_capabilities.base32``.
+    """
+
+    @given(binary())
+    def test_encode(self, data: bytes) -> None:
+        """
+        ``b32encode`` gives the same result as the standard library encoder
+        without padding and in lowercase.
+        """
+        self.assertEqual(
+            b32encode(data),
+            _b32encode(data).decode("ascii").rstrip("=").lower(),
+        )
+
+    @given(binary())
+    def test_roundtrip(self, data: bytes) -> None:
+        """
+        ``b32decode`` inverts ``b32encode`` and accepts uppercase digits.
+        """
+        encoded = b32encode(data)
+        self.assertEqual(b32decode(encoded), data)
+        self.assertEqual(b32decode(encoded.upper()), data)
+
+    @given(lists(binary(min_size=0, max_size=40)))
+    def test_decode_many(self, values: List[bytes]) -> None:
+        """
+        ``b32decode_many`` decodes each of the strings it is given.
+        """
+        self.assertEqual(b32decode_many(list(map(b32encode, values))), values)
+
+    def test_reject(self) -> None:
+        """
+        ``b32decode`` and ``b32decode_many`` reject strings with characters
+        that are not base32 digits and strings with impossible lengths.
+        """
+        good = b32encode(b"x" * 16)
+        for bad in [
+            good[:-1] + "1",
+            good[:-1] + "=",
+            good[:-1] + " ",
+            good[:-1] + "_",
+            good[:-1] + "\N{ARABIC-INDIC DIGIT THREE}",
+            good[:-1],
+            "a",
+        ]:
+            with self.assertRaises(Error):
+                b32decode(bad)
+            with self.assertRaises(Error):
+                b32decode_many([good, bad])
@@ -0,0 +1,91 @@
+from typing import List
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import binary, lists
+
+from tahoe_capabilities import (
+    Capability,
+    capability_from_string,
+    danger_real_capability_string,
+)
+from tahoe_capabilities.binary import (
+    _TAGS,
+    VERSION,
+    from_bytes,
+    from_bytes_at,
+    to_bytes,
+)
+from tahoe_capabilities.parser import _parsers
+from tahoe_capabilities.strategies import capabilities
+
+SSK = "URI:SSK:5mcjppxck7re2kzdol7b5ojmgi:jwjbsudn4z452bo2eqbjdzrvo2f72tav3xyb2llfnfjjsopczi5q"
+CHK = "URI:CHK:intrb3iinc7ushk6krxnbqrvfm:iyi4bqhr45ib4hzyvuv2tdifoqgt7enpavd7szdpiadxoxz6mkrq:1:3:120"
+
+
+class BinaryTests(TestCase):
+    """
+    Tests for ``tahoe_capabilities.binary``.
+    """
+
+    def test_every_type(self) -> None:
+        """
+        Every type of capability the parser knows about has a type byte.
+        """
+        self.assertEqual(sorted(_TAGS), sorted(_parsers))
+
+    @given(capabilities())
+    def test_roundtrip(self, cap: Capability) -> None:
+        """
+        ``from_bytes`` inverts ``to_bytes``, with or without lazy key
+        derivation, and the binary form is smaller than the string.
+        """
+        encoded = to_bytes(cap)
+        self.assertEqual(from_bytes(encoded), cap)
+        self.assertEqual(from_bytes(encoded, lazy=True), cap)
+        self.assertLess(len(encoded), len(danger_real_capability_string(cap)))
+
+    @given(binary(max_size=8), lists(capabilities(), max_size=5))
+    def test_from_bytes_at(self, junk: bytes, caps: List[Capability]) -> None:
+        """
+        ``from_bytes_at`` decodes a run of capabilities from the middle of a
+        ``memoryview``.
+        """
+        view = memoryview(junk + b"".join(map(to_bytes, caps)) + junk)
+        offset = len(junk)
+        decoded = []
+        for _ in caps:
+            cap, offset = from_bytes_at(view, offset)
+            decoded.append(cap)
+        self.assertEqual(decoded, caps)
+        self.assertEqual(offset, len(view) - len(junk))
+
+    def test_layout(self) -> None:
+        """
+        The binary form of a capability is a version byte, a type byte, and
+        the fixed fields, followed by varints for CHK.
+        """
+        ssk = capability_from_string(SSK)
+        self.assertEqual(to_bytes(ssk), bytes([VERSION, 5]) + b"".join(ssk.secrets))
+        chk = capability_from_string(CHK)
+        self.assertEqual(
+            to_bytes(chk),
+            bytes([VERSION, 2]) + b"".join(chk.secrets) + bytes([1, 3, 120]),
+        )
+
+    def test_reject(self) -> None:
+        """
+        ``from_bytes`` raises ``ValueError`` for malformed input.
+        """
+        good = to_bytes(capability_from_string(CHK))
+        for bad in [
+            b"",
+            good[:1],
+            good[:-1],
+            good + b"\x00",
+            bytes([VERSION + 1]) + good[1:],
+            bytes([VERSION, 200]) + good[2:],
+            good[:-3] + b"\x80" * 11,
+        ]:
+            with self.assertRaises(ValueError):
+                from_bytes(bad)
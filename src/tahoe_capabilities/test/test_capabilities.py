@@ -1,13 +1,35 @@
+from copy import deepcopy
+from io import BytesIO
+from mmap import mmap
 from operator import attrgetter
+from os.path import join
+from pickle import dumps, loads
+from tempfile import TemporaryDirectory
+from typing import List, Union
 from unittest import TestCase
+from weakref import ref
 
 from hypothesis import assume, given
+from hypothesis.strategies import lists
 
 from tahoe_capabilities import (
     Capability,
+    InvalidLine,
+    NotRecognized,
+    ParseCache,
+    capabilities_from_file,
+    capabilities_from_strings,
     capability_from_string,
+    danger_real_capability_bytes,
     danger_real_capability_string,
     digested_capability_string,
+    iter_capabilities_from_strings,
+    serializer,
+    write_capabilities,
+)
+from tahoe_capabilities.hashutil import (
+    disable_derivation_cache,
+    enable_derivation_cache,
 )
 from tahoe_capabilities.strategies import capabilities
 
@@ -25,6 +47,134 @@ class ParseTests(TestCase):
         cap_parsed = capability_from_string(cap_str)
         self.assertEqual(cap_parsed, cap)
 
+    @given(lists(capabilities()))
+    def test_from_strings(self, caps: List[Capability]) -> None:
+        """
+        ``capabilities_from_strings`` and ``iter_capabilities_from_strings``
+        parse capability strings the same way ``capability_from_string``
+        does.
+        """
+        cap_strs = list(map(danger_real_capability_string, caps))
+        self.assertEqual(capabilities_from_strings(cap_strs), caps)
+        self.assertEqual(sum(iter_capabilities_from_strings(cap_strs, 3), []), caps)
+
+    @given(capabilities())
+    def test_lazy(self, cap: Capability) -> None:
+        """
+        ``capability_from_string`` with ``lazy=True`` gives a capability that
+        is equal to, hashes the same as, and serializes the same as the one
+        it gives without it, and which copies and pickles to the same
+        capability.
+        """
+        cap_str = danger_real_capability_string(cap)
+        lazy = capability_from_string(cap_str, lazy=True)
+        self.assertEqual(danger_real_capability_string(lazy), cap_str)
+        self.assertEqual(lazy, cap)
+        self.assertEqual(cap, lazy)
+        self.assertEqual(hash(lazy), hash(cap))
+        self.assertEqual(deepcopy(lazy), cap)
+        self.assertEqual(type(loads(dumps(lazy))), type(cap))
+        self.assertEqual(loads(dumps(lazy)), cap)
+
+    def test_lazy_postpones_derivation(self) -> None:
+        """
+        ``capability_from_string`` with ``lazy=True`` derives nothing until
+        something derived from the key is used.
+        """
+        cache = enable_derivation_cache()
+        self.addCleanup(disable_derivation_cache)
+        cap = capability_from_string(VectorTests.SSK, lazy=True)
+        self.assertEqual(danger_real_capability_string(cap), VectorTests.SSK)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(danger_real_capability_string(reader(cap)), VectorTests.SSK_RO)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(
+            danger_real_capability_string(verifier(reader(cap))),
+            VectorTests.SSK_VERIFY,
+        )
+        self.assertEqual(cache.misses, 2)
+
+    def test_from_strings_errors(self) -> None:
+        """
+        ``capabilities_from_strings`` raises the same exception as
+        ``capability_from_string`` does for the first string that cannot be
+        parsed.
+        """
+        good = [VectorTests.SSK, VectorTests.CHK, VectorTests.MDMF_DIR2_VERIFY]
+        for bad in [
+            "SSK:abc",
+            "URI:UNKNOWN:abc",
+            "URI:SSK:not-base32:jwjbsudn4z452bo2eqbjdzrvo2f72tav3xyb2llfnfjjsopczi5q",
+            "URI:CHK:intrb3iinc7ushk6krxnbqrvfm:iyi4bqhr45ib4hzyvuv2tdifoqgt7enpavd7szdpiadxoxz6mkrq:1:3",
+        ]:
+            with self.assertRaises(Exception) as expected:
+                capability_from_string(bad)
+            with self.assertRaises(type(expected.exception)) as actual:
+                capabilities_from_strings(good + [bad, "URI:NOPE"] + good)
+            self.assertEqual(actual.exception.args, expected.exception.args)
+
+    @given(capabilities())
+    def test_strings_remembered(self, cap: Capability) -> None:
+        """
+        Serializing a capability again gives the same string object, and a
+        capability parsed from its real string serializes to that string.
+        The remembered strings do not affect equality or pickling.
+        """
+        real = danger_real_capability_string(cap)
+        digested = digested_capability_string(cap)
+        self.assertIs(danger_real_capability_string(cap), real)
+        self.assertIs(digested_capability_string(cap), digested)
+        parsed = capability_from_string(real)
+        self.assertEqual(danger_real_capability_string(parsed), real)
+        self.assertEqual(digested_capability_string(parsed), digested)
+        self.assertEqual(loads(dumps(cap)), cap)
+        self.assertEqual(danger_real_capability_string(loads(dumps(cap))), real)
+
+    def test_strings_not_kept_alive(self) -> None:
+        """
+        Remembering the strings of a capability does not keep it alive, and
+        they are forgotten when it is collected.
+        """
+        cap = capability_from_string(VectorTests.CHK)
+        danger_real_capability_string(cap)
+        digested_capability_string(cap)
+        key = id(cap)
+        self.assertIn(key, serializer._real_strings)
+        self.assertIn(key, serializer._digested_strings)
+        capref = ref(cap)
+        del cap
+        self.assertIsNone(capref())
+        self.assertNotIn(key, serializer._real_strings)
+        self.assertNotIn(key, serializer._digested_strings)
+
+    def test_noncanonical_source(self) -> None:
+        """
+        A capability parsed from a string written differently than the
+        serializer writes it serializes to the serializer's string.
+        """
+        pieces = VectorTests.CHK.split(":")
+        last = pieces[2][-1]
+        variants = [
+            pieces[:2] + [pieces[2].upper()] + pieces[3:],
+            pieces[:2] + [pieces[2][:-1] + chr(ord(last) + 1)] + pieces[3:],
+            pieces[:4] + ["0" + pieces[4]] + pieces[5:],
+            pieces + ["extra"],
+        ]
+        for variant in variants:
+            s = ":".join(variant)
+            self.assertNotEqual(s, VectorTests.CHK)
+            self.assertEqual(
+                danger_real_capability_string(capability_from_string(s)),
+                VectorTests.CHK,
+            )
+        self.assertEqual(
+            [
+                danger_real_capability_string(cap)
+                for cap in capabilities_from_strings([":".join(variants[0])])
+            ],
+            [VectorTests.CHK],
+        )
+
     @given(capabilities())
     def test_digest_capability_not_real(self, cap: Capability) -> None:
         """
@@ -108,8 +258,196 @@ class VectorTests(TestCase):
 
     def test_vector(self) -> None:
         for index, (description, start, transform, expected) in self.vector:
+            for lazy in [False, True]:
+                self.assertEqual(
+                    danger_real_capability_string(
+                        transform(capability_from_string(start, lazy))
+                    ),
+                    expected,
+                    f"(#{index}) {description}({start}, lazy={lazy}) != {expected}",
+                )
+
+
+class FileTests(TestCase):
+    """
+    Tests for ``capabilities_from_file``.
+    """
+
+    lines = [
+        VectorTests.SSK,
+        "URI:UNKNOWN:abc",
+        "",
+        VectorTests.CHK,
+        "URI:\xff",
+        VectorTests.MDMF_DIR2_VERIFY,
+    ]
+    data = "\r\n".join(lines).encode("latin-1")
+
+    def expected(self) -> List[object]:
+        def offset(lineno: int) -> int:
+            return sum(len(line) + 2 for line in self.lines[: lineno - 1])
+
+        return [
+            capability_from_string(VectorTests.SSK),
+            InvalidLine(2, offset(2), "KeyError: 'UNKNOWN'"),
+            capability_from_string(VectorTests.CHK),
+            InvalidLine(
+                5,
+                offset(5),
+                "UnicodeDecodeError: 'ascii' codec can't decode byte 0xff in "
+                "position 4: ordinal not in range(128)",
+            ),
+            capability_from_string(VectorTests.MDMF_DIR2_VERIFY),
+        ]
+
+    def test_path(self) -> None:
+        """
+        ``capabilities_from_file`` accepts the path of a file.
+        """
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "caps")
+            with open(path, "wb") as f:
+                f.write(self.data)
+            self.assertEqual(list(capabilities_from_file(path)), self.expected())
+
+    def test_file(self) -> None:
+        """
+        ``capabilities_from_file`` accepts a binary file object.
+        """
+        self.assertEqual(
+            list(capabilities_from_file(BytesIO(self.data), chunksize=2)),
+            self.expected(),
+        )
+
+    def test_mmap(self) -> None:
+        """
+        ``capabilities_from_file`` accepts an ``mmap``.
+        """
+        m = mmap(-1, len(self.data))
+        m.write(self.data)
+        self.assertEqual(list(capabilities_from_file(m)), self.expected())
+
+    def test_long_line(self) -> None:
+        """
+        A line longer than ``max_line_length`` is reported as invalid without
+        stopping the iteration, whatever the source.
+        """
+        long = b"URI:LIT:" + b"a" * 200
+        data = b"\n".join(
+            [
+                VectorTests.CHK.encode("ascii"),
+                long,
+                long,
+                VectorTests.SSK.encode("ascii"),
+            ]
+        )
+        expected = [
+            capability_from_string(VectorTests.CHK),
+            InvalidLine(2, len(VectorTests.CHK) + 1, "Line is longer than 100 bytes"),
+            InvalidLine(
+                3, len(VectorTests.CHK) + len(long) + 2, "Line is longer than 100 bytes"
+            ),
+            capability_from_string(VectorTests.SSK),
+        ]
+        m = mmap(-1, len(data))
+        m.write(data)
+        sources: List[Union[BytesIO, mmap]] = [BytesIO(data), m]
+        for source in sources:
             self.assertEqual(
-                danger_real_capability_string(transform(capability_from_string(start))),
-                expected,
-                f"(#{index}) {description}({start}) != {expected}",
+                list(capabilities_from_file(source, max_line_length=100)), expected
             )
+
+
+class WriteTests(TestCase):
+    """
+    Tests for ``write_capabilities`` and ``danger_real_capability_bytes``.
+    """
+
+    @given(lists(capabilities()))
+    def test_write(self, caps: List[Capability]) -> None:
+        """
+        ``write_capabilities`` writes one serialized capability per line,
+        which ``capabilities_from_file`` reads back, whether or not the
+        strings are already known.
+        """
+        real = BytesIO()
+        digested = BytesIO()
+        self.assertEqual(write_capabilities(caps, real, write_size=100), len(caps))
+        self.assertEqual(write_capabilities(caps, digested, True, 100), len(caps))
+        real_lines = [danger_real_capability_string(cap) + "\n" for cap in caps]
+        digested_lines = [digested_capability_string(cap) + "\n" for cap in caps]
+        self.assertEqual(real.getvalue(), "".join(real_lines).encode("ascii"))
+        self.assertEqual(digested.getvalue(), "".join(digested_lines).encode("ascii"))
+        real.seek(0)
+        self.assertEqual(list(capabilities_from_file(real)), caps)
+
+        again = BytesIO()
+        write_capabilities(caps, again)
+        self.assertEqual(again.getvalue(), real.getvalue())
+
+    @given(capabilities())
+    def test_bytes(self, cap: Capability) -> None:
+        """
+        ``danger_real_capability_bytes`` gives the real string as bytes,
+        before and after the string is known.
+        """
+        encoded = danger_real_capability_bytes(cap)
+        real = danger_real_capability_string(cap)
+        self.assertEqual(encoded, real.encode("ascii"))
+        self.assertEqual(danger_real_capability_bytes(cap), encoded)
+        parsed = capability_from_string(real)
+        self.assertEqual(danger_real_capability_bytes(parsed), encoded)
+
+
+class ParseCacheTests(TestCase):
+    """
+    Tests for ``ParseCache``.
+    """
+
+    def test_hit(self) -> None:
+        """
+        Parsing the same string again gives back the same object and counts
+        as a hit.
+        """
+        cache = ParseCache(2)
+        first = cache.capability_from_string(VectorTests.SSK_DIR2)
+        second = cache.capability_from_string(VectorTests.SSK_DIR2)
+        self.assertIs(first, second)
+        self.assertEqual(first, capability_from_string(VectorTests.SSK_DIR2))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_parsers_separate(self) -> None:
+        """
+        Each parsing function has its own entries so restricted parsers still
+        reject strings other parsers accept.
+        """
+        cache = ParseCache(8)
+        cache.capability_from_string(VectorTests.SSK)
+        with self.assertRaises(NotRecognized):
+            cache.writeable_directory_from_string(VectorTests.SSK)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertEqual(cache.statistics().size, 1)
+
+    def test_eviction(self) -> None:
+        """
+        When the cache is full the least recently used entry is evicted.
+        """
+        cache = ParseCache(2)
+        cache.capability_from_string(VectorTests.SSK)
+        cache.capability_from_string(VectorTests.MDMF)
+        cache.capability_from_string(VectorTests.SSK)
+        cache.capability_from_string(VectorTests.CHK)
+        self.assertEqual(cache.evictions, 1)
+        cache.capability_from_string(VectorTests.SSK)
+        cache.capability_from_string(VectorTests.MDMF)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_clear(self) -> None:
+        """
+        ``ParseCache.clear`` drops every entry.
+        """
+        cache = ParseCache(2)
+        cache.capability_from_string(VectorTests.SSK)
+        cache.clear()
+        cache.capability_from_string(VectorTests.SSK)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
@@ -0,0 +1,175 @@
+from hashlib import sha256
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import binary, integers
+
+from tahoe_capabilities import CHKRead, capability_from_string
+from tahoe_capabilities.chk import prepare_chk
+from tahoe_capabilities.hashtree import HashTreeBuilder
+from tahoe_capabilities.hashutil import (
+    convergence_hash,
+    plaintext_hash,
+    plaintext_segment_hash,
+    storage_index_hash,
+    uri_extension_hash,
+)
+
+# Some of the CHK test vectors of Tahoe-LAFS 1.20.0, from
+# integration/vectors/test_vectors.yaml, encoded 3 of 10 with a maximum
+# segment size of 128 KiB: the convergence secret, the seed and size the
+# contents are made by repeating, and the read capability.
+TAHOE_VECTORS = [
+    (
+        b"a" * 16,
+        b"a",
+        56,
+        "URI:CHK:hah7mxwfpqemm7icdh3hwsa5fa:"
+        "6epvxt2uxh42obpnfn4wkrplqml7voh7aqpnqnapu7ffcyn2hk3q:3:10:56",
+    ),
+    (
+        b"a" * 16,
+        b"a",
+        1024,
+        "URI:CHK:dx7tvyr2fc4u7lxjc6kehq2svq:"
+        "tiy4qh2g6lqejxcaym3rr7ymkdkinn4qised6kgxloj7sptsqu4a:3:10:1024",
+    ),
+    (
+        sha256(b"Hello world").digest()[:16],
+        b"c",
+        4096,
+        "URI:CHK:fe64krzyaeff3d4teunjbetkzy:"
+        "27hrywwaffqiqcgfkmzwbot3iamotr3bey2l5kaladmdmxuaz5ka:3:10:4096",
+    ),
+    (
+        b"a" * 16,
+        sha256(b"bar").digest(),
+        128 * 1024 + 1,
+        "URI:CHK:7vfgl5cv4nlzqx35z4uthjv36y:"
+        "nnueftbzxfz6u5yjxwwofaxzzft7xss5wzfh66rrcwv2zwrm63sa:3:10:131073",
+    ),
+]
+
+
+class PrepareCHKTests(TestCase):
+    """
+    Tests for ``prepare_chk``.
+    """
+
+    @given(
+        binary(max_size=1000),
+        integers(min_value=1, max_value=5),
+        integers(min_value=1, max_value=200),
+        integers(min_value=1, max_value=300),
+    )
+    def test_same_as_separate(
+        self, data: bytes, needed: int, max_segment_size: int, chunk_size: int
+    ) -> None:
+        """
+        ``prepare_chk`` computes the same values as the separate hash
+        functions, however the file is chunked.
+        """
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "data")
+            with open(path, "wb") as f:
+                f.write(data)
+            prepared = prepare_chk(
+                path, needed, 10, max_segment_size, b"secret", chunk_size
+            )
+        # Tahoe-LAFS shrinks the segment size to the size of a small file.
+        segment_size = -(-min(max_segment_size, len(data)) // needed) * needed
+        readkey = convergence_hash(needed, 10, segment_size, data, b"secret")
+        segment_hashes = tuple(
+            plaintext_segment_hash(data[i : i + segment_size])
+            for i in range(0, len(data), max(segment_size, 1))
+        )
+        self.assertEqual(
+            (
+                prepared.readkey,
+                prepared.storage_index,
+                prepared.size,
+                prepared.segment_size,
+                prepared.plaintext_hash,
+                prepared.plaintext_segment_hashes,
+                prepared.plaintext_root_hash(),
+            ),
+            (
+                readkey,
+                storage_index_hash(readkey),
+                len(data),
+                segment_size,
+                plaintext_hash(data),
+                segment_hashes,
+                HashTreeBuilder(segment_hashes).root(),
+            ),
+        )
+        ueb_hash = uri_extension_hash(b"ueb")
+        self.assertEqual(
+            prepared.read_capability(ueb_hash),
+            CHKRead.derive(readkey, ueb_hash, needed, 10, len(data)),
+        )
+
+    def test_tahoe_vectors(self) -> None:
+        """
+        ``prepare_chk`` computes the same read capability as Tahoe-LAFS.
+        """
+        for convergence, seed, size, expected in TAHOE_VECTORS:
+            data = (seed * (size // len(seed) + 1))[:size]
+            cap = capability_from_string(expected)
+            assert isinstance(cap, CHKRead)
+            prepared = prepare_chk(
+                BytesIO(data), 3, 10, 128 * 1024, convergence, size=size
+            )
+            self.assertEqual(
+                prepared.read_capability(cap.verifier.uri_extension_hash), cap
+            )
+
+    def test_random_key(self) -> None:
+        """
+        Without a convergence secret the key is random and the storage index
+        is derived from it.
+        """
+        a = prepare_chk(BytesIO(b"data"), 3, 10, 2**17, size=4)
+        b = prepare_chk(BytesIO(b"data"), 3, 10, 2**17, size=4)
+        self.assertNotEqual(a.readkey, b.readkey)
+        self.assertEqual(a.storage_index, storage_index_hash(a.readkey))
+        self.assertEqual(a.plaintext_hash, b.plaintext_hash)
+
+    def test_invalid(self) -> None:
+        """
+        Invalid encoding parameters are rejected.
+        """
+        for convergence in [None, b""]:
+            with self.assertRaises(ValueError):
+                prepare_chk(BytesIO(b"data"), 0, 10, 2**17, convergence, size=4)
+            with self.assertRaises(ValueError):
+                prepare_chk(BytesIO(b"data"), 11, 10, 2**17, convergence, size=4)
+
+    def test_size(self) -> None:
+        """
+        The size of a file object must be given, and a file which is not the
+        size given is rejected.
+        """
+        with self.assertRaises(ValueError):
+            prepare_chk(BytesIO(b"data"), 3, 10, 2**17, b"")
+        for size in [0, 3, 5]:
+            with self.assertRaises(ValueError):
+                prepare_chk(BytesIO(b"data"), 3, 10, 2**17, b"", size=size)
+
+    def test_size_of_path(self) -> None:
+        """
+        A file at a path which is not the size given is rejected with
+        ``ValueError``, whether it is read through a memory mapping or not.
+        """
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "data")
+            with open(path, "wb") as f:
+                f.write(b"x" * 10000)
+            for size in [0, 5000, 20000]:
+                with self.assertRaises(ValueError):
+                    prepare_chk(path, 3, 10, 4096, b"s", chunk_size=1024, size=size)
+                with open(path, "rb") as f, self.assertRaises(ValueError):
+                    prepare_chk(f, 3, 10, 4096, b"s", chunk_size=1024, size=size)
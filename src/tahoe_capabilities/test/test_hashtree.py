@@ -0,0 +1,117 @@
+from typing import List, Set
+from unittest import TestCase
+
+from hypothesis import assume, given
+from hypothesis.strategies import DataObject, binary, data, integers, lists, sets
+
+from tahoe_capabilities.hashtree import (
+    BadHashError,
+    HashTreeBuilder,
+    NotEnoughHashesError,
+    hash_tree,
+    needed_hashes,
+    verify_leaves,
+)
+from tahoe_capabilities.hashutil import (
+    block_hash,
+    empty_leaf_hash,
+    pair_hash,
+    tagged_hash,
+    tagged_pair_hash,
+)
+
+leaves = lists(binary(min_size=32, max_size=32), max_size=20)
+
+
+def _reference_root(leaves: List[bytes]) -> bytes:
+    """
+    Compute the root of a hash tree the way Tahoe-LAFS's ``HashTree`` does.
+    """
+    row = list(leaves)
+    while len(row) & (len(row) - 1) or not row:
+        row.append(tagged_hash(b"Merkle tree empty leaf", b"%d" % (len(row),)))
+    while len(row) > 1:
+        row = [
+            tagged_pair_hash(b"Merkle tree internal node", row[i], row[i + 1])
+            for i in range(0, len(row), 2)
+        ]
+    return row[0]
+
+
+class HashTreeTests(TestCase):
+    """
+    Tests for ``HashTreeBuilder`` and ``hash_tree``.
+    """
+
+    @given(leaves)
+    def test_root(self, leaves: List[bytes]) -> None:
+        """
+        The builder and ``hash_tree`` compute the same root as Tahoe-LAFS,
+        and the builder can compute the root after every leaf.
+        """
+        builder = HashTreeBuilder()
+        for n, leaf in enumerate(leaves):
+            self.assertEqual(builder.root(), _reference_root(leaves[:n]))
+            builder.add(leaf)
+        self.assertEqual(len(builder), len(leaves))
+        self.assertEqual(builder.root(), _reference_root(leaves))
+        self.assertEqual(hash_tree(leaves)[0], _reference_root(leaves))
+
+    def test_small(self) -> None:
+        """
+        Missing leaves are padded with the empty leaf hash of their number.
+        """
+        a, b, c = (block_hash(data) for data in [b"a", b"b", b"c"])
+        self.assertEqual(HashTreeBuilder([a]).root(), a)
+        self.assertEqual(HashTreeBuilder().root(), empty_leaf_hash(0))
+        self.assertEqual(
+            HashTreeBuilder([a, b, c]).root(),
+            pair_hash(pair_hash(a, b), pair_hash(c, empty_leaf_hash(3))),
+        )
+
+
+class VerifyTests(TestCase):
+    """
+    Tests for ``needed_hashes`` and ``verify_leaves``.
+    """
+
+    @given(leaves, data())
+    def test_verify(self, leaves: List[bytes], data: DataObject) -> None:
+        """
+        Leaves are verified using only the hashes ``needed_hashes`` names,
+        and changing a leaf or leaving out a hash is detected.
+        """
+        assume(leaves)
+        leafnums: Set[int] = data.draw(
+            sets(integers(min_value=0, max_value=len(leaves) - 1), min_size=1)
+        )
+        tree = hash_tree(leaves)
+        needed = needed_hashes(len(leaves), leafnums)
+        hashes = {index: tree[index] for index in needed}
+        chosen = {leafnum: leaves[leafnum] for leafnum in leafnums}
+        verify_leaves(tree[0], len(leaves), chosen, hashes)
+
+        leafnum = min(leafnums)
+        bad = dict(chosen)
+        bad[leafnum] = bytes(32) if leaves[leafnum] != bytes(32) else bytes([1]) * 32
+        with self.assertRaises(BadHashError):
+            verify_leaves(tree[0], len(leaves), bad, hashes)
+
+        for index in needed:
+            missing = dict(hashes)
+            del missing[index]
+            with self.assertRaises(NotEnoughHashesError):
+                verify_leaves(tree[0], len(leaves), chosen, missing)
+
+    def test_needed(self) -> None:
+        """
+        The hashes needed are the uncles of the leaves not computed from the
+        other leaves.
+        """
+        # Eight leaves are nodes 7 to 14.
+        self.assertEqual(needed_hashes(8, [0]), {8, 4, 2})
+        self.assertEqual(needed_hashes(8, [0, 1]), {4, 2})
+        self.assertEqual(needed_hashes(8, [0, 7]), {8, 4, 13, 5})
+        self.assertEqual(needed_hashes(5, [4], include_leaves=True), {12, 11, 6, 1})
+        with self.assertRaises(ValueError):
+            needed_hashes(5, [5])
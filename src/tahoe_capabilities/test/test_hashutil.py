@@ -0,0 +1,327 @@
+import hashlib
+from array import array
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+from typing import List, Union
+from unittest import TestCase
+from unittest.mock import patch
+
+from hypothesis import given
+from hypothesis.strategies import binary, integers, lists
+
+from tahoe_capabilities import capability_from_string
+from tahoe_capabilities.hashutil import (
+    BLOCK_TAG,
+    PLAINTEXT_TAG,
+    _tag_states,
+    block_hash_many,
+    bucket_renewal_secret_hash,
+    convergence_hash,
+    convergence_key_for_file,
+    convergence_keys_many,
+    disable_derivation_cache,
+    enable_derivation_cache,
+    hash_file,
+    hash_stream,
+    hmac,
+    netstring,
+    permute_server_hash,
+    register_tag,
+    ssk_readkey_hash,
+    ssk_readkey_hash_many,
+    ssk_storage_index_hash,
+    storage_index_hash,
+    tagged_hash,
+    tagged_hash_many,
+    tagged_hasher,
+    tagged_pair_hash,
+)
+
+SSK_DIR2 = "URI:DIR2:5wp23saa7oxr2lw6ly7iawyndy:4j7ki5a64zkzo2jpynqdacgejtpibpd5k25eexzdidnheaczsxlq"
+
+
+class DerivationCacheTests(TestCase):
+    """
+    Tests for ``enable_derivation_cache`` and ``disable_derivation_cache``.
+    """
+
+    def tearDown(self) -> None:
+        disable_derivation_cache()
+
+    @given(binary(min_size=16, max_size=16))
+    def test_same_results(self, key: bytes) -> None:
+        """
+        The derivation functions give the same results with the cache as
+        without.
+        """
+        expected = [
+            storage_index_hash(key),
+            ssk_readkey_hash(key),
+            ssk_storage_index_hash(key),
+        ]
+        enable_derivation_cache()
+        for _ in range(2):
+            self.assertEqual(
+                [
+                    storage_index_hash(key),
+                    ssk_readkey_hash(key),
+                    ssk_storage_index_hash(key),
+                ],
+                expected,
+            )
+            self.assertEqual(ssk_readkey_hash_many([key]), [expected[1]])
+        disable_derivation_cache()
+
+    def test_parse_hits(self) -> None:
+        """
+        Parsing the same capability again derives its keys from the cache.
+        """
+        cache = enable_derivation_cache()
+        capability_from_string(SSK_DIR2)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        capability_from_string(SSK_DIR2)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_max_bytes(self) -> None:
+        """
+        The cache evicts values to stay within its memory limit.
+        """
+        cache = enable_derivation_cache(max_bytes=2000)
+        ssk_readkey_hash_many([bytes([n]) * 16 for n in range(100)])
+        statistics = cache.statistics()
+        self.assertLessEqual(statistics.weight, 2000)
+        self.assertEqual(statistics.evictions, 100 - statistics.size)
+
+
+class HashFileTests(TestCase):
+    """
+    Tests for ``hash_file`` and ``hash_stream``.
+    """
+
+    @given(binary(max_size=2000), integers(min_value=1, max_value=300))
+    def test_same_as_tagged_hash(self, data: bytes, chunk_size: int) -> None:
+        """
+        ``hash_file`` and ``hash_stream`` give the same result as
+        ``tagged_hash`` on the whole contents, whatever the chunk size.
+        """
+        expected = tagged_hash(PLAINTEXT_TAG, data, 16)
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "data")
+            with open(path, "wb") as f:
+                f.write(data)
+            self.assertEqual(hash_file(path, PLAINTEXT_TAG, chunk_size, 16), expected)
+            with open(path, "rb") as f:
+                self.assertEqual(hash_file(f, PLAINTEXT_TAG, chunk_size, 16), expected)
+        self.assertEqual(
+            hash_stream(BytesIO(data), PLAINTEXT_TAG, chunk_size, 16), expected
+        )
+
+    @given(
+        binary(max_size=2000),
+        binary(max_size=32),
+        integers(min_value=1, max_value=300),
+    )
+    def test_convergence_key(
+        self, data: bytes, convergence: bytes, chunk_size: int
+    ) -> None:
+        """
+        ``convergence_key_for_file`` gives the same key as ``convergence_hash``
+        on the whole contents.
+        """
+        expected = convergence_hash(3, 10, 2**17, data, convergence)
+        self.assertEqual(len(expected), 16)
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "data")
+            with open(path, "wb") as f:
+                f.write(data)
+            for _ in range(2):
+                self.assertEqual(
+                    convergence_key_for_file(
+                        path, 3, 10, 2**17, convergence, chunk_size
+                    ),
+                    expected,
+                )
+        self.assertEqual(
+            convergence_key_for_file(BytesIO(data), 3, 10, 2**17, convergence),
+            expected,
+        )
+
+    def test_convergence_parameters(self) -> None:
+        """
+        ``convergence_key_for_file`` rejects invalid encoding parameters
+        every time, not only the first.
+        """
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                convergence_key_for_file(BytesIO(b""), 10, 3, 2**17, b"")
+
+    @given(
+        lists(binary(max_size=300), max_size=12),
+        integers(min_value=1, max_value=4),
+        integers(min_value=1, max_value=100),
+    )
+    def test_convergence_keys_many(
+        self, contents: List[bytes], workers: int, chunk_size: int
+    ) -> None:
+        """
+        ``convergence_keys_many`` gives the convergence key and storage index
+        of each file, given by path or by contents, in order.
+        """
+        expected = [
+            convergence_hash(3, 10, 2**17, data, b"secret") for data in contents
+        ]
+        expected_pairs = [(key, storage_index_hash(key)) for key in expected]
+        with TemporaryDirectory() as tmp:
+            items: List[Union[str, bytes]] = []
+            for i, data in enumerate(contents):
+                if i % 3:
+                    items.append(data)
+                else:
+                    items.append(join(tmp, str(i)))
+                    with open(items[-1], "wb") as f:
+                        f.write(data)
+            self.assertEqual(
+                list(
+                    convergence_keys_many(
+                        items, 3, 10, 2**17, b"secret", workers, chunk_size
+                    )
+                ),
+                expected_pairs,
+            )
+
+    def test_convergence_keys_errors(self) -> None:
+        """
+        ``convergence_keys_many`` rejects invalid encoding parameters at once
+        and raises errors reading a file when the file's result is reached.
+        """
+        with self.assertRaises(ValueError):
+            convergence_keys_many([], 10, 3, 2**17, b"")
+        with TemporaryDirectory() as tmp:
+            results = convergence_keys_many(
+                [b"", join(tmp, "missing")], 3, 10, 2**17, b"", workers=2
+            )
+            next(results)
+            with self.assertRaises(OSError):
+                next(results)
+
+
+def _sha256d(data: bytes, truncate_to: int = 32) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()[:truncate_to]
+
+
+def _hmac(key: bytes, data: bytes) -> bytes:
+    inner = hashlib.sha256(bytes(c ^ 0x36 for c in key) + data).digest()
+    return hashlib.sha256(bytes(c ^ 0x5C for c in key) + inner).digest()
+
+
+class BufferTests(TestCase):
+    """
+    Tests for passing buffers other than ``bytes`` to the hash functions.
+    """
+
+    @given(binary(), binary())
+    def test_same_results(self, a: bytes, b: bytes) -> None:
+        """
+        The hash functions give the same results for ``bytearray`` and
+        ``memoryview`` inputs as for ``bytes``, and the same results as
+        hashing the concatenated netstrings.
+        """
+        expected = [
+            netstring(a),
+            tagged_hash(a, b),
+            _sha256d(netstring(a) + netstring(a) + netstring(b), 16),
+            _hmac(a, b),
+            hashlib.sha1(a + b).digest(),
+            storage_index_hash(b),
+        ]
+        for wrap in [bytes, bytearray, memoryview]:
+            self.assertEqual(
+                [
+                    netstring(wrap(a)),
+                    tagged_hash(wrap(a), wrap(b)),
+                    tagged_pair_hash(wrap(a), wrap(a), wrap(b), 16),
+                    hmac(wrap(a), wrap(b)),
+                    permute_server_hash(wrap(a), wrap(b)),
+                    storage_index_hash(wrap(b)),
+                ],
+                expected,
+            )
+
+    def test_item_size(self) -> None:
+        """
+        Netstring lengths count bytes, not the items of a buffer.
+        """
+        values = array("I", [1, 2, 3])
+        self.assertEqual(netstring(memoryview(values)), netstring(values.tobytes()))
+        self.assertEqual(
+            tagged_pair_hash(b"tag", memoryview(values), b""),
+            tagged_pair_hash(b"tag", values.tobytes(), b""),
+        )
+        self.assertEqual(
+            hmac(memoryview(values), b"data"), hmac(values.tobytes(), b"data")
+        )
+        peerid = array("I", range(5))
+        self.assertEqual(
+            bucket_renewal_secret_hash(b"secret", memoryview(peerid)),
+            bucket_renewal_secret_hash(b"secret", peerid.tobytes()),
+        )
+
+
+class TaggedHasherTests(TestCase):
+    """
+    Tests for ``tagged_hasher`` and ``register_tag``.
+    """
+
+    @given(binary(), binary(), binary())
+    def test_hashlib_interface(self, tag: bytes, a: bytes, b: bytes) -> None:
+        """
+        The hasher's ``digest`` can be called repeatedly and more data can be
+        hashed after it, and ``copy`` gives an independent hasher.
+        """
+        hasher = tagged_hasher(tag, 16)
+        hasher.update(a)
+        self.assertEqual(hasher.digest(), tagged_hash(tag, a, 16))
+        self.assertEqual(hasher.digest(), tagged_hash(tag, a, 16))
+        self.assertEqual(hasher.hexdigest(), tagged_hash(tag, a, 16).hex())
+        self.assertEqual(hasher.digest_size, 16)
+        copy = hasher.copy()
+        hasher.update(b)
+        self.assertEqual(hasher.digest(), tagged_hash(tag, a + b, 16))
+        self.assertEqual(copy.digest(), tagged_hash(tag, a, 16))
+        self.assertEqual(tagged_hasher(tag).digest_size, 32)
+
+    @given(binary(), binary())
+    def test_registered(self, tag: bytes, val: bytes) -> None:
+        """
+        Registering a tag does not change the hashes made with it.
+        """
+        expected = _sha256d(netstring(tag) + val)
+        self.assertEqual(tagged_hash(tag, val), expected)
+        # Registered tags are kept for good.  Forget these ones afterwards.
+        with patch.dict(_tag_states):
+            register_tag(tag)
+            self.assertEqual(tagged_hash(tag, val), expected)
+            self.assertEqual(tagged_hash(tag, val), expected)
+            self.assertEqual(tagged_hash(bytearray(tag), val), expected)
+
+    @given(
+        lists(binary(), max_size=5),
+        integers(min_value=0, max_value=3),
+        integers(min_value=1, max_value=4),
+    )
+    def test_many(self, values: List[bytes], size: int, workers: int) -> None:
+        """
+        ``tagged_hash_many`` gives the same results as ``tagged_hash`` on
+        each value, in order, whether or not the values are large enough to
+        hash in several threads.
+        """
+        values = [value * (2**14 * size + 1) for value in values]
+        self.assertEqual(
+            tagged_hash_many(BLOCK_TAG, values, 16, workers),
+            [tagged_hash(BLOCK_TAG, value, 16) for value in values],
+        )
+        self.assertEqual(
+            block_hash_many(iter(values), workers),
+            [tagged_hash(BLOCK_TAG, value) for value in values],
+        )
@@ -0,0 +1,75 @@
+from typing import List
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import integers, lists
+
+from tahoe_capabilities import (
+    Capability,
+    StorageIndexIndex,
+    capability_from_string,
+    is_read,
+    is_write,
+    storage_index,
+)
+from tahoe_capabilities.base32 import b32encode
+from tahoe_capabilities.strategies import capabilities, write_capabilities
+
+MDMF = "URI:MDMF:p2xoe4uu64rqa5fi6xz3t5wpvu:zsaeyn5noivpixiu6uadlz2mu6r2alcmgrur2efdwadx4agxo6ua"
+
+
+class StorageIndexIndexTests(TestCase):
+    """
+    Tests for ``StorageIndexIndex``.
+    """
+
+    def test_strongest(self) -> None:
+        """
+        The index keeps the strongest capability for each storage index no
+        matter what order they are added in.
+        """
+        write = capability_from_string(MDMF)
+        read = write.reader  # type: ignore[union-attr]
+        verify = read.verifier
+        key = storage_index(write)
+        assert key is not None
+        for order in [[verify, read, write], [write, read, verify], [read, write]]:
+            index = StorageIndexIndex(order)
+            self.assertEqual(len(index), 1)
+            self.assertEqual(index[key], write)
+        index = StorageIndexIndex([verify, read])
+        self.assertEqual(index.get(key), read)
+
+    @given(lists(capabilities()))
+    def test_lookup(self, caps: List[Capability]) -> None:
+        """
+        Every capability with a storage index can be found by it.
+        """
+        index = StorageIndexIndex(caps)
+        for cap in caps:
+            key = storage_index(cap)
+            if key is None:
+                self.assertIn(cap.prefix, ("LIT", "DIR2-LIT"))
+                continue
+            self.assertIn(key, index)
+            found = index[key]
+            self.assertEqual(storage_index(found), key)
+            self.assertGreaterEqual(
+                (is_write(found), is_read(found)), (is_write(cap), is_read(cap))
+            )
+
+    @given(lists(write_capabilities(), unique_by=storage_index), integers(0, 26))
+    def test_prefix(self, caps: List[Capability], digits: int) -> None:
+        """
+        ``StorageIndexIndex.items_with_prefix`` finds exactly the capabilities
+        whose encoded storage index starts with the prefix, in order.
+        """
+        index = StorageIndexIndex(caps)
+        keys = sorted(k for k in map(storage_index, caps) if k is not None)
+        self.assertEqual(list(index), keys)
+        for key in keys:
+            prefix = b32encode(key)[:digits]
+            self.assertEqual(
+                index.items_with_prefix(prefix),
+                [(k, index[k]) for k in keys if b32encode(k).startswith(prefix)],
+            )
@@ -0,0 +1,73 @@
+import gc
+from typing import List
+from unittest import TestCase
+from weakref import ref
+
+from hypothesis import given
+from hypothesis.strategies import lists
+
+from tahoe_capabilities import (
+    Capability,
+    SSKDirectoryWrite,
+    SSKRead,
+    SSKWrite,
+    capabilities_from_strings,
+    capability_from_string,
+    danger_real_capability_string,
+    intern_capability,
+    readable_from_string,
+)
+from tahoe_capabilities.strategies import capabilities, ssk_writes
+
+
+class InternTests(TestCase):
+    """
+    Tests for ``intern_capability`` and parsing with ``intern=True``.
+    """
+
+    @given(capabilities())
+    def test_intern(self, cap: Capability) -> None:
+        """
+        Equal capabilities intern to the same object, whether built or
+        parsed, lazily or not.
+        """
+        s = danger_real_capability_string(cap)
+        interned = intern_capability(cap)
+        self.assertEqual(interned, cap)
+        self.assertIs(intern_capability(capability_from_string(s)), interned)
+        self.assertIs(capability_from_string(s, intern=True), interned)
+        self.assertIs(capability_from_string(s, lazy=True, intern=True), interned)
+        self.assertIs(capabilities_from_strings([s, s], intern=True)[1], interned)
+
+    @given(ssk_writes())
+    def test_shared(self, cap: SSKWrite) -> None:
+        """
+        The capabilities inside an interned capability are shared with other
+        interned capabilities.
+        """
+        s = danger_real_capability_string(cap)
+        write = capability_from_string(s, intern=True)
+        assert isinstance(write, SSKWrite)
+        writekey, fingerprint = cap.secrets
+        directory = intern_capability(
+            SSKDirectoryWrite(SSKWrite.derive(writekey, fingerprint))
+        )
+        self.assertIs(directory.cap_object, write)
+        read = readable_from_string(danger_real_capability_string(cap.reader))
+        assert isinstance(read, SSKRead)
+        self.assertIs(intern_capability(read), write.reader)
+        self.assertIs(intern_capability(read.verifier), write.reader.verifier)
+
+    @given(lists(capabilities(), max_size=10))
+    def test_forgotten(self, caps: List[Capability]) -> None:
+        """
+        Interned capabilities are forgotten once nothing else uses them.
+        """
+        strs = list(map(danger_real_capability_string, caps))
+        del caps
+        interned = capabilities_from_strings(strs, intern=True)
+        self.assertEqual(len(set(map(id, interned))), len(set(strs)))
+        refs = list(map(ref, interned))
+        del interned
+        gc.collect()
+        self.assertEqual([r() for r in refs], [None] * len(refs))
@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from pickle import dumps, loads
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+from tahoe_capabilities import (
+    Capability,
+    CapabilityTable,
+    MDMFDirectoryWrite,
+    MDMFWrite,
+    NotRecognized,
+    SSKWrite,
+    capabilities_from_strings,
+    danger_real_capability_string,
+    parallel,
+    parallel_parse,
+    parallel_parse_table,
+)
+
+
+def _family(n: int) -> List[Capability]:
+    """
+    Make some write capabilities and the capabilities derived from them.
+    """
+    ssk = SSKWrite.derive(bytes([n]) * 16, bytes([n]) * 32)
+    mdmf = MDMFDirectoryWrite(MDMFWrite.derive(bytes([n]) * 16, bytes([n]) * 32))
+    return [ssk, ssk.reader, ssk.reader.verifier, mdmf, mdmf.reader]
+
+
+CAP_STRS = [
+    danger_real_capability_string(cap) for n in range(20) for cap in _family(n)
+] + [
+    "URI:CHK:intrb3iinc7ushk6krxnbqrvfm:iyi4bqhr45ib4hzyvuv2tdifoqgt7enpavd7szdpiadxoxz6mkrq:1:3:120",
+    "URI:LIT:nbswy3dp",
+]
+
+
+class ParallelParseTests(TestCase):
+    """
+    Tests for ``parallel_parse``.
+    """
+
+    def setUp(self) -> None:
+        patcher = patch.object(parallel, "PARALLEL_THRESHOLD", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parse(self) -> None:
+        """
+        ``parallel_parse`` gives the same capabilities, in the same order, as
+        ``capabilities_from_strings``.
+        """
+        expected = capabilities_from_strings(CAP_STRS)
+        self.assertEqual(parallel_parse(CAP_STRS, workers=2, chunksize=7), expected)
+        with ProcessPoolExecutor(2) as pool:
+            self.assertEqual(
+                parallel_parse(CAP_STRS, chunksize=50, executor=pool), expected
+            )
+            self.assertEqual(
+                list(parallel_parse_table(CAP_STRS, chunksize=7, executor=pool)),
+                expected,
+            )
+
+    def test_not_in_table(self) -> None:
+        """
+        Capabilities which the parser accepts but a ``CapabilityTable``
+        cannot hold are parsed by ``parallel_parse`` as they are in this
+        process, and ``parallel_parse_table`` rejects them the same way in
+        both.
+        """
+        chk = CAP_STRS[-2].rsplit(":", 3)[0]
+        strs = CAP_STRS[:7] + [
+            f"{chk}:1:3:{2**64}",
+            f"{chk}:{2**16}:3:120",
+            "URI:SSK-Verifier:aa:bb",
+        ]
+        strs += CAP_STRS[7:]
+        expected = capabilities_from_strings(strs)
+        self.assertEqual(parallel_parse(strs, workers=2, chunksize=4), expected)
+        with self.assertRaises(ValueError) as in_process:
+            CapabilityTable().extend_from_strings(strs)
+        with self.assertRaises(ValueError) as in_workers:
+            parallel_parse_table(strs, workers=2, chunksize=4)
+        self.assertEqual(in_workers.exception.args, in_process.exception.args)
+
+    def test_error(self) -> None:
+        """
+        ``parallel_parse`` raises the exception for the first string which
+        cannot be parsed.
+        """
+        strs = CAP_STRS[:10] + ["SSK:abc"] + CAP_STRS[10:] + ["URI:X:abc"]
+        with self.assertRaises(NotRecognized) as ctx:
+            parallel_parse(strs, workers=2, chunksize=3)
+        self.assertEqual(str(ctx.exception), str(NotRecognized(["SSK"])))
+
+    def test_pickle_not_recognized(self) -> None:
+        """
+        ``NotRecognized`` keeps its message when pickled.
+        """
+        exc = NotRecognized(["URI", "X"])
+        self.assertEqual(str(loads(dumps(exc))), str(exc))
@@ -0,0 +1,87 @@
+from typing import List, Union
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import lists
+
+from tahoe_capabilities import (
+    KIND_CHK,
+    KIND_DIRECTORY,
+    KIND_IMMUTABLE,
+    KIND_LITERAL,
+    KIND_MDMF,
+    KIND_MUTABLE,
+    KIND_READ,
+    KIND_SSK,
+    KIND_VERIFY,
+    KIND_WRITE,
+    Capability,
+    count_kinds,
+    is_directory,
+    is_mutable,
+    is_read,
+    is_verify,
+    is_write,
+    kind_mask,
+    kinds,
+)
+from tahoe_capabilities.strategies import capabilities
+from tahoe_capabilities.table import CapabilityTable
+
+_READ_PREFIXES = {
+    "LIT",
+    "DIR2-LIT",
+    "CHK",
+    "DIR2-CHK",
+    "SSK-RO",
+    "DIR2-RO",
+    "MDMF-RO",
+    "DIR2-MDMF-RO",
+}
+
+
+class KindTests(TestCase):
+    """
+    Tests for the ``kind`` of each capability and the predicates using it.
+    """
+
+    @given(capabilities())
+    def test_kind(self, cap: Capability) -> None:
+        """
+        The kind of a capability agrees with its prefix and has exactly one
+        bit of each group.
+        """
+        prefix = cap.prefix
+        self.assertEqual(is_directory(cap), prefix.startswith("DIR2"))
+        self.assertEqual(is_verify(cap), prefix.endswith("Verifier"))
+        self.assertEqual(is_read(cap), prefix in _READ_PREFIXES)
+        self.assertEqual(is_mutable(cap), "LIT" not in prefix and "CHK" not in prefix)
+        for group in [
+            [KIND_VERIFY, KIND_READ, KIND_WRITE],
+            [KIND_MUTABLE, KIND_IMMUTABLE],
+            [KIND_LITERAL, KIND_CHK, KIND_SSK, KIND_MDMF],
+        ]:
+            self.assertEqual(sum(bool(cap.kind & bit) for bit in group), 1)
+        self.assertEqual(is_write(cap), not is_verify(cap) and not is_read(cap))
+
+    @given(lists(capabilities()))
+    def test_batch(self, caps: List[Capability]) -> None:
+        """
+        The batch helpers classify a list and a table of the same
+        capabilities the same way as the capabilities themselves.
+        """
+        table = CapabilityTable(caps)
+        expected = [cap.kind for cap in caps]
+        sources: List[Union[List[Capability], CapabilityTable]] = [caps, table]
+        for source in sources:
+            self.assertEqual(list(kinds(source)), expected)
+            self.assertEqual(
+                list(kind_mask(source, KIND_WRITE | KIND_DIRECTORY)),
+                [int(is_write(cap) and is_directory(cap)) for cap in caps],
+            )
+            counts = count_kinds(source)
+            self.assertEqual(sum(counts.values()), len(caps))
+            self.assertEqual(
+                sum(n for (k, n) in counts.items() if k & KIND_MUTABLE),
+                sum(map(is_mutable, caps)),
+            )
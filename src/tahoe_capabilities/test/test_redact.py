@@ -0,0 +1,134 @@
+import logging
+from typing import List
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import lists, text
+
+from tahoe_capabilities import (
+    Capability,
+    RedactingFilter,
+    danger_real_capability_string,
+    digested_capability_string,
+    redact_capabilities,
+    redact_capabilities_bytes,
+)
+from tahoe_capabilities.strategies import capabilities
+
+# Text which cannot run into a capability string on either side of it.
+separators = text(alphabet=" \n,.;()[]\"'=!", min_size=1)
+
+
+class RedactTests(TestCase):
+    """
+    Tests for ``redact_capabilities`` and ``redact_capabilities_bytes``.
+    """
+
+    @given(lists(capabilities(), min_size=1), separators)
+    def test_replaced(self, caps: List[Capability], sep: str) -> None:
+        """
+        Each capability string in some text is replaced with its digested
+        form, in ``str``, ``bytes`` and ``memoryview`` text.
+        """
+        real = sep.join(map(danger_real_capability_string, caps))
+        digested = sep.join(map(digested_capability_string, caps))
+        message = f"before{sep}{real}{sep}after"
+        expected = f"before{sep}{digested}{sep}after"
+        self.assertEqual(redact_capabilities(message), expected)
+        encoded = message.encode("utf-8")
+        self.assertEqual(redact_capabilities_bytes(encoded), expected.encode("utf-8"))
+        self.assertEqual(
+            redact_capabilities_bytes(memoryview(encoded)), expected.encode("utf-8")
+        )
+
+    @given(lists(capabilities(), min_size=1), separators)
+    def test_idempotent(self, caps: List[Capability], sep: str) -> None:
+        """
+        Redacting text which is already redacted changes nothing.
+        """
+        message = sep.join(map(danger_real_capability_string, caps))
+        redacted = redact_capabilities(message)
+        self.assertEqual(redact_capabilities(redacted), redacted)
+        encoded = redacted.encode("utf-8")
+        self.assertEqual(redact_capabilities_bytes(encoded), encoded)
+
+    def test_after_d(self) -> None:
+        """
+        A real capability string right after "D:" is still redacted, in
+        ``str`` and ``bytes`` text.
+        """
+        secret = "5wp23saa7oxr2lw6ly7iawyndy"
+        cap = f"URI:DIR2:{secret}:4j7ki5a64zkzo2jpynqdacgejtpibpd5k25eexzdidnheaczsxlq"
+        for before in ["PWD:", "ID:", "uri=D:", "D:"]:
+            message = f"{before}{cap}"
+            redacted = redact_capabilities(message)
+            self.assertNotIn(secret, redacted)
+            self.assertEqual(redacted, before + redact_capabilities(cap))
+            self.assertEqual(redact_capabilities(redacted), redacted)
+            encoded = message.encode("ascii")
+            self.assertNotIn(secret.encode("ascii"), redact_capabilities_bytes(encoded))
+            self.assertNotIn(
+                secret.encode("ascii"), redact_capabilities_bytes(memoryview(encoded))
+            )
+
+    def test_unchanged(self) -> None:
+        """
+        Text without capability strings is returned as it is.
+        """
+        for message in ["nothing here", "URI: but no capability", "URI:CHK:"]:
+            self.assertIs(redact_capabilities(message), message)
+            encoded = message.encode("ascii")
+            self.assertIs(redact_capabilities_bytes(encoded), encoded)
+            self.assertEqual(redact_capabilities_bytes(bytearray(encoded)), encoded)
+
+    def test_malformed(self) -> None:
+        """
+        Something after a capability prefix which cannot be parsed is
+        scrubbed whole.
+        """
+        for malformed in [
+            "URI:CHK:intrb3iinc7ushk6krxnbqrvfm:iyi4bqhr45ib4hzyvuv2tdifoq:1:3",
+            "URI:SSK:5wp23saa7oxr2lw6ly7iawyndy",
+            "URI:DIR2:not!base32:abc",
+        ]:
+            redacted = redact_capabilities(f"a {malformed} b")
+            secret = malformed.split(":")[2].split("!")[0]
+            self.assertNotIn(secret, redacted)
+            self.assertRegex(redacted, "^a D:URI:[A-Z2-]+:[a-z2-7]+")
+
+
+class RedactingFilterTests(TestCase):
+    """
+    Tests for ``RedactingFilter``.
+    """
+
+    def test_filter(self) -> None:
+        """
+        Capability strings in a logged message and its arguments are
+        replaced before the message is emitted.
+        """
+        cap = "URI:SSK:5wp23saa7oxr2lw6ly7iawyndy:4j7ki5a64zkzo2jpynqdacgejtpibpd5k25eexzdidnheaczsxlq"
+        logger = logging.getLogger(__name__)
+        redacting = RedactingFilter()
+        logger.addFilter(redacting)
+        self.addCleanup(logger.removeFilter, redacting)
+        with self.assertLogs(logger) as logs:
+            logger.info("opened %s", cap)
+            logger.info(f"closed {cap}")
+            logger.info("no capability %d", 1)
+        digested = redact_capabilities(cap)
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            [f"opened {digested}", f"closed {digested}", "no capability 1"],
+        )
+
+    def test_unformattable(self) -> None:
+        """
+        A record whose message cannot be formatted with its arguments is
+        passed on unchanged.
+        """
+        record = logging.LogRecord(
+            __name__, logging.INFO, __file__, 1, "%d items", ("many",), None
+        )
+        self.assertTrue(RedactingFilter().filter(record))
+        self.assertEqual((record.msg, record.args), ("%d items", ("many",)))
@@ -0,0 +1,60 @@
+from mmap import mmap
+from tempfile import TemporaryFile
+from typing import List
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import lists, text
+
+from tahoe_capabilities import (
+    Capability,
+    danger_real_capability_string,
+    find_capabilities,
+    iter_capabilities,
+)
+from tahoe_capabilities.strategies import capabilities
+
+# Text which cannot run into a capability string on either side of it.
+separators = text(alphabet=" \n,.;()[]\"'=!", min_size=1)
+
+
+class ScannerTests(TestCase):
+    """
+    Tests for ``find_capabilities`` and ``iter_capabilities``.
+    """
+
+    @given(lists(capabilities()), separators)
+    def test_find(self, caps: List[Capability], sep: str) -> None:
+        """
+        ``find_capabilities`` gives the span and prefix of each capability
+        string and ``iter_capabilities`` parses them, in ``str``, ``bytes``
+        and ``mmap`` text.
+        """
+        blob = ""
+        expected = []
+        for cap in caps:
+            blob += sep
+            s = danger_real_capability_string(cap)
+            expected.append((len(blob), len(blob) + len(s), cap.prefix))
+            blob += s
+        blob += sep
+        encoded = blob.encode("ascii")
+        self.assertEqual(list(find_capabilities(blob)), expected)
+        self.assertEqual(list(find_capabilities(encoded)), expected)
+        self.assertEqual(list(iter_capabilities(blob)), caps)
+        self.assertEqual(list(iter_capabilities(memoryview(encoded), True)), caps)
+        with TemporaryFile() as f:
+            f.write(encoded)
+            f.flush()
+            with mmap(f.fileno(), 0) as m:
+                self.assertEqual(list(find_capabilities(m)), expected)
+                self.assertEqual(list(iter_capabilities(m)), caps)
+
+    def test_malformed(self) -> None:
+        """
+        Strings which look like capabilities but cannot be parsed are found
+        but not parsed, and digested capability strings are not found.
+        """
+        blob = "URI:CHK:a:b:1:2:3 D:URI:CHK:xnfhphzyplwsk:1:3:120 URI:SSK:abc"
+        self.assertEqual(list(find_capabilities(blob)), [(0, 17, "CHK")])
+        self.assertEqual(list(iter_capabilities(blob)), [])
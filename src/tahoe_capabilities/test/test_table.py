@@ -0,0 +1,74 @@
+from typing import List
+from unittest import TestCase
+
+from hypothesis import given
+from hypothesis.strategies import integers, lists
+
+from tahoe_capabilities import Capability, danger_real_capability_string
+from tahoe_capabilities.index import storage_index
+from tahoe_capabilities.strategies import capabilities
+from tahoe_capabilities.table import CapabilityTable
+
+
+class CapabilityTableTests(TestCase):
+    """
+    Tests for ``CapabilityTable``.
+    """
+
+    @given(lists(capabilities()))
+    def test_roundtrip(self, caps: List[Capability]) -> None:
+        """
+        A table built from capabilities gives back equal capabilities, by
+        index and by iteration.
+        """
+        table = CapabilityTable(caps)
+        self.assertEqual(len(table), len(caps))
+        self.assertEqual(list(table), caps)
+        self.assertEqual([table[i] for i in range(-len(caps), 0)], caps)
+        self.assertEqual(
+            [table.prefix(i) for i in range(len(caps))],
+            [cap.prefix for cap in caps],
+        )
+        self.assertEqual(
+            [table.storage_index(i) for i in range(len(caps))],
+            list(map(storage_index, caps)),
+        )
+        with self.assertRaises(IndexError):
+            table[len(caps)]
+
+    @given(
+        lists(capabilities(), max_size=10),
+        integers(-12, 12),
+        integers(-12, 12),
+        integers(-3, 3).filter(bool),
+    )
+    def test_slice(
+        self, caps: List[Capability], start: int, stop: int, step: int
+    ) -> None:
+        """
+        Slicing a table gives a table of the same capabilities as slicing a
+        list of them.
+        """
+        self.assertEqual(
+            list(CapabilityTable(caps)[start:stop:step]), caps[start:stop:step]
+        )
+
+    @given(lists(capabilities()), lists(capabilities()))
+    def test_extend_table(self, a: List[Capability], b: List[Capability]) -> None:
+        """
+        ``CapabilityTable.extend_table`` adds the rows of another table.
+        """
+        table = CapabilityTable(a)
+        table.extend_table(CapabilityTable(b))
+        table.extend_table(table)
+        self.assertEqual(list(table), (a + b) * 2)
+
+    @given(lists(capabilities()))
+    def test_extend_from_strings(self, caps: List[Capability]) -> None:
+        """
+        ``CapabilityTable.extend_from_strings`` adds the capabilities the
+        strings represent.
+        """
+        table = CapabilityTable()
+        table.extend_from_strings(map(danger_real_capability_string, caps))
+        self.assertEqual(list(table), caps)
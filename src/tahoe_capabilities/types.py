@@ -1,12 +1,55 @@
-from typing import Tuple, Union
-
-from attrs import field, frozen
-
-from .hashutil import ssk_readkey_hash, ssk_storage_index_hash, storage_index_hash
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from attrs import NOTHING, field, fields, frozen
+
+from .hashutil import (
+    ssk_readkey_hash,
+    ssk_readkey_hash_many,
+    ssk_storage_index_hash,
+    ssk_storage_index_hash_many,
+    storage_index_hash,
+    storage_index_hash_many,
+)
+
+# The bits of the ``kind`` of each capability class.  Every kind has one of
+# the verify, read and write bits, one of the mutable and immutable bits and
+# one of the format bits, and the directory bit if it is a directory.
+KIND_VERIFY = 1 << 0
+KIND_READ = 1 << 1
+KIND_WRITE = 1 << 2
+KIND_MUTABLE = 1 << 3
+KIND_IMMUTABLE = 1 << 4
+KIND_DIRECTORY = 1 << 5
+KIND_LITERAL = 1 << 6
+KIND_CHK = 1 << 7
+KIND_SSK = 1 << 8
+KIND_MDMF = 1 << 9
+
+
+class _View:
+    """
+    Space for the weaker capability made by the ``reader`` or ``verifier``
+    property of a directory capability, which is kept once it is made.
+    """
+
+    __slots__ = ("_view",)
 
 
 @frozen
 class LiteralRead:
+    kind: ClassVar[int] = KIND_READ | KIND_IMMUTABLE | KIND_LITERAL
+
     data: bytes
     prefix: str = "LIT"
     suffix: Tuple[str, ...] = field(init=False, default=())
@@ -18,6 +61,8 @@ class LiteralRead:
 
 @frozen
 class LiteralDirectoryRead:
+    kind: ClassVar[int] = KIND_READ | KIND_IMMUTABLE | KIND_DIRECTORY | KIND_LITERAL
+
     cap_object: LiteralRead
     prefix: str = "DIR2-LIT"
     suffix: Tuple[str, ...] = field(init=False, default=())
@@ -29,6 +74,8 @@ class LiteralDirectoryRead:
 
 @frozen
 class CHKVerify:
+    kind: ClassVar[int] = KIND_VERIFY | KIND_IMMUTABLE | KIND_CHK
+
     storage_index: bytes
     uri_extension_hash: bytes
     needed: int
@@ -47,6 +94,8 @@ class CHKVerify:
 
 @frozen
 class CHKRead:
+    kind: ClassVar[int] = KIND_READ | KIND_IMMUTABLE | KIND_CHK
+
     readkey: bytes = field(repr=False)
     verifier: CHKVerify
     prefix: str = "CHK"
@@ -59,12 +108,43 @@ class CHKRead:
         needed: int,
         total: int,
         size: int,
+        lazy: bool = False,
     ) -> "CHKRead":
+        """
+        Compute the storage index for a CHK read capability.
+
+        :param lazy: If ``True``, postpone computing it until it is first
+            used.
+        """
+        if lazy:
+            return _new_lazy(
+                _LazyCHKRead,
+                (uri_extension_hash, needed, total, size),
+                readkey=readkey,
+            )
         storage_index = storage_index_hash(readkey)
         return CHKRead(
             readkey, CHKVerify(storage_index, uri_extension_hash, needed, total, size)
         )
 
+    @classmethod
+    def derive_many(
+        cls,
+        readkeys: List[bytes],
+        uri_extension_hashes: List[bytes],
+        neededs: List[int],
+        totals: List[int],
+        sizes: List[int],
+    ) -> List["CHKRead"]:
+        storage_indexes = storage_index_hash_many(readkeys)
+        return [
+            CHKRead(readkey, CHKVerify(*verify_fields))
+            for readkey, verify_fields in zip(
+                readkeys,
+                zip(storage_indexes, uri_extension_hashes, neededs, totals, sizes),
+            )
+        ]
+
     @property
     def needed(self) -> int:
         return self.verifier.needed
@@ -88,6 +168,8 @@ class CHKRead:
 
 @frozen
 class CHKDirectoryVerify:
+    kind: ClassVar[int] = KIND_VERIFY | KIND_IMMUTABLE | KIND_DIRECTORY | KIND_CHK
+
     cap_object: CHKVerify
     prefix: str = "DIR2-CHK-Verifier"
 
@@ -101,13 +183,19 @@ class CHKDirectoryVerify:
 
 
 @frozen
-class CHKDirectoryRead:
+class CHKDirectoryRead(_View):
+    kind: ClassVar[int] = KIND_READ | KIND_IMMUTABLE | KIND_DIRECTORY | KIND_CHK
+
     cap_object: CHKRead
     prefix: str = "DIR2-CHK"
 
     @property
     def verifier(self) -> CHKDirectoryVerify:
-        return CHKDirectoryVerify(self.cap_object.verifier)
+        view: Optional[CHKDirectoryVerify] = getattr(self, "_view", None)
+        if view is None:
+            view = CHKDirectoryVerify(self.cap_object.verifier)
+            object.__setattr__(self, "_view", view)
+        return view
 
     @property
     def secrets(self) -> Tuple[bytes, ...]:
@@ -120,6 +208,8 @@ class CHKDirectoryRead:
 
 @frozen
 class SSKVerify:
+    kind: ClassVar[int] = KIND_VERIFY | KIND_MUTABLE | KIND_SSK
+
     storage_index: bytes
     fingerprint: bytes
     prefix: str = "SSK-Verifier"
@@ -132,16 +222,40 @@ class SSKVerify:
 
 @frozen
 class SSKRead:
+    kind: ClassVar[int] = KIND_READ | KIND_MUTABLE | KIND_SSK
+
     readkey: bytes = field(repr=False)
     verifier: SSKVerify
     prefix: str = "SSK-RO"
     suffix: Tuple[str, ...] = field(init=False, default=())
 
     @classmethod
-    def derive(cls, readkey: bytes, fingerprint: bytes) -> "SSKRead":
+    def derive(
+        cls, readkey: bytes, fingerprint: bytes, lazy: bool = False
+    ) -> "SSKRead":
+        """
+        Compute the storage index for a read capability.
+
+        :param lazy: If ``True``, postpone computing it until it is first
+            used.
+        """
+        if lazy:
+            return _new_lazy(_LazySSKRead, (fingerprint,), readkey=readkey)
         storage_index = ssk_storage_index_hash(readkey)
         return SSKRead(readkey, SSKVerify(storage_index, fingerprint))
 
+    @classmethod
+    def derive_many(
+        cls, readkeys: List[bytes], fingerprints: List[bytes]
+    ) -> List["SSKRead"]:
+        storage_indexes = ssk_storage_index_hash_many(readkeys)
+        return [
+            SSKRead(readkey, SSKVerify(storage_index, fingerprint))
+            for readkey, storage_index, fingerprint in zip(
+                readkeys, storage_indexes, fingerprints
+            )
+        ]
+
     @property
     def secrets(self) -> Tuple[bytes, ...]:
         return (self.readkey, self.verifier.fingerprint)
@@ -149,16 +263,37 @@ class SSKRead:
 
 @frozen
 class SSKWrite:
+    kind: ClassVar[int] = KIND_WRITE | KIND_MUTABLE | KIND_SSK
+
     writekey: bytes = field(repr=False)
     reader: SSKRead
     prefix: str = "SSK"
     suffix: Tuple[str, ...] = field(init=False, default=())
 
     @classmethod
-    def derive(cls, writekey: bytes, fingerprint: bytes) -> "SSKWrite":
+    def derive(
+        cls, writekey: bytes, fingerprint: bytes, lazy: bool = False
+    ) -> "SSKWrite":
+        """
+        Compute the read key and storage index for a write capability.
+
+        :param lazy: If ``True``, postpone computing them until they are
+            first used.
+        """
+        if lazy:
+            return _new_lazy(_LazySSKWrite, (fingerprint,), writekey=writekey)
         readkey = ssk_readkey_hash(writekey)
         return SSKWrite(writekey, SSKRead.derive(readkey, fingerprint))
 
+    @classmethod
+    def derive_many(
+        cls, writekeys: List[bytes], fingerprints: List[bytes]
+    ) -> List["SSKWrite"]:
+        readers = SSKRead.derive_many(ssk_readkey_hash_many(writekeys), fingerprints)
+        return [
+            SSKWrite(writekey, reader) for writekey, reader in zip(writekeys, readers)
+        ]
+
     @property
     def secrets(self) -> Tuple[bytes, ...]:
         return (self.writekey, self.reader.verifier.fingerprint)
@@ -166,6 +301,8 @@ class SSKWrite:
 
 @frozen
 class SSKDirectoryVerify:
+    kind: ClassVar[int] = KIND_VERIFY | KIND_MUTABLE | KIND_DIRECTORY | KIND_SSK
+
     cap_object: SSKVerify
     prefix: str = "DIR2-Verifier"
 
@@ -179,13 +316,19 @@ class SSKDirectoryVerify:
 
 
 @frozen
-class SSKDirectoryRead:
+class SSKDirectoryRead(_View):
+    kind: ClassVar[int] = KIND_READ | KIND_MUTABLE | KIND_DIRECTORY | KIND_SSK
+
     cap_object: SSKRead
     prefix: str = "DIR2-RO"
 
     @property
     def verifier(self) -> SSKDirectoryVerify:
-        return SSKDirectoryVerify(self.cap_object.verifier)
+        view: Optional[SSKDirectoryVerify] = getattr(self, "_view", None)
+        if view is None:
+            view = SSKDirectoryVerify(self.cap_object.verifier)
+            object.__setattr__(self, "_view", view)
+        return view
 
     @property
     def secrets(self) -> Tuple[bytes, ...]:
@@ -197,13 +340,19 @@ class SSKDirectoryRead:
 
 
 @frozen
-class SSKDirectoryWrite:
+class SSKDirectoryWrite(_View):
+    kind: ClassVar[int] = KIND_WRITE | KIND_MUTABLE | KIND_DIRECTORY | KIND_SSK
+
     cap_object: SSKWrite
     prefix: str = "DIR2"
 
     @property
     def reader(self) -> SSKDirectoryRead:
-        return SSKDirectoryRead(self.cap_object.reader)
+        view: Optional[SSKDirectoryRead] = getattr(self, "_view", None)
+        if view is None:
+            view = SSKDirectoryRead(self.cap_object.reader)
+            object.__setattr__(self, "_view", view)
+        return view
 
     @property
     def secrets(self) -> Tuple[bytes, ...]:
@@ -216,6 +365,8 @@ class SSKDirectoryWrite:
 
 @frozen
 class MDMFVerify:
+    kind: ClassVar[int] = KIND_VERIFY | KIND_MUTABLE | KIND_MDMF
+
     storage_index: bytes
     fingerprint: bytes
     prefix: str = "MDMF-Verifier"
@@ -228,16 +379,40 @@ class MDMFVerify:
 
 @frozen
 class MDMFRead:
+    kind: ClassVar[int] = KIND_READ | KIND_MUTABLE | KIND_MDMF
+
     readkey: bytes = field(repr=False)
     verifier: MDMFVerify
     prefix: str = "MDMF-RO"
     suffix: Tuple[str, ...] = field(init=False, default=())
 
     @classmethod
-    def derive(cls, readkey: bytes, fingerprint: bytes) -> "MDMFRead":
+    def derive(
+        cls, readkey: bytes, fingerprint: bytes, lazy: bool = False
+    ) -> "MDMFRead":
+        """
+        Compute the storage index for a read capability.
+
+        :param lazy: If ``True``, postpone computing it until it is first
+            used.
+        """
+        if lazy:
+            return _new_lazy(_LazyMDMFRead, (fingerprint,), readkey=readkey)
         storage_index = ssk_storage_index_hash(readkey)
         return MDMFRead(readkey, MDMFVerify(storage_index, fingerprint))
 
+    @classmethod
+    def derive_many(
+        cls, readkeys: List[bytes], fingerprints: List[bytes]
+    ) -> List["MDMFRead"]:
+        storage_indexes = ssk_storage_index_hash_many(readkeys)
+        return [
+            MDMFRead(readkey, MDMFVerify(storage_index, fingerprint))
+            for readkey, storage_index, fingerprint in zip(
+                readkeys, storage_indexes, fingerprints
+            )
+        ]
+
     @property
     def secrets(self) -> Tuple[bytes, ...]:
         return (self.readkey, self.verifier.fingerprint)
@@ -245,16 +420,37 @@ class MDMFRead:
 
 @frozen
 class MDMFWrite:
+    kind: ClassVar[int] = KIND_WRITE | KIND_MUTABLE | KIND_MDMF
+
     writekey: bytes = field(repr=False)
     reader: MDMFRead
     prefix: str = "MDMF"
     suffix: Tuple[str, ...] = field(init=False, default=())
 
     @classmethod
-    def derive(cls, writekey: bytes, fingerprint: bytes) -> "MDMFWrite":
+    def derive(
+        cls, writekey: bytes, fingerprint: bytes, lazy: bool = False
+    ) -> "MDMFWrite":
+        """
+        Compute the read key and storage index for a write capability.
+
+        :param lazy: If ``True``, postpone computing them until they are
+            first used.
+        """
+        if lazy:
+            return _new_lazy(_LazyMDMFWrite, (fingerprint,), writekey=writekey)
         readkey = ssk_readkey_hash(writekey)
         return MDMFWrite(writekey, MDMFRead.derive(readkey, fingerprint))
 
+    @classmethod
+    def derive_many(
+        cls, writekeys: List[bytes], fingerprints: List[bytes]
+    ) -> List["MDMFWrite"]:
+        readers = MDMFRead.derive_many(ssk_readkey_hash_many(writekeys), fingerprints)
+        return [
+            MDMFWrite(writekey, reader) for writekey, reader in zip(writekeys, readers)
+        ]
+
     @property
     def secrets(self) -> Tuple[bytes, ...]:
         return (self.writekey, self.reader.verifier.fingerprint)
@@ -262,6 +458,8 @@ class MDMFWrite:
 
 @frozen
 class MDMFDirectoryVerify:
+    kind: ClassVar[int] = KIND_VERIFY | KIND_MUTABLE | KIND_DIRECTORY | KIND_MDMF
+
     cap_object: MDMFVerify
     prefix: str = "DIR2-MDMF-Verifier"
 
@@ -275,13 +473,19 @@ class MDMFDirectoryVerify:
 
 
 @frozen
-class MDMFDirectoryRead:
+class MDMFDirectoryRead(_View):
+    kind: ClassVar[int] = KIND_READ | KIND_MUTABLE | KIND_DIRECTORY | KIND_MDMF
+
     cap_object: MDMFRead
     prefix: str = "DIR2-MDMF-RO"
 
     @property
     def verifier(self) -> MDMFDirectoryVerify:
-        return MDMFDirectoryVerify(self.cap_object.verifier)
+        view: Optional[MDMFDirectoryVerify] = getattr(self, "_view", None)
+        if view is None:
+            view = MDMFDirectoryVerify(self.cap_object.verifier)
+            object.__setattr__(self, "_view", view)
+        return view
 
     @property
     def secrets(self) -> Tuple[bytes, ...]:
@@ -293,13 +497,19 @@ class MDMFDirectoryRead:
 
 
 @frozen
-class MDMFDirectoryWrite:
+class MDMFDirectoryWrite(_View):
+    kind: ClassVar[int] = KIND_WRITE | KIND_MUTABLE | KIND_DIRECTORY | KIND_MDMF
+
     cap_object: MDMFWrite
     prefix: str = "DIR2-MDMF"
 
     @property
     def reader(self) -> MDMFDirectoryRead:
-        return MDMFDirectoryRead(self.cap_object.reader)
+        view: Optional[MDMFDirectoryRead] = getattr(self, "_view", None)
+        if view is None:
+            view = MDMFDirectoryRead(self.cap_object.reader)
+            object.__setattr__(self, "_view", view)
+        return view
 
     @property
     def secrets(self) -> Tuple[bytes, ...]:
@@ -310,6 +520,207 @@ class MDMFDirectoryWrite:
         return self.cap_object.suffix
 
 
+# Lazily derived capabilities.
+#
+# derive(..., lazy=True) returns instances of these subclasses.  They hold
+# the values needed to derive their verifier or reader in an extra slot and
+# only do the hashing the first time the verifier or reader is used.  After
+# that they keep the result in the slot the eager class uses.  Everything
+# that does not need the derived values - secrets, suffix, and so
+# serialization - is answered without it.
+#
+# They compare equal to and hash the same as the eagerly derived object of
+# the class they extend.  Pickling or copying one gives the eager object.
+
+_T = TypeVar("_T")
+
+
+def _new_lazy(cls: Type[_T], inputs: Tuple[Any, ...], **values: Any) -> _T:
+    """
+    Make a lazily derived capability with the given field values, leaving
+    the derived field unset.
+    """
+    self = object.__new__(cls)
+    for a in fields(cast(Any, cls)):
+        if a.name in values:
+            object.__setattr__(self, a.name, values[a.name])
+        elif a.default is not NOTHING:
+            object.__setattr__(self, a.name, a.default)
+    object.__setattr__(self, "_inputs", inputs)
+    return self
+
+
+def _lazy_field(
+    base: type,
+    name: str,
+    derive: Callable[[Any], Any],
+    inputs_of: Callable[[Any], Tuple[Any, ...]],
+) -> Any:
+    """
+    Make a property which reads the attrs field ``name`` of ``base``,
+    computing it with ``derive`` the first time if it is unset.
+
+    The field can still be set by ``base.__init__`` (for example, through
+    ``attrs.evolve``).  Then ``inputs_of`` recovers the values it would have
+    been derived from.
+    """
+    slot = base.__dict__[name]
+
+    def get(self: Any) -> Any:
+        try:
+            return slot.__get__(self, type(self))
+        except AttributeError:
+            value = derive(self)
+            slot.__set__(self, value)
+            return value
+
+    def set(self: Any, value: Any) -> None:
+        slot.__set__(self, value)
+        object.__setattr__(self, "_inputs", inputs_of(value))
+
+    return property(get, set)
+
+
+def _lazy_eq(base: type) -> Callable[[Any, object], Any]:
+    names = [a.name for a in fields(base) if a.eq]
+
+    def __eq__(self: Any, other: object) -> Any:
+        if type(other) is not base and type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in names)
+
+    return __eq__
+
+
+def _lazy_reduce(base: type) -> Callable[[Any], Any]:
+    names = [a.name for a in fields(base) if a.init]
+
+    def __reduce__(self: Any) -> Any:
+        return (base, tuple(getattr(self, name) for name in names))
+
+    return __reduce__
+
+
+class _LazyCHKRead(CHKRead):
+    __slots__ = ("_inputs",)
+    _inputs: Tuple[bytes, int, int, int]
+
+    verifier = _lazy_field(
+        CHKRead,
+        "verifier",
+        lambda self: CHKVerify(storage_index_hash(self.readkey), *self._inputs),
+        lambda verifier: (
+            verifier.uri_extension_hash,
+            verifier.needed,
+            verifier.total,
+            verifier.size,
+        ),
+    )
+    __eq__ = _lazy_eq(CHKRead)
+    __hash__ = CHKRead.__hash__
+    __reduce__ = _lazy_reduce(CHKRead)
+
+    @property
+    def needed(self) -> int:
+        return self._inputs[1]
+
+    @property
+    def total(self) -> int:
+        return self._inputs[2]
+
+    @property
+    def size(self) -> int:
+        return self._inputs[3]
+
+    @property
+    def secrets(self) -> Tuple[bytes, ...]:
+        return (self.readkey, self._inputs[0])
+
+    @property
+    def suffix(self) -> Tuple[str, ...]:
+        return tuple(map(str, self._inputs[1:]))
+
+
+class _LazySSKRead(SSKRead):
+    __slots__ = ("_inputs",)
+    _inputs: Tuple[bytes]
+
+    verifier = _lazy_field(
+        SSKRead,
+        "verifier",
+        lambda self: SSKVerify(ssk_storage_index_hash(self.readkey), *self._inputs),
+        lambda verifier: (verifier.fingerprint,),
+    )
+    __eq__ = _lazy_eq(SSKRead)
+    __hash__ = SSKRead.__hash__
+    __reduce__ = _lazy_reduce(SSKRead)
+
+    @property
+    def secrets(self) -> Tuple[bytes, ...]:
+        return (self.readkey, self._inputs[0])
+
+
+class _LazySSKWrite(SSKWrite):
+    __slots__ = ("_inputs",)
+    _inputs: Tuple[bytes]
+
+    reader = _lazy_field(
+        SSKWrite,
+        "reader",
+        lambda self: SSKRead.derive(
+            ssk_readkey_hash(self.writekey), self._inputs[0], lazy=True
+        ),
+        lambda reader: (reader.verifier.fingerprint,),
+    )
+    __eq__ = _lazy_eq(SSKWrite)
+    __hash__ = SSKWrite.__hash__
+    __reduce__ = _lazy_reduce(SSKWrite)
+
+    @property
+    def secrets(self) -> Tuple[bytes, ...]:
+        return (self.writekey, self._inputs[0])
+
+
+class _LazyMDMFRead(MDMFRead):
+    __slots__ = ("_inputs",)
+    _inputs: Tuple[bytes]
+
+    verifier = _lazy_field(
+        MDMFRead,
+        "verifier",
+        lambda self: MDMFVerify(ssk_storage_index_hash(self.readkey), *self._inputs),
+        lambda verifier: (verifier.fingerprint,),
+    )
+    __eq__ = _lazy_eq(MDMFRead)
+    __hash__ = MDMFRead.__hash__
+    __reduce__ = _lazy_reduce(MDMFRead)
+
+    @property
+    def secrets(self) -> Tuple[bytes, ...]:
+        return (self.readkey, self._inputs[0])
+
+
+class _LazyMDMFWrite(MDMFWrite):
+    __slots__ = ("_inputs",)
+    _inputs: Tuple[bytes]
+
+    reader = _lazy_field(
+        MDMFWrite,
+        "reader",
+        lambda self: MDMFRead.derive(
+            ssk_readkey_hash(self.writekey), self._inputs[0], lazy=True
+        ),
+        lambda reader: (reader.verifier.fingerprint,),
+    )
+    __eq__ = _lazy_eq(MDMFWrite)
+    __hash__ = MDMFWrite.__hash__
+    __reduce__ = _lazy_reduce(MDMFWrite)
+
+    @property
+    def secrets(self) -> Tuple[bytes, ...]:
+        return (self.writekey, self._inputs[0])
+
+
 VerifyCapability = Union[
     CHKVerify,
     SSKVerify,